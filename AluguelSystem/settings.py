@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,6 +43,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its total covers the other middleware too
+    'Core.profiling.ProfilingMiddleware',
+    'Core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,9 +82,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reuse connections across requests (so the PRAGMAs below run once per
+        # connection, not per request); checked before reuse
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # BEGIN IMMEDIATE: a transaction takes the write lock up front and
+            # waits for it (busy_timeout) instead of failing with "database is
+            # locked" when a read inside it later turns into a write
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Applied to every new SQLite connection (Core.signals.configure_sqlite). WAL
+# lets readers and the writer work at the same time; with it, NORMAL sync is
+# still safe against corruption (only the last commits may be lost on power
+# failure)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,  # ms waiting for a lock before giving up
+    'cache_size': -32000,  # negative: in KiB, so 32 MB of page cache per connection
+    'mmap_size': 256 * 1024 * 1024,  # read the file through memory mapping
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Per-process memory cache. When running several worker processes use a shared
+# backend (FileBasedCache, Redis, Memcached) so every worker sees the version
+# bumps that invalidate cached API responses.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'aluguelsystem',
     }
 }
 
+# Seconds a cached API response is kept (entries are also invalidated on write)
+API_CACHE_TIMEOUT = 5 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,11 +169,68 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Largest equipment photo accepted. Uploads are streamed: files above
+# FILE_UPLOAD_MAX_MEMORY_SIZE (Django default: 2.5 MB) are spooled to disk
+EQUIPAMENTO_FOTO_MAX_SIZE = 10 * 1024 * 1024
+
+# How protected media (Core.media) is sent once the user is authorized:
+# None streams it from Django; 'x-accel-redirect' (nginx) or 'x-sendfile'
+# (Apache mod_xsendfile, lighttpd) lets the front proxy send the file instead.
+# For nginx, MEDIA_ACCEL_PREFIX must be an `internal` location aliased to
+# MEDIA_ROOT.
+MEDIA_OFFLOAD = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
 # Login/Logout URLs
 LOGIN_URL = '/admin/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/admin/login/'
 
+# Rental expiry job (python manage.py expire_rentals)
+RENTAL_EXPIRY_INTERVAL = 5 * 60  # seconds between runs in --loop mode
+RENTAL_EXPIRY_HISTORY_DAYS = 7  # how long run records are kept
+
+# Delta sync API (/api/sync/): deletion tombstones are kept this long; replicas
+# that have not synced for longer are told to rebuild from scratch
+SYNC_TOMBSTONE_DAYS = 30
+
+# Threads that resize uploaded equipment photos (Core.renditions)
+PHOTO_RENDITION_WORKERS = 2
+
+# Serve the read-heavy API endpoints with the native async views of
+# Core.async_views (ASGI only; set DJANGO_ASYNC_VIEWS=1). Measure with
+# `manage.py benchmark_asgi` first: every async ORM and cache call is a hop to
+# Django's sync thread, which on SQLite costs more than it saves
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
+# Per-request profiling (Core.profiling): Server-Timing header, a log of the
+# latest PROFILING_LOG_SIZE requests at /api/profiling/ and a warning when a
+# request runs the same SQL PROFILING_N_PLUS_ONE_THRESHOLD times or more.
+# Off unless DJANGO_PROFILING=1; in production, profile a sample of requests
+# with DJANGO_PROFILING_SAMPLE_RATE (e.g. 0.05)
+PROFILING_ENABLED = os.environ.get('DJANGO_PROFILING') == '1'
+PROFILING_SAMPLE_RATE = float(os.environ.get('DJANGO_PROFILING_SAMPLE_RATE', '1'))
+PROFILING_LOG_SIZE = 500
+PROFILING_N_PLUS_ONE_THRESHOLD = 5
+
+# Prometheus metrics at /api/metrics/ (Core.metrics). Scrapers authenticate
+# with `Authorization: Bearer <METRICS_TOKEN>`; staff sessions work too. The
+# rental/equipment gauges are cached for METRICS_GAUGE_TTL seconds
+METRICS_ENABLED = True
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN')
+METRICS_GAUGE_TTL = 30
+
+# Limits checked by `manage.py benchmark_api`, per route name ('default'
+# applies to all): p50_ms, p95_ms, p99_ms, queries (per request) and bytes
+API_BENCHMARK_BUDGET = {
+    'default': {'p95_ms': 250, 'queries': 10},
+    # Full dump: grows with the table, streamed
+    'export_api': {'p95_ms': 2000},
+}
+
+# Directory for the cross-process lock files used by background jobs
+LOCK_DIR = Path(tempfile.gettempdir()) / 'aluguelsystem'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -41,3 +41,8 @@ class AluguelAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+    def get_queryset(self, request):
+        # Aluguel.__str__ (page titles, messages, delete confirmations) reads
+        # both relations; join them instead of fetching them per object
+        return super().get_queryset(request).select_related('cliente', 'equipamento')
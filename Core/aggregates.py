@@ -0,0 +1,137 @@
+from collections import Counter
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import caching
+from .models import Agregado, Aluguel, Equipamento
+
+ACTIVE_RENTAL_STATUSES = ('aberto', 'em_andamento')
+ACTIVE_RENTALS_KEY = 'alugueis:ativos'
+# Written by rebuild(): until it exists the counters were never computed, and
+# deltas applied on top of nothing would leave them wrong for good
+BUILT_KEY = 'agregados:construidos'
+
+CENTS = Decimal('0.01')
+
+
+def equipment_status_key(status):
+    return f'equipamentos:{status}'
+
+
+def revenue_key(moment):
+    """Monthly revenue bucket, in local time like the dashboard's month"""
+    return f'receita:{timezone.localtime(moment):%Y-%m}'
+
+
+def rental_contribution(status, valor_total, updated_at):
+    """What one rental adds to the counters in the given state"""
+    contribution = Counter()
+    if status in ACTIVE_RENTAL_STATUSES:
+        contribution[ACTIVE_RENTALS_KEY] += 1
+    if status == 'fechado' and valor_total is not None and updated_at is not None:
+        contribution[revenue_key(updated_at)] += Decimal(valor_total).quantize(CENTS)
+    return contribution
+
+
+def diff(new, old):
+    deltas = Counter(new)
+    deltas.subtract(old)
+    return deltas
+
+
+def ensure_built():
+    """Rebuild the counters if they were never built; True if it did"""
+    if Agregado.objects.filter(chave=BUILT_KEY).exists():
+        return False
+    rebuild()
+    return True
+
+
+def apply_deltas(deltas):
+    """
+    Add each delta to its counter with an atomic UPDATE ... SET valor = valor + delta.
+    The first write on a database whose counters were never built rebuilds
+    them instead; the source tables already include the change.
+    """
+    if ensure_built():
+        return
+    for chave, delta in deltas.items():
+        if not delta:
+            continue
+        updated = Agregado.objects.filter(chave=chave).update(valor=F('valor') + delta)
+        if not updated:
+            _, created = Agregado.objects.get_or_create(chave=chave, defaults={'valor': delta})
+            if not created:
+                Agregado.objects.filter(chave=chave).update(valor=F('valor') + delta)
+
+
+def rebuild():
+    """Recompute every counter from the source tables"""
+    rows = Counter()
+    for row in Equipamento.objects.values('status').annotate(total=Count('id')).order_by():
+        rows[equipment_status_key(row['status'])] = row['total']
+    rows[ACTIVE_RENTALS_KEY] = Aluguel.objects.filter(status__in=ACTIVE_RENTAL_STATUSES).count()
+    revenue = (
+        Aluguel.objects
+        .filter(status='fechado', valor_total__isnull=False)
+        .annotate(mes=TruncMonth('updated_at', tzinfo=timezone.get_current_timezone()))
+        .values('mes')
+        .annotate(total=Sum('valor_total'))
+        .order_by()
+    )
+    for row in revenue:
+        rows[f"receita:{row['mes']:%Y-%m}"] = row['total']
+    rows[BUILT_KEY] = 1
+
+    with transaction.atomic():
+        Agregado.objects.all().delete()
+        Agregado.objects.bulk_create(Agregado(chave=chave, valor=valor) for chave, valor in rows.items())
+        caching.bump_versions(caching.CLIENTE, caching.EQUIPAMENTO, caching.ALUGUEL)
+    return rows
+
+
+def dashboard_counters(now=None):
+    """
+    Read the dashboard counters in one query. Builds the table on first use so
+    a database whose counters were never computed does not report zeros.
+    """
+    now = now or timezone.now()
+    keys = _counter_keys(now)
+    values = dict(Agregado.objects.filter(chave__in=keys).values_list('chave', 'valor'))
+    if BUILT_KEY not in values:
+        rebuilt = rebuild()
+        values = {key: rebuilt[key] for key in keys if key in rebuilt}
+    return _counters(values, now)
+
+
+async def adashboard_counters(now=None):
+    """Async version of dashboard_counters(), for async views"""
+    now = now or timezone.now()
+    keys = _counter_keys(now)
+    values = {chave: valor async for chave, valor in Agregado.objects.filter(chave__in=keys).values_list('chave', 'valor')}
+    if BUILT_KEY not in values:
+        rebuilt = await sync_to_async(rebuild)()
+        values = {key: rebuilt[key] for key in keys if key in rebuilt}
+    return _counters(values, now)
+
+
+def _counter_keys(now):
+    keys = [BUILT_KEY, ACTIVE_RENTALS_KEY, revenue_key(now)]
+    keys += [equipment_status_key(status) for status, _ in Equipamento.STATUS_CHOICES]
+    return keys
+
+
+def _counters(values, now):
+    return {
+        'active_rentals': int(values.get(ACTIVE_RENTALS_KEY, 0)),
+        'monthly_revenue': Decimal(values.get(revenue_key(now), 0)).quantize(CENTS),
+        'equipment': {
+            status: int(values.get(equipment_status_key(status), 0))
+            for status, _ in Equipamento.STATUS_CHOICES
+        },
+    }
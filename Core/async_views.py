@@ -0,0 +1,157 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import login_required
+from django.http import Http404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from . import media, views
+from .aggregates import adashboard_counters
+from .caching import ALUGUEL, CLIENTE, EQUIPAMENTO, aetag, arow_etag, cached_api
+from .filters import InvalidFilter, filter_alugueis, filter_clientes, filter_equipamentos
+from .models import Aluguel, Cliente, Equipamento
+from .pagination import InvalidPageParameter, apaginate
+from .profiling import TimedJsonResponse as JsonResponse
+from .serializers import InvalidFieldset, aluguel_serializer, cliente_serializer, equipamento_serializer
+
+# Native async versions of the read-heavy endpoints of Core.views, routed
+# instead of them when ASYNC_VIEWS is on (see Core.urls). GETs run on the
+# async ORM; writes, with their transactions and signals, are handed to the
+# sync view in Core.views.
+
+
+async def list_response(serializer, queryset, request, ordering):
+    try:
+        compiled = serializer.for_request(request)
+        columns = [field.lstrip('-') for field in ordering]
+        rows, next_cursor = await apaginate(compiled.values(queryset, *columns), request, ordering)
+    except (InvalidFilter, InvalidFieldset, InvalidPageParameter) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'results': compiled.render_many(rows), 'next_cursor': next_cursor})
+
+
+async def detail_response(serializer, queryset, request):
+    """One object, fetched with only the columns the ?fields= selection needs"""
+    try:
+        compiled = serializer.for_request(request)
+    except InvalidFieldset as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    row = await compiled.values(queryset).afirst()
+    if row is None:
+        raise Http404
+    return JsonResponse(compiled.render(row))
+
+
+@require_http_methods(["GET", "HEAD"])
+@login_required
+@staff_member_required
+async def protected_media(request, path):
+    """Serve media files only to authenticated admin users"""
+    return await media.aserve(request, path)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@login_required
+@staff_member_required
+@cached_api(CLIENTE)
+async def clientes_api(request):
+    if request.method != 'GET':
+        return await sync_to_async(views.clientes_api)(request)
+    queryset = filter_clientes(Cliente.objects.all(), request)
+    return await list_response(cliente_serializer, queryset, request, ['id'])
+
+
+async def cliente_etag(request, cliente_id):
+    return await arow_etag(Cliente.objects.filter(id=cliente_id).values_list('updated_at'), request.GET.get('fields'))
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT", "DELETE"])
+@login_required
+@staff_member_required
+@aetag(cliente_etag)
+async def cliente_detail_api(request, cliente_id):
+    if request.method != 'GET':
+        return await sync_to_async(views.cliente_detail_api)(request, cliente_id)
+    return await detail_response(cliente_serializer, Cliente.objects.filter(id=cliente_id), request)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@login_required
+@staff_member_required
+@cached_api(EQUIPAMENTO)
+async def equipamentos_api(request):
+    if request.method != 'GET':
+        return await sync_to_async(views.equipamentos_api)(request)
+    queryset = filter_equipamentos(Equipamento.objects.all(), request)
+    return await list_response(equipamento_serializer, queryset, request, ['id'])
+
+
+async def equipamento_etag(request, equipamento_id):
+    return await arow_etag(Equipamento.objects.filter(id=equipamento_id).values_list('updated_at'), request.GET.get('fields'))
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT", "PATCH", "DELETE"])
+@login_required
+@staff_member_required
+@aetag(equipamento_etag)
+async def equipamento_detail_api(request, equipamento_id):
+    if request.method != 'GET':
+        return await sync_to_async(views.equipamento_detail_api)(request, equipamento_id)
+    return await detail_response(equipamento_serializer, Equipamento.objects.filter(id=equipamento_id), request)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+@login_required
+@staff_member_required
+@cached_api(ALUGUEL, CLIENTE, EQUIPAMENTO)
+async def alugueis_api(request):
+    if request.method != 'GET':
+        return await sync_to_async(views.alugueis_api)(request)
+    queryset = filter_alugueis(Aluguel.objects.all(), request)
+    # Newest first; id breaks ties between rentals created in the same instant
+    return await list_response(aluguel_serializer, queryset, request, ['-created_at', 'id'])
+
+
+async def aluguel_etag(request, aluguel_id):
+    # The rental embeds the client's and the equipment's names
+    rows = Aluguel.objects.filter(id=aluguel_id).values_list('updated_at', 'cliente__updated_at', 'equipamento__updated_at')
+    return await arow_etag(rows, request.GET.get('fields'))
+
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT", "DELETE"])
+@login_required
+@staff_member_required
+@aetag(aluguel_etag)
+async def aluguel_detail_api(request, aluguel_id):
+    if request.method != 'GET':
+        return await sync_to_async(views.aluguel_detail_api)(request, aluguel_id)
+    return await detail_response(aluguel_serializer, Aluguel.objects.filter(id=aluguel_id), request)
+
+
+async def latest_rentals(limit=5):
+    return [
+        aluguel async for aluguel in
+        Aluguel.objects.select_related('cliente', 'equipamento').order_by('-created_at')[:limit]
+    ]
+
+
+@require_http_methods(["GET"])
+@login_required
+@staff_member_required
+@cached_api(ALUGUEL, CLIENTE, EQUIPAMENTO)
+async def dashboard_stats_api(request):
+    """API endpoint to get dashboard statistics"""
+    try:
+        # Independent queries: the counters and the latest rentals
+        counters, recent = await asyncio.gather(adashboard_counters(), latest_rentals())
+        return JsonResponse(views.dashboard_payload(counters, recent))
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
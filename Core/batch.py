@@ -0,0 +1,148 @@
+import json
+from inspect import iscoroutinefunction
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve
+
+MAX_BATCH_SIZE = 25
+
+READ_METHODS = ('GET',)
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+# Request headers a sub-request does not inherit from the batch request
+_BODY_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+class InvalidBatch(ValueError):
+    """Raised when the batch body is not a list of valid sub-requests"""
+
+
+def parse(body):
+    """
+    The sub-requests of a batch: a JSON array of {"method", "url", "body",
+    "id"} objects, where only "url" is required (GET by default), "body" is
+    sent as JSON and "id" is echoed back in the result.
+    """
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise InvalidBatch("JSON inválido")
+    if not isinstance(items, list) or not items:
+        raise InvalidBatch("Envie uma lista de requisições")
+    if len(items) > MAX_BATCH_SIZE:
+        raise InvalidBatch(f"No máximo {MAX_BATCH_SIZE} requisições por lote")
+
+    parsed = []
+    for position, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('url'), str):
+            raise InvalidBatch(f"Item {position}: informe 'url'")
+        method = str(item.get('method', 'GET')).upper()
+        if method not in READ_METHODS + WRITE_METHODS:
+            raise InvalidBatch(f"Item {position}: método não suportado: {method}")
+        url = urlsplit(item['url'])
+        if not url.path.startswith('/api/') or url.path.startswith('/api/batch/'):
+            raise InvalidBatch(f"Item {position}: só as APIs podem ser chamadas no lote")
+        parsed.append({
+            'id': item.get('id', position),
+            'method': method,
+            'path': url.path,
+            'query': url.query,
+            'body': item.get('body'),
+        })
+    return parsed
+
+
+def get(url, id=None):
+    """A GET item for execute(), for batches built in code rather than parsed"""
+    url = urlsplit(url)
+    return {'id': id, 'method': 'GET', 'path': url.path, 'query': url.query, 'body': None}
+
+
+def _sub_request(request, item):
+    """A request for ``item`` with the batch request's user, session and headers"""
+    body = b'' if item['body'] is None else json.dumps(item['body']).encode('utf-8')
+    environ = {key: value for key, value in request.META.items() if key not in _BODY_META}
+    environ.update({
+        'REQUEST_METHOD': item['method'],
+        'PATH_INFO': item['path'],
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': item['query'],
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': BytesIO(body),
+        'wsgi.url_scheme': request.scheme,
+    })
+    sub_request = WSGIRequest(environ)
+    sub_request.user = request.user
+    sub_request.session = request.session
+    return sub_request
+
+
+def _result(item, response):
+    content = response.content.decode(response.charset or 'utf-8')
+    if content and response.get('Content-Type', '').startswith('application/json'):
+        content = json.loads(content)
+    return {'id': item['id'], 'status': response.status_code, 'body': content or None}
+
+
+def _error(item, status, message):
+    return {'id': item['id'], 'status': status, 'body': {'error': message}}
+
+
+def execute_one(request, item):
+    try:
+        match = resolve(item['path'])
+    except Resolver404:
+        return _error(item, 404, "Endereço não encontrado")
+    sub_request = _sub_request(request, item)
+    sub_request.resolver_match = match
+    if iscoroutinefunction(match.func):
+        response = async_to_sync(match.func)(sub_request, *match.args, **match.kwargs)
+    else:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    if response.streaming:
+        return _error(item, 400, "Respostas em fluxo (exportações) não podem ser usadas no lote")
+    return _result(item, response)
+
+
+def execute(request, items):
+    """
+    Run ``items`` in order through the existing API views and return one
+    {id, status, body} result per item, plus whether the writes committed.
+
+    A batch with writes runs inside one transaction: the first item that
+    fails (status >= 400) rolls everything back and stops the batch. The
+    failing item keeps its result; the writes before it, and the reads that
+    could have seen them, are reported as 424 since nothing was saved, and
+    the items after it as 424, not run. Read-only batches simply run every
+    item, each result independent of the others.
+    """
+    if not any(item['method'] in WRITE_METHODS for item in items):
+        return {'results': [execute_one(request, item) for item in items]}
+
+    results = []
+    failed = None
+    with transaction.atomic():
+        for position, item in enumerate(items):
+            result = execute_one(request, item)
+            results.append(result)
+            if result['status'] >= 400:
+                failed = position
+                transaction.set_rollback(True)
+                break
+
+    if failed is None:
+        return {'results': results, 'committed': True}
+
+    first_write = next(i for i, item in enumerate(items) if item['method'] in WRITE_METHODS)
+    for position in range(first_write, failed):
+        results[position] = _error(items[position], 424, f"Desfeito: o item {failed} do lote falhou")
+    results += [
+        _error(item, 424, f"Não executado: o item {failed} do lote falhou")
+        for item in items[failed + 1:]
+    ]
+    return {'results': results, 'committed': False}
@@ -0,0 +1,129 @@
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Aluguel, Equipamento
+
+ACTIVE_STATUSES = ('aberto', 'em_andamento')
+
+# Equipment in these states cannot be booked, so it has no free windows
+UNBOOKABLE_STATUSES = ('manutencao', 'indisponivel')
+
+
+class ConflitoReserva(Exception):
+    """Raised when a booking overlaps another rental of the same equipment"""
+
+    def __init__(self, conflito):
+        self.conflito = conflito
+        inicio = timezone.localtime(conflito.data_inicio).strftime('%d/%m/%Y %H:%M')
+        fim = (timezone.localtime(conflito.data_fim).strftime('%d/%m/%Y %H:%M')
+               if conflito.data_fim else 'sem data final')
+        super().__init__(f"Equipamento já reservado no período ({inicio} - {fim})")
+
+    def as_dict(self):
+        return {
+            'error': str(self),
+            'conflito': {
+                'id': self.conflito.id,
+                'data_inicio': self.conflito.data_inicio.isoformat(),
+                'data_fim': self.conflito.data_fim.isoformat() if self.conflito.data_fim else None,
+                'status': self.conflito.status,
+            },
+        }
+
+
+def blocking_rentals():
+    """
+    Rentals that occupy their equipment: active ones (open-ended when they
+    have no data_fim) and closed ones with a known period. Cancelled rentals
+    free the slot.
+    """
+    return Aluguel.objects.filter(
+        Q(status__in=ACTIVE_STATUSES) | Q(status='fechado', data_fim__isnull=False)
+    )
+
+
+def find_overlap(equipamento_id, inicio, fim, exclude_id=None):
+    """
+    A rental of the equipment whose period intersects [inicio, fim), with
+    fim=None meaning open-ended, or None.
+
+    Bookings of one equipment never overlap each other, so only the one that
+    starts last before ``fim`` can reach into the period: a single probe of
+    the (equipamento, data_inicio, data_fim) index read backwards, however
+    many bookings came before it. Open-ended rentals, which would block every
+    later booking, are checked too in case older data breaks that rule.
+    """
+    rentals = blocking_rentals().filter(equipamento_id=equipamento_id)
+    if exclude_id is not None:
+        rentals = rentals.exclude(pk=exclude_id)
+    if fim is not None:
+        rentals = rentals.filter(data_inicio__lt=fim)
+    latest = rentals.order_by('-data_inicio').first()
+    if latest is not None and (latest.data_fim is None or latest.data_fim > inicio):
+        return latest
+    return rentals.filter(status__in=ACTIVE_STATUSES, data_fim__isnull=True).order_by('data_inicio').first()
+
+
+def check_availability(equipamento_id, inicio, fim, status='aberto', exclude_id=None):
+    """
+    Raise ValueError for an invalid period and ConflitoReserva when the
+    equipment is already booked. Callers run this inside the transaction that
+    writes the rental, after locking the equipment row.
+    """
+    if fim is not None and fim <= inicio:
+        raise ValueError("A data final deve ser posterior à data inicial")
+    if status == 'cancelado':
+        return
+    conflito = find_overlap(equipamento_id, inicio, fim, exclude_id=exclude_id)
+    if conflito is not None:
+        raise ConflitoReserva(conflito)
+
+
+def _free_windows(bookings, inicio, fim):
+    """Gaps in [inicio, fim) left by bookings sorted by data_inicio"""
+    windows = []
+    cursor = inicio
+    for data_inicio, data_fim in bookings:
+        if data_inicio > cursor:
+            windows.append((cursor, min(data_inicio, fim)))
+        # Open-ended bookings occupy the rest of the range
+        cursor = max(cursor, data_fim or fim)
+        if cursor >= fim:
+            break
+    if cursor < fim:
+        windows.append((cursor, fim))
+    return windows
+
+
+def availability(inicio, fim):
+    """
+    Free windows of every equipment inside [inicio, fim).
+
+    Two queries regardless of fleet size: the equipment list, and every
+    booking that intersects the range ordered by (equipamento, data_inicio),
+    which the composite index returns already sorted. A single sweep over
+    those rows then yields the gaps per equipment.
+    Returns a list of (equipamento row, [(start, end), ...]).
+    """
+    if fim <= inicio:
+        raise ValueError("A data final deve ser posterior à data inicial")
+
+    bookings = (
+        blocking_rentals()
+        .filter(data_inicio__lt=fim)
+        .filter(Q(data_fim__isnull=True) | Q(data_fim__gt=inicio))
+        .order_by('equipamento_id', 'data_inicio')
+        .values_list('equipamento_id', 'data_inicio', 'data_fim')
+    )
+    by_equipamento = {}
+    for equipamento_id, data_inicio, data_fim in bookings.iterator():
+        by_equipamento.setdefault(equipamento_id, []).append((data_inicio, data_fim))
+
+    result = []
+    for equipamento in Equipamento.objects.order_by('id').values('id', 'nome', 'status'):
+        if equipamento['status'] in UNBOOKABLE_STATUSES:
+            windows = []
+        else:
+            windows = _free_windows(by_equipamento.get(equipamento['id'], []), inicio, fim)
+        result.append((equipamento, windows))
+    return result
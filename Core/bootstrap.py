@@ -0,0 +1,36 @@
+from . import batch
+from .models import Aluguel, Equipamento
+
+# API responses embedded in the page, by payload key: what the dashboard and
+# the first view of each tab would otherwise fetch after loading
+REQUESTS = {
+    'dashboard': '/api/dashboard/stats/',
+    'clientes': '/api/clientes/',
+    'equipamentos': '/api/equipamentos/',
+    'alugueis': '/api/alugueis/',
+}
+
+
+def status_lookups():
+    """Status values and labels of each resource, in display order"""
+    return {
+        'equipamentos': dict(Equipamento.STATUS_CHOICES),
+        'alugueis': dict(Aluguel.STATUS_CHOICES),
+    }
+
+
+def payload(request):
+    """
+    Initial data of the single-page app, embedded by the index view so the
+    first paint needs no API call: the dashboard stats, the first page of
+    each list and the status lookups.
+
+    The responses come from the API views themselves, run as a read-only
+    batch, so they match what the page would fetch and reuse the response
+    cache. A response that fails is left out (None); the page then fetches it
+    as usual.
+    """
+    results = batch.execute(request, [batch.get(url, id=key) for key, url in REQUESTS.items()])['results']
+    data = {result['id']: result['body'] if result['status'] == 200 else None for result in results}
+    data['status'] = status_lookups()
+    return data
@@ -0,0 +1,208 @@
+import hashlib
+import time
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+
+CLIENTE = 'cliente'
+EQUIPAMENTO = 'equipamento'
+ALUGUEL = 'aluguel'
+
+CACHE_HEADER = 'X-Cache'
+
+
+def _version_key(table):
+    return f'api:version:{table}'
+
+
+def get_versions(tables):
+    """Current version of each table, fetched in one cache round trip"""
+    keys = {table: _version_key(table) for table in tables}
+    stored = cache.get_many(keys.values())
+    versions = {}
+    for table, key in keys.items():
+        version = stored.get(key)
+        if version is None:
+            # Seed from the clock so an evicted counter never reuses an old version
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        versions[table] = version
+    return versions
+
+
+async def aget_versions(tables):
+    """Async version of get_versions(), for async views"""
+    keys = {table: _version_key(table) for table in tables}
+    stored = await cache.aget_many(keys.values())
+    versions = {}
+    for table, key in keys.items():
+        version = stored.get(key)
+        if version is None:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            version = await cache.aget(key)
+        versions[table] = version
+    return versions
+
+
+def _bump(tables):
+    for table in tables:
+        key = _version_key(table)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_versions(*tables):
+    """
+    Invalidate every cached response built from ``tables``. Runs after the
+    current transaction commits so no request can cache pre-commit data under
+    the new version.
+    """
+    transaction.on_commit(lambda: _bump(tables))
+
+
+def row_etag(queryset, *extra):
+    """
+    ETag of a detail response from its first row, usually the updated_at
+    values of the object and of the related rows it embeds, plus anything in
+    ``extra`` that changes the representation. None if there is no row.
+    """
+    row = queryset.first()
+    if row is None:
+        return None
+    return hashlib.md5(repr((row, extra)).encode('utf-8')).hexdigest()
+
+
+async def arow_etag(queryset, *extra):
+    """Async version of row_etag(), for async views"""
+    row = await queryset.afirst()
+    if row is None:
+        return None
+    return hashlib.md5(repr((row, extra)).encode('utf-8')).hexdigest()
+
+
+def aetag(etag_func):
+    """
+    django.views.decorators.http.etag for async views whose ETag comes from
+    the database: Django's decorator calls ``etag_func`` synchronously, while
+    this one awaits it (e.g. one built on arow_etag()).
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if etag and request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
+
+
+def set_validators(response, etag=None, last_modified=None):
+    """
+    Attach the validators of a 200 response and require revalidation, so
+    browsers always come back with If-None-Match / If-Modified-Since.
+    """
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = last_modified
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _response_key(view, tables, versions, request):
+    version_part = '.'.join(str(versions[table]) for table in tables)
+    path_hash = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+    key = f'api:response:{view.__name__}:{version_part}:{path_hash}'
+    return key, '"%s"' % hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def _cached_response(cached, etag):
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    response[CACHE_HEADER] = 'HIT'
+    return set_validators(response, etag)
+
+
+def _bypass(request):
+    """
+    Only plain GETs use the cache. A read inside a transaction (one after a
+    write in /api/batch/) may see uncommitted rows, and the versions are only
+    bumped on commit: it must neither read nor fill the cache.
+    """
+    return request.method != 'GET' or transaction.get_connection().in_atomic_block
+
+
+def _cacheable(response):
+    return response.status_code == 200 and not response.streaming
+
+
+def cached_api(*tables):
+    """
+    Cache successful GET responses of an API view under a key made of the view
+    name, the request path with its query string and the versions of
+    ``tables``. Writes bump the versions (see Core.signals), so stale entries
+    are never read again and simply expire. Adds an X-Cache: HIT/MISS header.
+    GETs run inside a transaction skip the cache altogether.
+
+    The same key, hashed, is the response's ETag: a matching If-None-Match is
+    answered with 304 Not Modified before the view or the cache is touched.
+    Works on sync and async views alike.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if _bypass(request):
+                    return await view(request, *args, **kwargs)
+
+                key, etag = _response_key(view, tables, await aget_versions(tables), request)
+                conditional = get_conditional_response(request, etag=etag)
+                if conditional is not None:
+                    return set_validators(conditional, etag)
+
+                cached = await cache.aget(key)
+                if cached is not None:
+                    return _cached_response(cached, etag)
+
+                response = await view(request, *args, **kwargs)
+                if _cacheable(response):
+                    await cache.aset(key, (response.content, response['Content-Type']), settings.API_CACHE_TIMEOUT)
+                    set_validators(response, etag)
+                response[CACHE_HEADER] = 'MISS'
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if _bypass(request):
+                return view(request, *args, **kwargs)
+
+            key, etag = _response_key(view, tables, get_versions(tables), request)
+            conditional = get_conditional_response(request, etag=etag)
+            if conditional is not None:
+                return set_validators(conditional, etag)
+
+            cached = cache.get(key)
+            if cached is not None:
+                return _cached_response(cached, etag)
+
+            response = view(request, *args, **kwargs)
+            if _cacheable(response):
+                cache.set(key, (response.content, response['Content-Type']), settings.API_CACHE_TIMEOUT)
+                set_validators(response, etag)
+            response[CACHE_HEADER] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,99 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import aggregates, caching
+from .locks import single_flight
+from .models import Aluguel, Equipamento, ExecucaoExpiracao
+
+ACTIVE_STATUSES = ['aberto', 'em_andamento']
+
+LOCK_NAME = 'expire_rentals'
+
+# Rows per UPDATE statement, keeps each statement under SQLite's variable limit
+BATCH_SIZE = 500
+
+
+def auto_close_note(now):
+    return f"\n[FECHADO AUTOMATICAMENTE EM {now.strftime('%d/%m/%Y %H:%M')} - Data final atingida]"
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def close_expired_rentals(now=None):
+    """
+    Close every active rental whose data_fim has passed and free its equipment.
+
+    Runs in a single transaction with a fixed number of queries per batch: one
+    SELECT for the expired rentals (equipment rate joined in), one bulk UPDATE
+    for the rentals and one UPDATE for the equipment. Bulk writes skip model
+    signals, so the dashboard aggregates are adjusted here as well. Returns the
+    number of rentals closed.
+    """
+    now = now or timezone.now()
+    note = auto_close_note(now)
+
+    with transaction.atomic():
+        rentals = list(
+            Aluguel.objects
+            .select_for_update(of=('self',))
+            .select_related('equipamento')
+            .only('id', 'data_inicio', 'data_fim', 'valor_total', 'observacoes',
+                  'equipamento__id', 'equipamento__valor_diario')
+            .filter(status__in=ACTIVE_STATUSES, data_fim__lt=now)
+        )
+        if not rentals:
+            return 0
+
+        equipamento_ids = set()
+        deltas = Counter()
+        for rental in rentals:
+            rental.status = 'fechado'
+            if not rental.valor_total:
+                horas = (rental.data_fim - rental.data_inicio).total_seconds() / 3600
+                rental.valor_total = rental.equipamento.valor_por_hora * Decimal(str(horas))
+            rental.observacoes = (rental.observacoes or '') + note
+            # bulk_update does not touch auto_now fields
+            rental.updated_at = now
+            rental.version = F('version') + 1
+            equipamento_ids.add(rental.equipamento_id)
+            deltas[aggregates.ACTIVE_RENTALS_KEY] -= 1
+            deltas.update(aggregates.rental_contribution('fechado', rental.valor_total, now))
+
+        Aluguel.objects.bulk_update(
+            rentals,
+            ['status', 'valor_total', 'observacoes', 'updated_at', 'version'],
+            batch_size=BATCH_SIZE,
+        )
+        for ids in _chunks(sorted(equipamento_ids), BATCH_SIZE):
+            to_free = Equipamento.objects.filter(id__in=ids).exclude(status='disponivel')
+            for row in to_free.values('status').annotate(total=Count('id')).order_by():
+                deltas[aggregates.equipment_status_key(row['status'])] -= row['total']
+                deltas[aggregates.equipment_status_key('disponivel')] += row['total']
+            to_free.update(status='disponivel', updated_at=now, version=F('version') + 1)
+
+        aggregates.apply_deltas(deltas)
+        caching.bump_versions(caching.ALUGUEL, caching.EQUIPAMENTO)
+
+    return len(rentals)
+
+
+def run_expiry(now=None):
+    """
+    Run the expiry job once, unless another process is already running it.
+
+    Returns the recorded ExecucaoExpiracao, or None when the run was skipped
+    because the single-flight lock is held elsewhere.
+    """
+    with single_flight(LOCK_NAME) as acquired:
+        if not acquired:
+            return None
+        now = now or timezone.now()
+        fechados = close_expired_rentals(now)
+        return ExecucaoExpiracao.objects.create(executado_em=now, fechados=fechados)
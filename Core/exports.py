@@ -0,0 +1,129 @@
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from .models import Aluguel, Cliente, Equipamento
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows fetched per database round trip
+CHUNK_SIZE = 2000
+
+# Approximate size of each chunk handed to the response, so the socket is not
+# written once per row
+BUFFER_SIZE = 64 * 1024
+
+# Exported columns per resource: (header, field lookup)
+COLUMNS = {
+    'clientes': [
+        ('id', 'id'),
+        ('nome', 'nome'),
+        ('cpf', 'cpf'),
+        ('email', 'email'),
+        ('telefone', 'telefone'),
+        ('endereco', 'endereco'),
+        ('data_nascimento', 'data_nascimento'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ],
+    'equipamentos': [
+        ('id', 'id'),
+        ('nome', 'nome'),
+        ('status', 'status'),
+        ('valor_diario', 'valor_diario'),
+        ('foto', 'foto'),
+    ],
+    'alugueis': [
+        ('id', 'id'),
+        ('cliente_id', 'cliente_id'),
+        ('cliente_nome', 'cliente__nome'),
+        ('equipamento_id', 'equipamento_id'),
+        ('equipamento_nome', 'equipamento__nome'),
+        ('data_inicio', 'data_inicio'),
+        ('data_fim', 'data_fim'),
+        ('valor_total', 'valor_total'),
+        ('status', 'status'),
+        ('observacoes', 'observacoes'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ],
+}
+
+MODELS = {
+    'clientes': Cliente,
+    'equipamentos': Equipamento,
+    'alugueis': Aluguel,
+}
+
+
+def base_queryset(recurso):
+    if recurso not in MODELS:
+        raise ValueError(f"Recurso inválido: {recurso}")
+    return MODELS[recurso].objects.all()
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(headers, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(['' if value is None else _plain(value) for value in row])
+
+
+def _ndjson_lines(headers, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(headers, map(_plain, row))), ensure_ascii=False) + '\n'
+
+
+def _buffered(lines):
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_rows(recurso, queryset, fmt='csv'):
+    """
+    Lazily serialize ``queryset`` as CSV or NDJSON text chunks.
+
+    Rows come from values_list().iterator(), so neither model instances nor
+    the full result set are ever held in memory. The first chunk (the CSV
+    header) is produced before the query runs.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato inválido: {fmt}")
+    headers = [header for header, _ in COLUMNS[recurso]]
+    fields = [field for _, field in COLUMNS[recurso]]
+    rows = queryset.order_by('id').values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+    if fmt == 'csv':
+        lines = _csv_lines(headers, rows)
+        # Send the header right away instead of waiting for the first buffer
+        yield next(lines)
+    else:
+        lines = _ndjson_lines(headers, rows)
+    yield from _buffered(lines)
@@ -0,0 +1,80 @@
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Aluguel, Equipamento
+
+
+class InvalidFilter(ValueError):
+    """Raised when a filter in the query string has an invalid value"""
+
+
+def parse_datetime_param(value, end_of_day=False):
+    """
+    Parse an ISO date or datetime from the query string into an aware datetime.
+    Plain dates map to the start of the day, or to the end of it when
+    ``end_of_day`` is set, so ``?end=2024-01-31`` includes the whole day.
+    """
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise InvalidFilter(f"Data inválida: {value}")
+    if end_of_day and len(value) == 10:
+        parsed = datetime.combine(parsed.date(), time.max)
+    if not timezone.is_aware(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _status_values(request, choices):
+    status = request.GET.get('status')
+    if not status:
+        return None
+    values = [value for value in status.split(',') if value]
+    valid = {key for key, _ in choices}
+    invalid = [value for value in values if value not in valid]
+    if invalid:
+        raise InvalidFilter(f"Status inválido: {', '.join(invalid)}")
+    return values
+
+
+def filter_clientes(queryset, request):
+    q = request.GET.get('q', '').strip()
+    if q:
+        queryset = queryset.filter(
+            Q(nome__icontains=q) |
+            Q(email__icontains=q) |
+            Q(cpf__icontains=q) |
+            Q(telefone__icontains=q)
+        )
+    return queryset
+
+
+def filter_equipamentos(queryset, request):
+    q = request.GET.get('q', '').strip()
+    if q:
+        queryset = queryset.filter(nome__icontains=q)
+    status = _status_values(request, Equipamento.STATUS_CHOICES)
+    if status:
+        queryset = queryset.filter(status__in=status)
+    return queryset
+
+
+def filter_alugueis(queryset, request):
+    q = request.GET.get('q', '').strip()
+    if q:
+        queryset = queryset.filter(
+            Q(cliente__nome__icontains=q) |
+            Q(equipamento__nome__icontains=q)
+        )
+    status = _status_values(request, Aluguel.STATUS_CHOICES)
+    if status:
+        queryset = queryset.filter(status__in=status)
+
+    # Date range on data_inicio: start is inclusive, end is inclusive
+    if request.GET.get('start'):
+        queryset = queryset.filter(data_inicio__gte=parse_datetime_param(request.GET['start']))
+    if request.GET.get('end'):
+        queryset = queryset.filter(data_inicio__lte=parse_datetime_param(request.GET['end'], end_of_day=True))
+    return queryset
@@ -0,0 +1,208 @@
+import codecs
+import csv
+import json
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import aggregates, caching
+from .models import Cliente, Equipamento
+
+FORMATS = ('csv', 'ndjson')
+CONFLICT_MODES = ('skip', 'update')
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+
+# Invalid rows listed in a report; past this only the 'failed' count grows
+MAX_REPORTED_ERRORS = 100
+
+# Columns accepted per resource; anything else in the file is ignored
+FIELDS = {
+    'clientes': ['nome', 'cpf', 'email', 'telefone', 'endereco', 'data_nascimento'],
+    'equipamentos': ['nome', 'status', 'valor_diario'],
+}
+
+MODELS = {
+    'clientes': Cliente,
+    'equipamentos': Equipamento,
+}
+
+
+class UnreadableFile(ValueError):
+    """
+    Raised when the file cannot be decoded or parsed at ``line``. Rows read
+    before it are still imported: import_rows sets ``report`` to their counts.
+    """
+
+    def __init__(self, line, message):
+        super().__init__(message)
+        self.line = line
+        self.report = None
+
+
+def read_rows(lines, fmt='csv'):
+    """
+    Yield (line number, dict) pairs from an iterable of byte lines (an open
+    file, an upload or the request itself). Rows are decoded one at a time,
+    so the file is never loaded whole. Undecodable NDJSON lines are yielded
+    as their error message instead of a dict; a line that is not UTF-8, or
+    broken CSV, stops the file with UnreadableFile.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato inválido: {fmt}")
+    text = codecs.iterdecode(lines, 'utf-8-sig')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        try:
+            for row in reader:
+                yield reader.line_num, row
+        except UnicodeDecodeError as e:
+            raise UnreadableFile(reader.line_num + 1, f"Arquivo não está em UTF-8: {e}")
+        except csv.Error as e:
+            raise UnreadableFile(reader.line_num, f"CSV inválido: {e}")
+        return
+
+    line_num = 0
+    try:
+        for line_num, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_num, f"JSON inválido: {e}"
+                continue
+            yield line_num, row if isinstance(row, dict) else "Cada linha deve ser um objeto JSON"
+    except UnicodeDecodeError as e:
+        raise UnreadableFile(line_num + 1, f"Arquivo não está em UTF-8: {e}")
+
+
+def _build(model, fields, row):
+    """Model instance for one row, validated field by field without touching the database"""
+    if not isinstance(row, dict):
+        raise ValidationError(row)
+    data = {}
+    for field in fields:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in (None, ''):
+            data[field] = value
+    instance = model(**data)
+    # Unique checks run per batch in _save_clientes, not per row
+    instance.clean_fields(exclude=['foto'])
+    # bulk_create does not call save(), which normally fills these
+    instance.update_search_fields()
+    return instance
+
+
+def _error_message(error):
+    if hasattr(error, 'message_dict'):
+        return '; '.join(f"{field}: {' '.join(messages)}" for field, messages in error.message_dict.items())
+    return ' '.join(error.messages)
+
+
+def _save_clientes(batch, on_conflict, report):
+    # Keep one row per CPF: the last one wins on update, the first on skip
+    by_cpf = {}
+    for line_num, cliente in batch:
+        if cliente.cpf in by_cpf:
+            if on_conflict == 'skip':
+                report['skipped'] += 1
+                continue
+            report['updated'] += 1
+        by_cpf[cliente.cpf] = cliente
+
+    existing = set(Cliente.objects.filter(cpf__in=by_cpf).values_list('cpf', flat=True))
+    if on_conflict == 'skip':
+        report['skipped'] += len(existing)
+        Cliente.objects.bulk_create(
+            [cliente for cpf, cliente in by_cpf.items() if cpf not in existing],
+            ignore_conflicts=True,
+        )
+    else:
+        report['updated'] += len(existing)
+        Cliente.objects.bulk_create(
+            by_cpf.values(),
+            update_conflicts=True,
+            unique_fields=['cpf'],
+            update_fields=FIELDS['clientes'] + ['nome_normalizado', 'cpf_digitos', 'updated_at'],
+        )
+    report['created'] += len(by_cpf) - len(existing)
+    caching.bump_versions(caching.CLIENTE)
+
+
+def _save_equipamentos(batch, on_conflict, report):
+    equipamentos = [equipamento for _, equipamento in batch]
+    Equipamento.objects.bulk_create(equipamentos)
+    report['created'] += len(equipamentos)
+    # bulk_create skips the signals that keep the dashboard counters in sync
+    statuses = Counter(equipamento.status for equipamento in equipamentos)
+    aggregates.apply_deltas({aggregates.equipment_status_key(status): n for status, n in statuses.items()})
+    caching.bump_versions(caching.EQUIPAMENTO)
+
+
+SAVERS = {
+    'clientes': _save_clientes,
+    'equipamentos': _save_equipamentos,
+}
+
+
+def import_rows(recurso, rows, batch_size=DEFAULT_BATCH_SIZE, on_conflict='skip', on_error=None):
+    """
+    Validate ``rows`` (as produced by read_rows) one by one and insert the
+    valid ones with bulk_create, ``batch_size`` rows per transaction.
+
+    Clients whose CPF already exists are skipped or, with on_conflict='update',
+    overwritten. Invalid rows are reported as {'line', 'error'} dicts in the
+    report, up to MAX_REPORTED_ERRORS of them (then 'errors_truncated' is
+    set), or handed to ``on_error`` as they are found so a caller can stream
+    them instead of collecting them. Returns the report with the
+    created/updated/skipped/failed counts.
+
+    If the file turns unreadable partway, the rows read so far are saved and
+    the UnreadableFile is re-raised carrying the report.
+    """
+    if recurso not in MODELS:
+        raise ValueError(f"Recurso inválido: {recurso}")
+    if on_conflict not in CONFLICT_MODES:
+        raise ValueError(f"Modo de conflito inválido: {on_conflict}")
+    batch_size = max(1, min(int(batch_size), MAX_BATCH_SIZE))
+
+    model = MODELS[recurso]
+    fields = FIELDS[recurso]
+    save = SAVERS[recurso]
+    report = {'created': 0, 'updated': 0, 'skipped': 0, 'failed': 0, 'errors': [], 'errors_truncated': False}
+
+    def flush(batch):
+        with transaction.atomic():
+            save(batch, on_conflict, report)
+
+    batch = []
+    try:
+        for line_num, row in rows:
+            try:
+                batch.append((line_num, _build(model, fields, row)))
+            except ValidationError as e:
+                error = {'line': line_num, 'error': _error_message(e)}
+                report['failed'] += 1
+                if on_error:
+                    on_error(error)
+                elif len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append(error)
+                else:
+                    report['errors_truncated'] = True
+                continue
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+    except UnreadableFile as e:
+        if batch:
+            flush(batch)
+        e.report = report
+        raise
+    if batch:
+        flush(batch)
+    return report
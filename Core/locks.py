@@ -0,0 +1,54 @@
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+def _lock_path(name):
+    lock_dir = settings.LOCK_DIR
+    os.makedirs(lock_dir, exist_ok=True)
+    return os.path.join(lock_dir, f'{name}.lock')
+
+
+def _try_create(path):
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w') as lock_file:
+        lock_file.write(str(os.getpid()))
+    return True
+
+
+@contextmanager
+def single_flight(name, ttl=600):
+    """
+    Cross-process lock backed by an exclusively created file.
+
+    Yields True when this caller holds the lock and False when another process
+    is already running the same job, so callers skip instead of queueing.
+    A lock older than ``ttl`` seconds is considered abandoned (e.g. the holder
+    was killed) and is taken over.
+    """
+    path = _lock_path(name)
+    acquired = _try_create(path)
+    if not acquired:
+        try:
+            stale = time.time() - os.path.getmtime(path) > ttl
+        except FileNotFoundError:
+            stale = True
+        if stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            acquired = _try_create(path)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
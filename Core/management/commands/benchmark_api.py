@@ -0,0 +1,210 @@
+import json
+import math
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from Core import urls
+from Core.models import Aluguel, Cliente, Equipamento
+from Core.seeding import seed
+
+# Endpoints that cannot be measured with a plain GET
+SKIP = {
+    'logout': "encerra a sessão",
+    'protected_media': "os dados gerados não têm fotos",
+}
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'bytes')
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile"""
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)) - 1, 0)]
+
+
+def _query_strings():
+    """Parameters some endpoints need, over the last 30 days"""
+    end = timezone.localdate()
+    period = f'start={end - timedelta(days=30)}&end={end}'
+    return {
+        'clientes_lookup_api': 'q=a',
+        'equipamentos_lookup_api': 'q=f',
+        'equipamentos_availability_api': period,
+        'utilization_report_api': period,
+    }
+
+
+def _endpoints():
+    """(name, url or None, reason skipped) for every named route in Core.urls"""
+    values = {
+        'cliente_id': Cliente.objects.values_list('id', flat=True).first(),
+        'equipamento_id': Equipamento.objects.values_list('id', flat=True).first(),
+        'aluguel_id': Aluguel.objects.values_list('id', flat=True).first(),
+        'recurso': 'alugueis',
+    }
+    queries = _query_strings()
+    for pattern in urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        name = pattern.name
+        if name in SKIP:
+            yield name, None, SKIP[name]
+            continue
+        kwargs = {key: values.get(key) for key in pattern.pattern.regex.groupindex}
+        if any(value is None for value in kwargs.values()):
+            yield name, None, "sem valor para os parâmetros da URL"
+            continue
+        url = reverse(name, kwargs=kwargs)
+        if name in queries:
+            url = f'{url}?{queries[name]}'
+        yield name, url, None
+
+
+@contextmanager
+def _scratch_database(directory):
+    """Django's test database machinery, pointed at a file in ``directory`` for SQLite"""
+    test_settings = connection.settings_dict['TEST']
+    old_name = connection.settings_dict['NAME']
+    old_test_name = test_settings.get('NAME')
+    if connection.vendor == 'sqlite':
+        # The default would be an in-memory database, unlike production
+        test_settings['NAME'] = str(Path(directory) / 'benchmark.sqlite3')
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = old_test_name
+
+
+def _budget(budgets, name):
+    return {**budgets.get('default', {}), **budgets.get(name, {})}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede todos os endpoints de Core/urls.py (GET, pelo cliente de testes) em bancos "
+        "temporários de tamanhos crescentes, com latência p50/p95/p99, consultas e bytes, "
+        "e falha se algum passar do orçamento (settings.API_BENCHMARK_BUDGET)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='1000,10000',
+            help="Quantidades de aluguéis, separadas por vírgula; clientes e equipamentos "
+                 "acompanham (padrão: %(default)s)",
+        )
+        parser.add_argument('--requests', type=int, default=30, help="Requisições por endpoint (padrão: %(default)s)")
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints',
+            help="Nome da rota a medir; pode ser repetido (padrão: todas)",
+        )
+        parser.add_argument(
+            '--budget',
+            help="Arquivo JSON com o orçamento, no formato de API_BENCHMARK_BUDGET (padrão: o das settings)",
+        )
+        parser.add_argument(
+            '--with-cache', action='store_true',
+            help="Mantém o cache de respostas da API (padrão: desligado, mede as consultas)",
+        )
+        parser.add_argument('--seed', type=int, default=1, help="Semente dos dados gerados (padrão: %(default)s)")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes deve ser uma lista de números, como 1000,10000")
+        budgets = settings.API_BENCHMARK_BUDGET
+        if options['budget']:
+            budgets = json.loads(Path(options['budget']).read_text())
+
+        violations = []
+        setup_test_environment()
+        try:
+            cache_settings = {} if options['with_cache'] else {'API_CACHE_TIMEOUT': 0}
+            with override_settings(**cache_settings):
+                for size in sizes:
+                    violations += self._run_size(size, budgets, options)
+        finally:
+            teardown_test_environment()
+
+        if violations:
+            for violation in violations:
+                self.stderr.write(violation)
+            raise CommandError(f"{len(violations)} medida(s) acima do orçamento")
+        self.stdout.write(self.style.SUCCESS("Todos os endpoints dentro do orçamento"))
+
+    def _run_size(self, size, budgets, options):
+        counts = {'clientes': max(size // 10, 20), 'equipamentos': max(size // 20, 10), 'alugueis': size}
+        with tempfile.TemporaryDirectory() as directory, _scratch_database(directory):
+            seed(**counts, random_seed=options['seed'])
+            user = User.objects.create_user('benchmark', is_staff=True)
+            client = Client()
+            client.force_login(user)
+
+            self.stdout.write(
+                f"\n{counts['alugueis']} aluguéis, {counts['clientes']} clientes, "
+                f"{counts['equipamentos']} equipamentos"
+            )
+            self.stdout.write(
+                f"{'endpoint':<32} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'consultas':>10} {'bytes':>10}"
+            )
+            violations = []
+            for name, url, skipped in _endpoints():
+                if options['endpoints'] and name not in options['endpoints']:
+                    continue
+                if skipped:
+                    self.stdout.write(f"{name:<32} ignorado: {skipped}")
+                    continue
+                result = self._measure(client, url, options['requests'])
+                if result is None:
+                    self.stdout.write(f"{name:<32} ignorado: não aceita GET")
+                    continue
+                self.stdout.write(
+                    f"{name:<32} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} {result['p99_ms']:8.2f} "
+                    f"{result['queries']:10} {result['bytes']:10}"
+                )
+                for metric, limit in _budget(budgets, name).items():
+                    if metric in METRICS and result[metric] > limit:
+                        violations.append(f"{name} com {size} aluguéis: {metric} = {result[metric]} (limite {limit})")
+            return violations
+
+    def _measure(self, client, url, requests):
+        """Latency percentiles, the most queries and the body size of ``requests`` GETs, or None on 405"""
+        latencies = []
+        queries = 0
+        size = 0
+        for _ in range(requests + 1):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.get(url)
+                if response.status_code == 405:
+                    return None
+                # Streaming responses do their work while the body is read
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                elapsed = time.perf_counter() - start
+            if response.status_code >= 400:
+                raise CommandError(f"GET {url} respondeu {response.status_code}: {body[:200]!r}")
+            latencies.append(elapsed)
+            queries = max(queries, len(captured))
+            size = len(body)
+        # The first request warms up caches and imports
+        latencies = sorted(latencies[1:])
+        return {
+            'p50_ms': round(_percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2),
+            'queries': queries,
+            'bytes': size,
+        }
@@ -0,0 +1,126 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import include, path
+
+from Core import async_views, views
+from Core.urls import build_urlpatterns
+
+DEFAULT_PATHS = [
+    '/api/dashboard/stats/',
+    '/api/clientes/?limit=50',
+    '/api/equipamentos/?limit=50',
+    '/api/alugueis/?limit=50',
+]
+
+
+def _urlconf(read_views):
+    """URLconf with the API endpoints served by ``read_views``, whatever ASYNC_VIEWS says"""
+    urlconf = ModuleType(f'benchmark_urls_{read_views.__name__}')
+    urlconf.urlpatterns = [path('', include(build_urlpatterns(read_views)))]
+    return urlconf
+
+
+def _summary(label, latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    return (
+        f"{label:<22} {len(latencies) / elapsed:8.1f} req/s   "
+        f"p50 {statistics.median(latencies) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms   "
+        f"erros {errors}"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a vazão das APIs de leitura pelo caminho WSGI e pelo ASGI (com as views "
+        "síncronas e com as async de Core.async_views), sem servidor externo"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400, help="Requisições por modo (padrão: %(default)s)")
+        parser.add_argument('--concurrency', type=int, default=16, help="Requisições simultâneas (padrão: %(default)s)")
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help="URL a medir; pode ser repetido (padrão: dashboard e listas)",
+        )
+        parser.add_argument(
+            '--with-cache', action='store_true',
+            help="Mantém o cache de respostas da API (padrão: desligado, mede as consultas)",
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_active=True, is_staff=True).first()
+        if user is None:
+            raise CommandError("Crie um usuário administrador (createsuperuser) antes de medir")
+        paths = options['paths'] or DEFAULT_PATHS
+        total = options['requests']
+        concurrency = max(1, options['concurrency'])
+        urls = [paths[i % len(paths)] for i in range(total)]
+
+        # The test clients talk to the handlers in-process under the
+        # 'testserver' host, which this allows
+        setup_test_environment()
+        try:
+            cache_settings = {} if options['with_cache'] else {'API_CACHE_TIMEOUT': 0}
+            results = []
+            for label, read_views, server in (
+                ("WSGI, views síncronas", views, 'wsgi'),
+                ("ASGI, views síncronas", views, 'asgi'),
+                ("ASGI, views async", async_views, 'asgi'),
+            ):
+                with override_settings(ROOT_URLCONF=_urlconf(read_views), **cache_settings):
+                    if server == 'wsgi':
+                        results.append((label, self.run_wsgi(user, urls, concurrency)))
+                    else:
+                        results.append((label, asyncio.run(self.run_asgi(user, urls, concurrency))))
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write(f"{total} requisições por modo, {concurrency} simultâneas, {len(paths)} URL(s)")
+        for label, result in results:
+            self.stdout.write(_summary(label, *result))
+
+    def run_wsgi(self, user, urls, concurrency):
+        def worker(chunk):
+            client = Client()
+            client.force_login(user)
+            latencies, errors = [], 0
+            for url in chunk:
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+            return latencies, errors
+
+        chunks = [urls[i::concurrency] for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(worker, chunks))
+        elapsed = time.perf_counter() - started
+        return [t for latencies, _ in results for t in latencies], sum(e for _, e in results), elapsed
+
+    async def run_asgi(self, user, urls, concurrency):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors = [], 0
+
+        async def fetch(url):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url)
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch(url) for url in urls))
+        return latencies, errors, time.perf_counter() - started
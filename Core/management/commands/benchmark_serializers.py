@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Core.models import Aluguel
+from Core.serializers import aluguel_serializer
+
+
+def instance_dict(aluguel):
+    """The rental dict as the views used to build it, from a model instance"""
+    return {
+        'id': aluguel.id,
+        'cliente': {
+            'id': aluguel.cliente.id,
+            'nome': aluguel.cliente.nome
+        },
+        'equipamento': {
+            'id': aluguel.equipamento.id,
+            'nome': aluguel.equipamento.nome
+        },
+        'data_inicio': aluguel.data_inicio.isoformat(),
+        'data_fim': aluguel.data_fim.isoformat() if aluguel.data_fim else None,
+        'valor_total': str(aluguel.valor_total) if aluguel.valor_total else None,
+        'status': aluguel.status,
+        'observacoes': aluguel.observacoes,
+        'created_at': aluguel.created_at.isoformat(),
+        'updated_at': aluguel.updated_at.isoformat()
+    }
+
+
+class Command(BaseCommand):
+    help = "Compara o custo por linha da serialização de aluguéis: instâncias do modelo x values() compilado"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help="Aluguéis por rodada (padrão: %(default)s)")
+        parser.add_argument('--repeat', type=int, default=5, help="Rodadas; vale a melhor (padrão: %(default)s)")
+        parser.add_argument(
+            '--fields', default='',
+            help="Campos para o serializer, como em ?fields= (padrão: todos)",
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        if not Aluguel.objects.exists():
+            raise CommandError("Nenhum aluguel cadastrado para medir")
+        requested = tuple(name.strip() for name in options['fields'].split(',') if name.strip()) or None
+        if requested and any(name not in aluguel_serializer.fields for name in requested):
+            raise CommandError(f"Campos válidos: {', '.join(aluguel_serializer.fields)}")
+
+        def legacy():
+            queryset = Aluguel.objects.select_related('cliente', 'equipamento').order_by('-created_at', 'id')
+            return [instance_dict(aluguel) for aluguel in queryset[:rows]]
+
+        def compiled():
+            serializer = aluguel_serializer.compile(requested)
+            queryset = serializer.values(Aluguel.objects.order_by('-created_at', 'id'), 'created_at', 'id')
+            return serializer.render_many(queryset[:rows])
+
+        for label, run in (("instâncias + dict manual", legacy), ("values() + serializer", compiled)):
+            best = None
+            for _ in range(max(options['repeat'], 1)):
+                started = time.perf_counter()
+                count = len(run())
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            self.stdout.write(f"{label:<28} {count} linhas  {best * 1000:8.1f} ms  {best / count * 1e6:7.1f} µs/linha")
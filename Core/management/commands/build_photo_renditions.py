@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from Core import renditions
+from Core.models import Equipamento
+
+
+class Command(BaseCommand):
+    help = "Gera (ou regenera) as miniaturas WebP/JPEG das fotos dos equipamentos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing', action='store_true',
+            help="Processa apenas fotos que ainda não têm todas as miniaturas",
+        )
+
+    def handle(self, *args, **options):
+        storage = Equipamento._meta.get_field('foto').storage
+        names = (
+            Equipamento.objects.exclude(foto='').exclude(foto__isnull=True)
+            .values_list('foto', flat=True).distinct().iterator()
+        )
+        total = failed = 0
+        for name in names:
+            if options['missing'] and all(storage.exists(target) for target in renditions.rendition_names(name)):
+                continue
+            try:
+                renditions.generate(name)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{name}: {e}")
+                continue
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f"Miniaturas geradas para {total} foto(s)"))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} foto(s) não puderam ser processadas"))
@@ -0,0 +1,55 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Core.expiry import run_expiry
+from Core.sync import prune_tombstones
+from Core.models import ExecucaoExpiracao
+
+
+class Command(BaseCommand):
+    help = "Fecha automaticamente os aluguéis cuja data final já passou"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Continua executando a cada --interval segundos",
+        )
+        parser.add_argument(
+            '--interval', type=int, default=settings.RENTAL_EXPIRY_INTERVAL,
+            help="Intervalo entre execuções em segundos (padrão: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            self.run_once()
+            return
+
+        interval = max(options['interval'], 1)
+        self.stdout.write(f"Verificando aluguéis expirados a cada {interval}s (Ctrl+C para sair)")
+        try:
+            while True:
+                started = time.monotonic()
+                self.run_once()
+                time.sleep(max(interval - (time.monotonic() - started), 0))
+        except KeyboardInterrupt:
+            pass
+
+    def run_once(self):
+        execucao = run_expiry()
+        if execucao is None:
+            self.stdout.write(self.style.WARNING("Outra execução já está em andamento, ignorando"))
+            return
+
+        cutoff = execucao.executado_em - timedelta(days=settings.RENTAL_EXPIRY_HISTORY_DAYS)
+        ExecucaoExpiracao.objects.filter(executado_em__lt=cutoff).delete()
+        # Housekeeping for the sync API rides on the same periodic job
+        prune_tombstones(execucao.executado_em)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"[{timezone.localtime(execucao.executado_em):%d/%m/%Y %H:%M}] "
+            f"{execucao.fechados} aluguel(éis) fechados automaticamente"
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Core.exports import COLUMNS, FORMATS, base_queryset, stream_rows
+
+
+class Command(BaseCommand):
+    help = "Exporta clientes, equipamentos ou aluguéis em CSV ou NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('recurso', choices=sorted(COLUMNS))
+        parser.add_argument(
+            '--format', dest='fmt', choices=sorted(FORMATS), default='csv',
+            help="Formato de saída (padrão: %(default)s)",
+        )
+        parser.add_argument(
+            '--output', '-o',
+            help="Arquivo de destino (padrão: saída padrão)",
+        )
+
+    def handle(self, *args, **options):
+        recurso = options['recurso']
+        chunks = stream_rows(recurso, base_queryset(recurso), options['fmt'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        try:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        except OSError as e:
+            raise CommandError(f"Não foi possível escrever em {options['output']}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"{recurso} exportados para {options['output']}"))
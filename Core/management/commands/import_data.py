@@ -0,0 +1,63 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Core.imports import CONFLICT_MODES, DEFAULT_BATCH_SIZE, FIELDS, FORMATS, UnreadableFile, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = "Importa clientes ou equipamentos de um arquivo CSV ou NDJSON em lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('recurso', choices=sorted(FIELDS))
+        parser.add_argument('arquivo', help="Caminho do arquivo ('-' para a entrada padrão)")
+        parser.add_argument(
+            '--format', dest='fmt', choices=FORMATS,
+            help="Formato do arquivo (padrão: pela extensão, ou csv)",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help="Linhas inseridas por transação (padrão: %(default)s)",
+        )
+        parser.add_argument(
+            '--on-conflict', choices=CONFLICT_MODES, default='skip',
+            help="O que fazer com CPFs já cadastrados (padrão: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        path = options['arquivo']
+        fmt = options['fmt'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+        def report_error(error):
+            self.stderr.write(f"Linha {error['line']}: {error['error']}")
+
+        try:
+            source = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as e:
+            raise CommandError(f"Não foi possível abrir {path}: {e}")
+        try:
+            report = import_rows(
+                options['recurso'],
+                read_rows(source, fmt),
+                batch_size=options['batch_size'],
+                on_conflict=options['on_conflict'],
+                on_error=report_error,
+            )
+        except UnreadableFile as e:
+            # The rows before the error were imported
+            self.stdout.write(summary(e.report))
+            raise CommandError(f"Linha {e.line}: {e}")
+        except (ValueError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+        finally:
+            if source is not sys.stdin.buffer:
+                source.close()
+
+        self.stdout.write(self.style.SUCCESS(summary(report)))
+
+
+def summary(report):
+    return (
+        f"{report['created']} criado(s), {report['updated']} atualizado(s), "
+        f"{report['skipped']} ignorado(s), {report['failed']} com erro"
+    )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from Core import aggregates
+
+
+class Command(BaseCommand):
+    help = "Recalcula do zero os contadores do dashboard (tabela Agregado)"
+
+    def handle(self, *args, **options):
+        rows = aggregates.rebuild()
+        for chave in sorted(rows):
+            self.stdout.write(f"  {chave}: {rows[chave]}")
+        self.stdout.write(self.style.SUCCESS(f"{len(rows)} contador(es) recalculados"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from Core.models import Cliente, Equipamento
+
+BATCH_SIZE = 1000
+
+# (model, columns read, search columns written)
+INDEXED = (
+    (Cliente, ['nome', 'cpf'], ['nome_normalizado', 'cpf_digitos']),
+    (Equipamento, ['nome'], ['nome_normalizado']),
+)
+
+
+class Command(BaseCommand):
+    help = "Recalcula os campos de busca (nome normalizado, CPF só com dígitos) de clientes e equipamentos"
+
+    def handle(self, *args, **options):
+        for model, source, target in INDEXED:
+            total = 0
+            batch = []
+            for instance in model.objects.only('id', *source).iterator(chunk_size=BATCH_SIZE):
+                instance.update_search_fields()
+                batch.append(instance)
+                if len(batch) == BATCH_SIZE:
+                    model.objects.bulk_update(batch, target)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                model.objects.bulk_update(batch, target)
+                total += len(batch)
+            self.stdout.write(self.style.SUCCESS(
+                f"{total} registro(s) de {model._meta.verbose_name_plural} atualizados"
+            ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from Core.seeding import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera clientes, equipamentos e aluguéis sintéticos em lote, com CPFs válidos, "
+        "datas distribuídas no último ano e aluguéis em andamento"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=100, help="Clientes a criar (padrão: %(default)s)")
+        parser.add_argument('--equipamentos', type=int, default=50, help="Equipamentos a criar (padrão: %(default)s)")
+        parser.add_argument('--alugueis', type=int, default=1000, help="Aluguéis a criar (padrão: %(default)s)")
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help="Semente do gerador; a mesma semente gera os mesmos dados (padrão: aleatória)",
+        )
+
+    def handle(self, *args, **options):
+        created = seed(options['clientes'], options['equipamentos'], options['alugueis'], options['seed'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{created['clientes']} cliente(s), {created['equipamentos']} equipamento(s) "
+            f"e {created['alugueis']} aluguel(éis) criados"
+        ))
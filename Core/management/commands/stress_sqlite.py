@@ -0,0 +1,171 @@
+import copy
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.db.utils import OperationalError
+from django.test import override_settings
+from django.utils import timezone
+
+from Core.aggregates import dashboard_counters
+from Core.models import Aluguel, Cliente, Equipamento
+
+SEED_ROWS = 20
+
+# name: (label, DATABASES OPTIONS, SQLITE_PRAGMAS); None keeps the configured value
+PROFILES = {
+    # Django's stock SQLite: rollback journal, deferred transactions, 5 s timeout
+    'padrao': ("Padrão do Django", {}, {}),
+    'producao': ("Perfil de produção", None, None),
+}
+
+
+def _seed():
+    clientes = [
+        Cliente.objects.create(
+            nome=f"Cliente {i}", cpf=f"{i:011d}", email=f"cliente{i}@example.com",
+            telefone='0', endereco='-', data_nascimento=date(1990, 1, 1),
+        )
+        for i in range(SEED_ROWS)
+    ]
+    equipamentos = [
+        Equipamento.objects.create(nome=f"Equipamento {i}", valor_diario=Decimal('48.00'))
+        for i in range(SEED_ROWS)
+    ]
+    return [c.id for c in clientes], [e.id for e in equipamentos]
+
+
+def _read():
+    list(Aluguel.objects.select_related('cliente', 'equipamento').order_by('-created_at')[:50])
+    dashboard_counters()
+
+
+def _write(cliente_ids, equipamento_ids):
+    # Same shape as booking through the API: reads, then writes, in one transaction
+    with transaction.atomic():
+        cliente = Cliente.objects.get(id=random.choice(cliente_ids))
+        equipamento = Equipamento.objects.select_for_update().get(id=random.choice(equipamento_ids))
+        data_inicio = timezone.now() - timedelta(days=random.randint(2, 60))
+        Aluguel.objects.create(
+            cliente=cliente,
+            equipamento=equipamento,
+            data_inicio=data_inicio,
+            data_fim=data_inicio + timedelta(hours=random.randint(1, 48)),
+            status='fechado',
+        )
+        equipamento.save()
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga do SQLite: várias threads lendo e gravando ao mesmo tempo num banco "
+        "temporário, com o perfil padrão do Django e com o de produção (settings.SQLITE_PRAGMAS), "
+        "contando os erros 'database is locked'"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Threads simultâneas (padrão: %(default)s)")
+        parser.add_argument('--seconds', type=float, default=10, help="Duração de cada rodada (padrão: %(default)s)")
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.3,
+            help="Fração das operações que gravam (padrão: %(default)s)",
+        )
+        parser.add_argument(
+            '--profile', choices=PROFILES, action='append', dest='profiles',
+            help="Perfil a testar; pode ser repetido (padrão: os dois)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write("O banco configurado não é SQLite; nada a testar.")
+            return
+        for name in options['profiles'] or PROFILES:
+            self.stdout.write(self._run(*PROFILES[name], options))
+
+    def _run(self, label, db_options, pragmas, options):
+        original = connections.settings['default']
+        settings_dict = copy.deepcopy(original)
+        if db_options is not None:
+            settings_dict['OPTIONS'] = db_options
+        overrides = {} if pragmas is None else {'SQLITE_PRAGMAS': pragmas}
+
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict['NAME'] = Path(directory) / 'stress.sqlite3'
+            # Every thread opens its own connection from these settings; the
+            # real database is never touched
+            self._use(settings_dict)
+            try:
+                with override_settings(**overrides):
+                    call_command('migrate', run_syncdb=True, verbosity=0)
+                    ids = _seed()
+                    connections.close_all()
+                    result = self._hammer(ids, options)
+            finally:
+                self._use(original)
+
+        ops, write_latencies, errors, elapsed = result
+        write_latencies.sort()
+        p95 = write_latencies[int(len(write_latencies) * 0.95) - 1] if write_latencies else 0
+        lines = [
+            f"{label}: {ops['read']} leituras, {ops['write']} gravações em {elapsed:.1f} s "
+            f"({(ops['read'] + ops['write']) / elapsed:.0f} op/s)",
+            f"  gravação p50 {statistics.median(write_latencies or [0]) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms",
+            f"  erros: {sum(errors.values())}",
+        ]
+        lines += [f"    {count} × {message}" for message, count in errors.most_common()]
+        return '\n'.join(lines)
+
+    def _use(self, settings_dict):
+        """Point the 'default' alias at ``settings_dict`` from the next connection on"""
+        connections.close_all()
+        connections.settings['default'] = settings_dict
+        # This thread's wrapper keeps the settings it was built with
+        connections['default'] = connections.create_connection('default')
+
+    def _hammer(self, ids, options):
+        ops = Counter()
+        errors = Counter()
+        write_latencies = []
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+        write_ratio = options['write_ratio']
+        start = threading.Barrier(max(1, options['threads']))
+
+        def worker():
+            start.wait()
+            try:
+                while time.monotonic() < deadline:
+                    kind = 'write' if random.random() < write_ratio else 'read'
+                    began = time.perf_counter()
+                    try:
+                        if kind == 'write':
+                            _write(*ids)
+                        else:
+                            _read()
+                    except OperationalError as e:
+                        with lock:
+                            errors[str(e)] += 1
+                        continue
+                    with lock:
+                        ops[kind] += 1
+                        if kind == 'write':
+                            write_latencies.append(time.perf_counter() - began)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(max(1, options['threads']))]
+        began = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return ops, write_latencies, errors, time.monotonic() - began
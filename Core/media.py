@@ -0,0 +1,198 @@
+import asyncio
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .caching import set_validators
+
+# Bytes read per iteration when streaming a range through Python
+CHUNK_SIZE = 64 * 1024
+
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Header naming the file for each offload mode (see MEDIA_OFFLOAD)
+OFFLOAD_HEADERS = {
+    'x-accel-redirect': 'X-Accel-Redirect',
+    'x-sendfile': 'X-Sendfile',
+}
+
+
+def resolve(path):
+    """Absolute path of ``path`` inside MEDIA_ROOT; 404 for anything outside it or missing"""
+    try:
+        file_path = safe_join(settings.MEDIA_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404("File not found")
+    if not os.path.isfile(file_path):
+        raise Http404("File not found")
+    return file_path
+
+
+def validators(stat):
+    """(ETag, Last-Modified) of a file, from its modification time and size"""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"', http_date(stat.st_mtime)
+
+
+def parse_range(header, size):
+    """
+    (start, end) byte positions, inclusive, of a single-range Range header.
+    None means "send the whole file" (no header, or a form not supported,
+    like multiple ranges, which the client must accept); ValueError means
+    the range cannot be satisfied.
+    """
+    match = RANGE_PATTERN.match(header.replace(' ', '')) if header else None
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _read_range(file_path, start, length):
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+async def _aread_range(file_path, start, length):
+    """_read_range() for ASGI: the blocking reads run in a worker thread"""
+    file = await asyncio.to_thread(open, file_path, 'rb')
+    try:
+        await asyncio.to_thread(file.seek, start)
+        while length > 0:
+            chunk = await asyncio.to_thread(file.read, min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _offload(path, file_path, content_type):
+    header = OFFLOAD_HEADERS[settings.MEDIA_OFFLOAD]
+    response = HttpResponse(content_type=content_type)
+    if header == 'X-Accel-Redirect':
+        # nginx maps this internal location to MEDIA_ROOT and handles Range itself
+        response[header] = quote(settings.MEDIA_ACCEL_PREFIX + path)
+    else:
+        response[header] = file_path
+    return response
+
+
+def _prepare(request, path):
+    """
+    Everything but the body: either a finished response (304, 416, offload)
+    or a FileBody describing what to send.
+    """
+    file_path = resolve(path)
+    stat = os.stat(file_path)
+    etag, last_modified = validators(stat)
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is not None:
+        return set_validators(response, etag, last_modified)
+
+    content_type, _ = mimetypes.guess_type(file_path)
+    if content_type is None:
+        content_type = 'application/octet-stream'
+
+    if settings.MEDIA_OFFLOAD:
+        return set_validators(_offload(path, file_path, content_type), etag, last_modified)
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if if_range is None or if_range in (etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+    return FileBody(file_path, stat.st_size, content_type, byte_range, etag, last_modified)
+
+
+class FileBody:
+    def __init__(self, file_path, size, content_type, byte_range, etag, last_modified):
+        self.file_path = file_path
+        self.size = size
+        self.content_type = content_type
+        self.byte_range = byte_range
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def respond(self, content):
+        """Streaming response around ``content`` (an iterator over the range)"""
+        start, end = self.byte_range or (0, self.size - 1)
+        response = StreamingHttpResponse(content, status=206 if self.byte_range else 200, content_type=self.content_type)
+        response['Content-Length'] = str(end - start + 1)
+        if self.byte_range:
+            response['Content-Range'] = f'bytes {start}-{end}/{self.size}'
+        return self.finish(response)
+
+    def finish(self, response):
+        response['Accept-Ranges'] = 'bytes'
+        return set_validators(response, self.etag, self.last_modified)
+
+
+def serve(request, path):
+    """
+    Response for a file under MEDIA_ROOT.
+
+    Repeat requests are answered with 304 from the ETag/Last-Modified
+    validators. A single byte range is served as 206, ignored when an
+    If-Range no longer matches the file. With MEDIA_OFFLOAD set the body is
+    not sent by Django at all: the front proxy reads the file named in the
+    X-Accel-Redirect/X-Sendfile header.
+    """
+    body = _prepare(request, path)
+    if not isinstance(body, FileBody):
+        return body
+    if isinstance(request, ASGIRequest):
+        # Django's ASGI handler reads a synchronous iterator whole before
+        # sending it; an async one is sent chunk by chunk
+        return _async_body(body)
+    if body.byte_range is None:
+        # Whole file: FileResponse lets the WSGI server use sendfile()
+        return body.finish(FileResponse(open(body.file_path, 'rb'), content_type=body.content_type))
+    start, end = body.byte_range
+    return body.respond(_read_range(body.file_path, start, end - start + 1))
+
+
+async def aserve(request, path):
+    """serve() for async views, with the file checks run off the event loop"""
+    if not isinstance(request, ASGIRequest):
+        return await sync_to_async(serve)(request, path)
+    body = await sync_to_async(_prepare)(request, path)
+    if not isinstance(body, FileBody):
+        return body
+    return _async_body(body)
+
+
+def _async_body(body):
+    start, end = body.byte_range or (0, body.size - 1)
+    return body.respond(_aread_range(body.file_path, start, end - start + 1))
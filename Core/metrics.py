@@ -0,0 +1,231 @@
+import hmac
+from bisect import bisect_left
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from .aggregates import dashboard_counters
+from .bookings import ACTIVE_STATUSES
+from .caching import CACHE_HEADER
+from .models import Aluguel
+
+PREFIX = 'aluguel'
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+GAUGES_CACHE_KEY = 'metrics:gauges'
+
+# Requests that matched no route share one label, so unknown paths cannot
+# grow the number of series
+UNMATCHED = 'unmatched'
+
+_lock = threading.Lock()
+# (view, method) -> requests per bucket, not cumulative; the last one is +Inf
+_latency_buckets = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+_latency_sum = Counter()
+_latency_count = Counter()
+# view -> queries and seconds spent in them
+_queries = Counter()
+_query_seconds = Counter()
+# (view, 'hit' | 'miss') -> responses of the cached API views
+_cache_results = Counter()
+
+# Query counter of the request being measured. A context variable, not a
+# wrapper installed per request: async views run their queries in a worker
+# thread, on another connection, but in a copy of the request's context.
+_current = ContextVar('metrics_queries', default=None)
+
+
+class _QueryCounter:
+    """execute_wrapper counting the queries of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+def count_query(execute, sql, params, many, context):
+    """execute_wrapper of every connection (see Core.signals), counting for the current request"""
+    counter = _current.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def observe(view, method, seconds, queries, query_seconds, cache_result=None):
+    """Record one finished request"""
+    index = bisect_left(LATENCY_BUCKETS, seconds)
+    with _lock:
+        _latency_buckets[view, method][index] += 1
+        _latency_sum[view, method] += seconds
+        _latency_count[view, method] += 1
+        _queries[view] += queries
+        _query_seconds[view] += query_seconds
+        if cache_result:
+            _cache_results[view, cache_result] += 1
+
+
+class MetricsMiddleware:
+    """
+    Feeds the request metrics of /api/metrics/: latency per route name and
+    method, queries per route and the X-Cache result of the cached API views.
+    The counters live in this process; each worker reports its own.
+
+    Sync and async capable, so under ASGI the async views are not pushed
+    through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        counter = _QueryCounter()
+        token = _current.set(counter)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, counter, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        counter = _QueryCounter()
+        token = _current.set(counter)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, counter, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, counter, elapsed):
+        match = request.resolver_match
+        view = match.view_name if match else UNMATCHED
+        cache_result = response.get(CACHE_HEADER)
+        observe(
+            view, request.method, elapsed, counter.count, counter.seconds,
+            cache_result.lower() if cache_result else None,
+        )
+
+
+def business_gauges():
+    """
+    Rental and equipment gauges. Active rentals and equipment by status come
+    from the incrementally maintained dashboard counters; expired-but-open
+    rentals depend on the clock, so they are counted (on the status/data_fim
+    index). Both are cached for METRICS_GAUGE_TTL seconds, so however often
+    the endpoint is scraped the database is read at most once per TTL.
+    """
+    gauges = cache.get(GAUGES_CACHE_KEY)
+    if gauges is None:
+        now = timezone.now()
+        counters = dashboard_counters(now)
+        gauges = {
+            'active_rentals': counters['active_rentals'],
+            'expired_open_rentals': Aluguel.objects.filter(status__in=ACTIVE_STATUSES, data_fim__lt=now).count(),
+            'monthly_revenue': float(counters['monthly_revenue']),
+            'equipment': counters['equipment'],
+        }
+        cache.set(GAUGES_CACHE_KEY, gauges, settings.METRICS_GAUGE_TTL)
+    return gauges
+
+
+def authorized(request):
+    """Staff session, or the METRICS_TOKEN bearer token sent by the scraper"""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _family(lines, name, kind, help_text, samples):
+    """Append one metric family: HELP, TYPE and its (suffix, labels, value) samples"""
+    lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+    lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+    for suffix, labels, value in samples:
+        lines.append(f'{PREFIX}_{name}{suffix}{_labels(**labels) if labels else ""} {_number(value)}')
+
+
+def render():
+    """Every metric in the Prometheus text exposition format (version 0.0.4)"""
+    with _lock:
+        buckets = {key: list(counts) for key, counts in _latency_buckets.items()}
+        latency_sum = Counter(_latency_sum)
+        latency_count = Counter(_latency_count)
+        queries = Counter(_queries)
+        query_seconds = Counter(_query_seconds)
+        cache_results = Counter(_cache_results)
+
+    lines = []
+    samples = []
+    for (view, method), counts in sorted(buckets.items()):
+        cumulative = 0
+        for bound, count in zip([*map(float, LATENCY_BUCKETS), '+Inf'], counts):
+            cumulative += count
+            samples.append(('_bucket', {'view': view, 'method': method, 'le': bound}, cumulative))
+        samples.append(('_sum', {'view': view, 'method': method}, latency_sum[view, method]))
+        samples.append(('_count', {'view': view, 'method': method}, latency_count[view, method]))
+    _family(lines, 'http_request_duration_seconds', 'histogram', "Tempo de resposta por rota e método", samples)
+
+    _family(lines, 'db_queries_total', 'counter', "Consultas SQL executadas, por rota",
+            [('', {'view': view}, count) for view, count in sorted(queries.items())])
+    _family(lines, 'db_query_seconds_total', 'counter', "Tempo gasto em consultas SQL, por rota",
+            [('', {'view': view}, seconds) for view, seconds in sorted(query_seconds.items())])
+
+    _family(lines, 'api_cache_requests_total', 'counter', "Respostas das APIs com cache, por resultado (hit/miss)",
+            [('', {'view': view, 'result': result}, count) for (view, result), count in sorted(cache_results.items())])
+    ratios = []
+    for view in sorted({view for view, _ in cache_results}):
+        total = cache_results[view, 'hit'] + cache_results[view, 'miss']
+        ratios.append(('', {'view': view}, cache_results[view, 'hit'] / total if total else 0.0))
+    _family(lines, 'api_cache_hit_ratio', 'gauge', "Fração das respostas servidas do cache desde o início do processo", ratios)
+
+    gauges = business_gauges()
+    _family(lines, 'active_rentals', 'gauge', "Aluguéis abertos ou em andamento",
+            [('', None, gauges['active_rentals'])])
+    _family(lines, 'expired_open_rentals', 'gauge', "Aluguéis ainda abertos com a data final já passada",
+            [('', None, gauges['expired_open_rentals'])])
+    _family(lines, 'monthly_revenue', 'gauge', "Receita dos aluguéis fechados no mês corrente",
+            [('', None, gauges['monthly_revenue'])])
+    _family(lines, 'equipment', 'gauge', "Equipamentos por status",
+            [('', {'status': status}, count) for status, count in gauges['equipment'].items()])
+    return '\n'.join(lines) + '\n'
@@ -1,4 +1,10 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
+
+from .search import normalize, only_digits
 
 class Cliente(models.Model):
     nome = models.CharField(max_length=100)
@@ -7,15 +13,30 @@ class Cliente(models.Model):
     telefone = models.CharField(max_length=15)
     endereco = models.TextField()
     data_nascimento = models.DateField()
+    # Prefix search keys for the lookup API, filled in by update_search_fields()
+    nome_normalizado = models.CharField(max_length=100, db_index=True, editable=False, default='')
+    cpf_digitos = models.CharField(max_length=14, db_index=True, editable=False, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.nome
 
+    def update_search_fields(self):
+        self.nome_normalizado = normalize(self.nome)
+        self.cpf_digitos = only_digits(self.cpf)
+
+    def save(self, *args, **kwargs):
+        self.update_search_fields()
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
+        indexes = [
+            # Delta sync: rows changed after a (updated_at, id) cursor
+            models.Index(fields=['updated_at', 'id'], name='cliente_sync_idx'),
+        ]
 
 
 class Equipamento(models.Model):
@@ -30,10 +51,23 @@ class Equipamento(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='disponivel')
     valor_diario = models.DecimalField(max_digits=10, decimal_places=2)
     foto = models.ImageField(upload_to='equipamentos/', blank=True, null=True)
+    nome_normalizado = models.CharField(max_length=200, editable=False, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+    # Optimistic locking: bumped on every update, see Core.versioning
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     def __str__(self):
         return self.nome
 
+    def update_search_fields(self):
+        self.nome_normalizado = normalize(self.nome)
+
+    def save(self, *args, **kwargs):
+        self.update_search_fields()
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
+
     @property
     def valor_por_hora(self):
         return self.valor_diario / 24
@@ -41,6 +75,13 @@ class Equipamento(models.Model):
     class Meta:
         verbose_name = "Equipamento"
         verbose_name_plural = "Equipamentos"
+        indexes = [
+            models.Index(fields=['status', 'id'], name='equipamento_status_idx'),
+            # Lookup API: name prefix, optionally restricted to one status
+            models.Index(fields=['nome_normalizado'], name='equipamento_nome_busca_idx'),
+            models.Index(fields=['status', 'nome_normalizado'], name='equipamento_status_busca_idx'),
+            models.Index(fields=['updated_at', 'id'], name='equipamento_sync_idx'),
+        ]
 
 
 class Aluguel(models.Model):
@@ -60,6 +101,8 @@ class Aluguel(models.Model):
     observacoes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Optimistic locking: bumped on every update, see Core.versioning
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     def __str__(self):
         return f"{self.cliente.nome} - {self.equipamento.nome} ({self.get_status_display()})"
@@ -67,9 +110,21 @@ class Aluguel(models.Model):
     def save(self, *args, **kwargs):
         if self.data_fim and not self.valor_total:
             horas = (self.data_fim - self.data_inicio).total_seconds() / 3600
-            self.valor_total = self.equipamento.valor_por_hora * horas
+            self.valor_total = self.equipamento.valor_por_hora * Decimal(str(horas))
+        if not self._state.adding:
+            self.version += 1
         super().save(*args, **kwargs)
 
+    def clean(self):
+        # Same overlap rule as the API, so admin edits cannot double-book
+        from .bookings import ConflitoReserva, check_availability
+        if self.equipamento_id and self.data_inicio:
+            try:
+                check_availability(self.equipamento_id, self.data_inicio, self.data_fim,
+                                   self.status, exclude_id=self.pk)
+            except (ValueError, ConflitoReserva) as e:
+                raise ValidationError(str(e))
+
     @property
     def duracao_horas(self):
         if self.data_fim:
@@ -80,3 +135,66 @@ class Aluguel(models.Model):
         verbose_name = "Aluguel"
         verbose_name_plural = "Aluguéis"
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination order used by the rentals list API
+            models.Index(fields=['-created_at', 'id'], name='aluguel_created_idx'),
+            models.Index(fields=['status', '-created_at', 'id'], name='aluguel_status_created_idx'),
+            # Overlap check: one equipment's bookings ordered by period
+            models.Index(fields=['equipamento', 'data_inicio', 'data_fim'], name='aluguel_equip_periodo_idx'),
+            # ... and its open-ended rentals, which the range above cannot bound
+            models.Index(fields=['equipamento', 'data_inicio'], condition=models.Q(data_fim__isnull=True),
+                         name='aluguel_equip_sem_fim_idx'),
+            # Expiry scan: active rentals whose data_fim has passed
+            models.Index(fields=['status', 'data_fim'], name='aluguel_status_fim_idx'),
+            models.Index(fields=['updated_at', 'id'], name='aluguel_sync_idx'),
+        ]
+
+
+class ExecucaoExpiracao(models.Model):
+    """One run of the rental expiry job (see the expire_rentals command)"""
+    executado_em = models.DateTimeField(db_index=True)
+    fechados = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.executado_em:%d/%m/%Y %H:%M} - {self.fechados} fechado(s)"
+
+    class Meta:
+        verbose_name = "Execução de Expiração"
+        verbose_name_plural = "Execuções de Expiração"
+        ordering = ['-executado_em']
+
+
+class Agregado(models.Model):
+    """
+    Pre-computed dashboard counter, kept up to date by Core.aggregates.
+    Rebuild from scratch with: python manage.py rebuild_dashboard_stats
+    """
+    chave = models.CharField(max_length=50, primary_key=True)
+    valor = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.chave} = {self.valor}"
+
+    class Meta:
+        verbose_name = "Agregado"
+        verbose_name_plural = "Agregados"
+
+
+class Exclusao(models.Model):
+    """
+    Tombstone of a deleted Cliente, Equipamento or Aluguel, so the sync API
+    can tell replicas to drop it. Written by Core.signals.
+    """
+    tabela = models.CharField(max_length=20)
+    objeto_id = models.PositiveIntegerField()
+    excluido_em = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.tabela} #{self.objeto_id} ({self.excluido_em:%d/%m/%Y %H:%M})"
+
+    class Meta:
+        verbose_name = "Exclusão"
+        verbose_name_plural = "Exclusões"
+        indexes = [
+            models.Index(fields=['excluido_em', 'id'], name='exclusao_sync_idx'),
+        ]
@@ -0,0 +1,135 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidPageParameter(ValueError):
+    """Raised when the cursor or limit in the query string cannot be used"""
+
+
+def encode_cursor(values):
+    """Encode the ordering values of the last row of a page as an opaque token"""
+    payload = []
+    for value in values:
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        payload.append(value)
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError):
+        raise InvalidPageParameter("Cursor inválido")
+    if not isinstance(values, list):
+        raise InvalidPageParameter("Cursor inválido")
+    return values
+
+
+def get_page_size(request):
+    limit = request.GET.get('limit')
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidPageParameter("Parâmetro 'limit' deve ser um número inteiro")
+    if limit < 1:
+        raise InvalidPageParameter("Parâmetro 'limit' deve ser maior que zero")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _parse_ordering(ordering):
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def _keyset_filter(ordering, values):
+    """
+    Build the "rows after the cursor" condition for a multi-column ordering,
+    e.g. for ('-created_at', 'id'):
+        created_at < v0 OR (created_at = v0 AND id > v1)
+    """
+    condition = Q()
+    equal_prefix = {}
+    for (field, descending), value in zip(ordering, values):
+        lookup = 'lt' if descending else 'gt'
+        condition |= Q(**equal_prefix, **{f'{field}__{lookup}': value})
+        equal_prefix[field] = value
+    return condition
+
+
+def _cursor_values(model, ordering, values):
+    """
+    The decoded cursor values converted with each ordering field's
+    to_python(), so a tampered cursor is a 400 and not an error in the query
+    """
+    if len(values) != len(ordering):
+        raise InvalidPageParameter("Cursor inválido")
+    converted = []
+    for (field, _), value in zip(ordering, values):
+        try:
+            value = model._meta.get_field(field).to_python(value)
+        except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+            raise InvalidPageParameter("Cursor inválido")
+        if value is None:
+            raise InvalidPageParameter("Cursor inválido")
+        converted.append(value)
+    return converted
+
+
+def _row_value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+def _page_queryset(queryset, request, ordering):
+    """(queryset of the page plus one extra row, page size, parsed ordering)"""
+    parsed_ordering = _parse_ordering(ordering)
+    page_size = get_page_size(request)
+
+    queryset = queryset.order_by(*ordering)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        values = _cursor_values(queryset.model, parsed_ordering, decode_cursor(cursor))
+        queryset = queryset.filter(_keyset_filter(parsed_ordering, values))
+
+    # Fetch one extra row to know whether there is a next page
+    return queryset[:page_size + 1], page_size, parsed_ordering
+
+
+def _split_page(rows, page_size, parsed_ordering):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([_row_value(last, field) for field, _ in parsed_ordering])
+    return rows, next_cursor
+
+
+def paginate(queryset, request, ordering):
+    """
+    Return (rows, next_cursor) for one page of ``queryset`` ordered by
+    ``ordering``. The ordering must end in a unique column so the cursor is
+    unambiguous, and should be backed by an index so every page is a range scan.
+    """
+    page, page_size, parsed_ordering = _page_queryset(queryset, request, ordering)
+    return _split_page(list(page), page_size, parsed_ordering)
+
+
+async def apaginate(queryset, request, ordering):
+    """Async version of paginate(), for async views"""
+    page, page_size, parsed_ordering = _page_queryset(queryset, request, ordering)
+    return _split_page([row async for row in page], page_size, parsed_ordering)
@@ -0,0 +1,215 @@
+import logging
+import random
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.html import json_script
+
+logger = logging.getLogger(__name__)
+
+# Longest SQL kept in the log for a repeated query
+SQL_PREVIEW = 300
+
+# Profile of the request being profiled. Async views run their queries in a
+# worker thread, on another connection, but in a copy of this context
+_current = ContextVar('profile', default=None)
+
+# Latest request profiles, oldest first (PROFILING_LOG_SIZE of them)
+_log = deque(maxlen=settings.PROFILING_LOG_SIZE)
+
+
+class Profile:
+    """
+    Timings of one request. Installed as a database execute_wrapper, it also
+    counts queries by their SQL: parameters are passed separately, so the
+    same statement run for each row of a list shows up as one SQL text
+    executed many times (an N+1).
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self.timings = Counter()
+        self.view_start = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def repeated_queries(self):
+        """Statements run at least PROFILING_N_PLUS_ONE_THRESHOLD times, most repeated first"""
+        threshold = settings.PROFILING_N_PLUS_ONE_THRESHOLD
+        return [
+            {'sql': sql[:SQL_PREVIEW], 'count': count}
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+def profile_query(execute, sql, params, many, context):
+    """execute_wrapper of every connection (see Core.signals), feeding the current profile"""
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's ``name`` timing, if it is profiled"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.timings[name] += time.perf_counter() - start
+
+
+class TimedJsonResponse(JsonResponse):
+    """JsonResponse whose JSON encoding counts as ``serialize`` time"""
+
+    def __init__(self, data, *args, **kwargs):
+        with timed('serialize'):
+            super().__init__(data, *args, **kwargs)
+
+
+def timed_json_script(value, element_id):
+    """json_script, counting the encoding as ``serialize`` time"""
+    with timed('serialize'):
+        return json_script(value, element_id)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def server_timing(entry):
+    return ', '.join([
+        f'total;dur={entry["total_ms"]}',
+        f'view;dur={entry["view_ms"]}',
+        f'db;dur={entry["db_ms"]};desc="{entry["queries"]} queries"',
+        f'serialize;dur={entry["serialize_ms"]}',
+    ])
+
+
+def recent_profiles():
+    """Logged request profiles, newest first"""
+    return list(reversed(_log))
+
+
+def summary():
+    """Per-view averages over the logged requests, slowest first"""
+    by_view = defaultdict(list)
+    for entry in list(_log):
+        by_view[entry['view'] or entry['path']].append(entry)
+    rows = []
+    for view, entries in by_view.items():
+        count = len(entries)
+        rows.append({
+            'view': view,
+            'requests': count,
+            'avg_total_ms': round(sum(e['total_ms'] for e in entries) / count, 2),
+            'max_total_ms': max(e['total_ms'] for e in entries),
+            'avg_db_ms': round(sum(e['db_ms'] for e in entries) / count, 2),
+            'avg_queries': round(sum(e['queries'] for e in entries) / count, 1),
+            'n_plus_one': sum(1 for e in entries if e['n_plus_one']),
+        })
+    return sorted(rows, key=lambda row: row['avg_total_ms'], reverse=True)
+
+
+class ProfilingMiddleware:
+    """
+    Times each request (total, view, SQL and serialization), sends the
+    numbers in a Server-Timing header and keeps them in an in-process log
+    (recent_profiles, /api/profiling/), warning about repeated queries.
+
+    Off unless PROFILING_ENABLED; in production PROFILING_SAMPLE_RATE limits
+    it to a fraction of the requests, the others pay a single random() call.
+    Sync and async capable, so async views keep running on the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = Profile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, start)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        profile = Profile()
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, start)
+
+    def finish(self, request, response, profile, start):
+        entry = self.record(request, response, profile, start, time.perf_counter())
+        response['Server-Timing'] = server_timing(entry)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current.get()
+        if profile is not None:
+            profile.view_start = time.perf_counter()
+
+    def record(self, request, response, profile, start, end):
+        match = request.resolver_match
+        entry = {
+            'at': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': _ms(end - start),
+            'view_ms': _ms(end - profile.view_start) if profile.view_start else 0,
+            'db_ms': _ms(profile.sql_time),
+            'serialize_ms': _ms(profile.timings['serialize']),
+            'queries': profile.queries,
+            'n_plus_one': profile.repeated_queries(),
+        }
+        _log.append(entry)
+        for repeated in entry['n_plus_one']:
+            logger.warning(
+                "Possível N+1 em %s %s: %d execuções de %s",
+                request.method, request.path, repeated['count'], repeated['sql'],
+            )
+        return entry
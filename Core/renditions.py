@@ -0,0 +1,127 @@
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import Equipamento
+
+logger = logging.getLogger(__name__)
+
+# Longest side, in pixels, of each resized copy of an equipment photo
+SIZES = (1024, 256, 64)
+
+# Output formats: (extension, Pillow format, save options)
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+)
+
+_executor = None
+
+
+def _storage():
+    return Equipamento._meta.get_field('foto').storage
+
+
+def rendition_name(name, size, extension):
+    """
+    Storage name of one rendition of the photo stored as ``name``, e.g.
+    equipamentos/furadeira.png -> equipamentos/renditions/furadeira.png_256.webp.
+    Derived from the original name only, so URLs need no extra lookup. The
+    whole file name is kept, extension included, so foto.jpg and foto.png
+    never share renditions.
+    """
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, 'renditions', f'{filename}_{size}.{extension}')
+
+
+def rendition_names(name):
+    return [rendition_name(name, size, extension) for size in SIZES for extension, _, _ in FORMATS]
+
+
+def rendition_urls(name):
+    """{size: {extension: url}} for the photo stored as ``name``, or None without a photo"""
+    if not name:
+        return None
+    storage = _storage()
+    return {
+        str(size): {extension: storage.url(rendition_name(name, size, extension)) for extension, _, _ in FORMATS}
+        for size in SIZES
+    }
+
+
+def _flatten(image, extension):
+    if extension == 'jpg' and image.mode != 'RGB':
+        # JPEG has no alpha channel: put transparent areas on white
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, 'white')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    if image.mode not in ('RGB', 'RGBA'):
+        return image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    return image
+
+
+def generate(name):
+    """
+    Write every rendition of the photo stored as ``name``, replacing old ones.
+    Sizes are produced from largest to smallest, each resized from the
+    previous one, so the full-resolution image is decoded and scaled once.
+    """
+    storage = _storage()
+    with storage.open(name, 'rb') as original:
+        image = Image.open(original)
+        # Phones store the orientation in EXIF instead of rotating the pixels
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    for size in SIZES:
+        image = image.copy()
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for extension, fmt, options in FORMATS:
+            buffer = BytesIO()
+            _flatten(image, extension).save(buffer, fmt, **options)
+            target = rendition_name(name, size, extension)
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def delete(name):
+    """Remove the renditions of the photo stored as ``name``"""
+    if not name:
+        return
+    storage = _storage()
+    for target in rendition_names(name):
+        try:
+            storage.delete(target)
+        except OSError:
+            pass
+
+
+def _generate_logged(name):
+    try:
+        generate(name)
+    except Exception:
+        logger.exception("Falha ao gerar miniaturas de %s", name)
+
+
+def schedule(name):
+    """
+    Generate the renditions of ``name`` in the background worker pool, off the
+    request that uploaded it. Until they exist, clients fall back to the
+    original file.
+    """
+    global _executor
+    if not name:
+        return None
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PHOTO_RENDITION_WORKERS,
+            thread_name_prefix='renditions',
+        )
+    return _executor.submit(_generate_logged, name)
@@ -0,0 +1,41 @@
+import re
+import unicodedata
+
+from .pagination import InvalidPageParameter
+
+DEFAULT_LOOKUP_LIMIT = 10
+MAX_LOOKUP_LIMIT = 50
+
+
+def normalize(value):
+    """Lowercase, accent-free, single-spaced form of a name used for prefix search"""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split())
+
+
+def only_digits(value):
+    return re.sub(r'\D', '', value or '')
+
+
+def prefix_range(field, prefix):
+    """
+    Filter kwargs matching ``field`` values that start with ``prefix``, as a
+    half-open range (prefix <= value < successor). Unlike LIKE 'prefix%' the
+    range is always answered from the column's index, on every backend.
+    """
+    successor = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return {f'{field}__gte': prefix, f'{field}__lt': successor}
+
+
+def get_lookup_limit(request):
+    limit = request.GET.get('limit')
+    if not limit:
+        return DEFAULT_LOOKUP_LIMIT
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidPageParameter("Parâmetro 'limit' deve ser um número inteiro")
+    if limit < 1:
+        raise InvalidPageParameter("Parâmetro 'limit' deve ser maior que zero")
+    return min(limit, MAX_LOOKUP_LIMIT)
@@ -0,0 +1,207 @@
+import math
+import random
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import aggregates
+from .models import Aluguel, Cliente, Equipamento
+from .search import normalize
+
+BATCH_SIZE = 1000
+
+# Rentals are spread over this many days before now
+HISTORY_DAYS = 365
+
+CENTS = Decimal('0.01')
+
+FIRST_NAMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+    'Juliana', 'Lucas', 'Mariana', 'Mateus', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Thiago',
+    'Vitória', 'Wagner', 'Letícia', 'Gustavo', 'Beatriz', 'Rodrigo', 'Camila', 'André', 'Fernanda', 'José',
+]
+LAST_NAMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa',
+]
+STREETS = [
+    'Rua das Flores', 'Avenida Brasil', 'Rua XV de Novembro', 'Rua São João', 'Avenida Paulista',
+    'Rua da Paz', 'Rua Sete de Setembro', 'Avenida Getúlio Vargas', 'Rua Tiradentes', 'Rua Dom Pedro II',
+]
+CITIES = [
+    ('São Paulo', '11'), ('Campinas', '19'), ('Rio de Janeiro', '21'), ('Belo Horizonte', '31'),
+    ('Curitiba', '41'), ('Porto Alegre', '51'), ('Salvador', '71'), ('Recife', '81'),
+]
+# (kind, typical daily rate)
+EQUIPMENT_KINDS = [
+    ('Furadeira de Impacto', 35), ('Martelete Rompedor', 90), ('Betoneira 400L', 120),
+    ('Serra Circular', 45), ('Lixadeira Orbital', 30), ('Andaime Tubular', 25), ('Gerador 5kVA', 180),
+    ('Compactador de Solo', 160), ('Escada Extensível', 20), ('Lavadora de Alta Pressão', 70),
+    ('Esmerilhadeira Angular', 30), ('Cortadora de Piso', 85), ('Parafusadeira', 25), ('Soprador Térmico', 28),
+]
+BRANDS = ['Bosch', 'Makita', 'DeWalt', 'Stanley', 'Vonder', 'Tramontina', 'Black+Decker', 'Menegotti']
+NOTES = ['Cliente retira na loja', 'Entrega na obra', 'Pagamento na devolução', 'Conferir acessórios na devolução']
+
+
+def _cpf(base):
+    """Formatted CPF with valid check digits for a 9-digit ``base``"""
+    digits = [int(d) for d in f'{base:09d}']
+    for length in (9, 10):
+        total = sum(d * (length + 1 - i) for i, d in enumerate(digits))
+        digits.append(total * 10 % 11 % 10)
+    text = ''.join(map(str, digits))
+    return f'{text[:3]}.{text[3:6]}.{text[6:9]}-{text[9:]}'
+
+
+def _weights(n, skew):
+    """Zipf-like popularity: a few rows get most of the rentals"""
+    return [1 / (rank + 1) ** skew for rank in range(n)]
+
+
+def _clientes(rng, count, now):
+    existing = set(Cliente.objects.values_list('cpf', flat=True))
+    clientes = []
+    for base in rng.sample(range(1, 10 ** 9), count + len(existing)):
+        cpf = _cpf(base)
+        if cpf in existing:
+            continue
+        first, last, last2 = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(LAST_NAMES)
+        city, ddd = rng.choice(CITIES)
+        cliente = Cliente(
+            nome=f'{first} {last} {last2}',
+            cpf=cpf,
+            email=f"{normalize(first)}.{normalize(last2)}{base % 1000}@example.com",
+            telefone=f'({ddd}) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}',
+            endereco=f'{rng.choice(STREETS)}, {rng.randint(1, 3000)} - {city}',
+            data_nascimento=date(now.year - rng.randint(18, 80), rng.randint(1, 12), rng.randint(1, 28)),
+        )
+        # bulk_create does not call save(), which normally fills these
+        cliente.update_search_fields()
+        clientes.append(cliente)
+        if len(clientes) == count:
+            break
+    return Cliente.objects.bulk_create(clientes, batch_size=BATCH_SIZE)
+
+
+def _equipamentos(rng, count):
+    equipamentos = []
+    for _ in range(count):
+        kind, rate = rng.choice(EQUIPMENT_KINDS)
+        roll = rng.random()
+        equipamento = Equipamento(
+            nome=f'{kind} {rng.choice(BRANDS)} {rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ")}{rng.randint(100, 9999)}',
+            valor_diario=(Decimal(rate) * Decimal(str(rng.uniform(0.8, 1.3)))).quantize(CENTS),
+            status='manutencao' if roll < 0.05 else 'indisponivel' if roll < 0.07 else 'disponivel',
+        )
+        equipamento.update_search_fields()
+        equipamentos.append(equipamento)
+    return Equipamento.objects.bulk_create(equipamentos, batch_size=BATCH_SIZE)
+
+
+def _price(equipamento, inicio, fim):
+    horas = Decimal(str((fim - inicio).total_seconds() / 3600))
+    return (equipamento.valor_diario / 24 * horas).quantize(CENTS)
+
+
+def _timeline(rng, equipamento, count, now, active):
+    """
+    ``count`` non-overlapping (inicio, fim, status) bookings of one item over
+    the last HISTORY_DAYS. Durations are log-normal around a day; the last
+    booking is still running when ``active``.
+    """
+    window = timedelta(days=HISTORY_DAYS)
+    durations = [timedelta(hours=min(max(rng.lognormvariate(math.log(24), 1.0), 1), 24 * 30)) for _ in range(count)]
+    busy = sum(durations, timedelta())
+    if busy > window * 0.9:
+        durations = [duration * (window * 0.9 / busy) for duration in durations]
+        busy = window * 0.9
+    # Idle time between bookings: random cut points of the free time
+    free = (window - busy).total_seconds()
+    cuts = sorted(rng.uniform(0, free) for _ in range(count)) + [free]
+    moment = now - window
+    previous_cut = 0
+    bookings = []
+    for duration, cut in zip(durations, cuts):
+        moment += timedelta(seconds=cut - previous_cut)
+        previous_cut = cut
+        bookings.append([moment, moment + duration, 'cancelado' if rng.random() < 0.05 else 'fechado'])
+        moment += duration
+    if active and bookings:
+        last = bookings[-1]
+        previous_end = bookings[-2][1] if len(bookings) > 1 else now - window
+        duration = last[1] - last[0]
+        last[0] = max(previous_end + timedelta(hours=1), now - duration / 2)
+        # Some active rentals have no planned return yet
+        last[1] = last[0] + duration if rng.random() < 0.8 else None
+        last[2] = 'em_andamento' if rng.random() < 0.3 else 'aberto'
+    return bookings
+
+
+def _alugueis(rng, count, clientes, equipamentos, now):
+    bookable = [e for e in equipamentos if e.status == 'disponivel']
+    if not bookable or not clientes:
+        return []
+    rng.shuffle(bookable)
+    per_item = Counter(rng.choices(range(len(bookable)), weights=_weights(len(bookable), 0.8), k=count))
+    client_weights = _weights(len(clientes), 0.5)
+
+    alugueis = []
+    timestamps = []
+    rented = []
+    for index, n in per_item.items():
+        equipamento = bookable[index]
+        active = rng.random() < 0.3
+        for inicio, fim, status in _timeline(rng, equipamento, n, now, active):
+            created_at = min(inicio - timedelta(hours=rng.uniform(0, 7 * 24)), now)
+            closed = status in ('fechado', 'cancelado')
+            alugueis.append(Aluguel(
+                cliente=rng.choices(clientes, weights=client_weights)[0],
+                equipamento=equipamento,
+                data_inicio=inicio,
+                data_fim=fim,
+                valor_total=_price(equipamento, inicio, fim) if fim and status != 'cancelado' else None,
+                status=status,
+                observacoes=rng.choice(NOTES) if rng.random() < 0.2 else '',
+            ))
+            timestamps.append((created_at, fim if closed else created_at))
+            if not closed:
+                equipamento.status = 'alugado'
+                rented.append(equipamento)
+
+    Aluguel.objects.bulk_create(alugueis, batch_size=BATCH_SIZE)
+    # The inserts stamp created_at/updated_at with the current time; set the
+    # historical ones (the monthly revenue counts a rental in the month it
+    # was last updated) with bulk_update, which leaves auto_now fields alone
+    for aluguel, (created_at, updated_at) in zip(alugueis, timestamps):
+        aluguel.created_at, aluguel.updated_at = created_at, updated_at
+    Aluguel.objects.bulk_update(alugueis, ['created_at', 'updated_at'], batch_size=BATCH_SIZE)
+    Equipamento.objects.bulk_update(rented, ['status'], batch_size=BATCH_SIZE)
+    return alugueis
+
+
+def seed(clientes=100, equipamentos=50, alugueis=1000, random_seed=None, now=None):
+    """
+    Insert synthetic clients, equipment and rentals in bulk, with the shapes
+    of real data: valid unique CPFs, a few popular items and frequent
+    customers taking most rentals, log-normal rental durations, never
+    overlapping bookings of the same item, some rentals still running.
+    The same ``random_seed`` always produces the same data.
+
+    Bulk inserts skip the model signals, so the dashboard counters are
+    rebuilt at the end. Returns the number of rows created per table.
+    """
+    rng = random.Random(random_seed)
+    now = now or timezone.now()
+    with transaction.atomic():
+        created_clientes = _clientes(rng, clientes, now)
+        created_equipamentos = _equipamentos(rng, equipamentos)
+        created_alugueis = _alugueis(rng, alugueis, created_clientes, created_equipamentos, now)
+        aggregates.rebuild()
+    return {
+        'clientes': len(created_clientes),
+        'equipamentos': len(created_equipamentos),
+        'alugueis': len(created_alugueis),
+    }
@@ -0,0 +1,162 @@
+from django.db.models.fields.files import FieldFile
+
+from .models import Equipamento
+from .profiling import timed
+from .renditions import rendition_urls
+
+
+class InvalidFieldset(ValueError):
+    """Raised when ?fields= names a field the resource does not have"""
+
+
+# Converters from a column value to its JSON form
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _money(value):
+    return str(value) if value else None
+
+
+def _foto_url(name):
+    return Equipamento._meta.get_field('foto').storage.url(name) if name else None
+
+
+class Field:
+    """
+    One output field: the ``columns`` it reads from a values() row and how
+    it renders them. A single column renders through ``convert``; several
+    columns (a nested object) render through ``build``, which gets the row.
+    """
+
+    def __init__(self, column=None, convert=None, columns=None, build=None):
+        self.columns = tuple(columns or (column,))
+        if build is None:
+            column = self.columns[0]
+            if convert is None:
+                build = lambda row: row[column]  # noqa: E731
+            else:
+                build = lambda row: convert(row[column])  # noqa: E731
+        self.build = build
+
+
+def _related(prefix):
+    """Nested {'id', 'nome'} of a foreign key, read from <prefix>_id and <prefix>__nome"""
+    id_column, nome_column = f'{prefix}_id', f'{prefix}__nome'
+    return Field(
+        columns=(id_column, nome_column),
+        build=lambda row: {'id': row[id_column], 'nome': row[nome_column]},
+    )
+
+
+class Serializer:
+    """
+    Renders values() rows of one model as API dicts. ``compile`` resolves a
+    field selection once into the columns to fetch and a list of builders, so
+    rendering a row is a single dict comprehension with no model instances.
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self._compiled = {}
+
+    def parse(self, request):
+        """
+        The ?fields= selection of the request, or None for every field. Names
+        come back in declaration order, so every spelling of a selection is one
+        compile() key and the cache holds at most one entry per field subset.
+        """
+        raw = request.GET.get('fields')
+        if not raw:
+            return None
+        requested = {name.strip() for name in raw.split(',') if name.strip()}
+        unknown = sorted(requested.difference(self.fields))
+        if unknown:
+            raise InvalidFieldset(f"Campo(s) inválido(s): {', '.join(unknown)}")
+        return tuple(name for name in self.fields if name in requested)
+
+    def compile(self, requested=None):
+        compiled = self._compiled.get(requested)
+        if compiled is None:
+            names = requested or tuple(self.fields)
+            compiled = self._compiled[requested] = CompiledSerializer([(name, self.fields[name]) for name in names])
+        return compiled
+
+    def for_request(self, request):
+        return self.compile(self.parse(request))
+
+    def render_instance(self, instance):
+        return self.compile().render_instance(instance)
+
+
+class CompiledSerializer:
+    def __init__(self, fields):
+        self.builders = [(name, field.build) for name, field in fields]
+        self.columns = list(dict.fromkeys(column for _, field in fields for column in field.columns))
+
+    def values(self, queryset, *extra_columns):
+        """``queryset`` reduced to the needed columns (plus e.g. the pagination ordering)"""
+        return queryset.values(*dict.fromkeys(self.columns + list(extra_columns)))
+
+    def render(self, row):
+        return {name: build(row) for name, build in self.builders}
+
+    def render_many(self, rows):
+        builders = self.builders
+        with timed('serialize'):
+            return [{name: build(row) for name, build in builders} for row in rows]
+
+    def render_instance(self, instance):
+        """Render a model instance already in memory (after a create or update)"""
+        with timed('serialize'):
+            return self.render({column: _attribute(instance, column) for column in self.columns})
+
+
+def _attribute(instance, column):
+    value = instance
+    for part in column.split('__'):
+        value = getattr(value, part)
+    if isinstance(value, FieldFile):
+        value = value.name
+    return value
+
+
+cliente_serializer = Serializer(
+    id=Field('id'),
+    nome=Field('nome'),
+    cpf=Field('cpf'),
+    email=Field('email'),
+    telefone=Field('telefone'),
+    endereco=Field('endereco'),
+    data_nascimento=Field('data_nascimento', _iso),
+    created_at=Field('created_at', _iso),
+    updated_at=Field('updated_at', _iso),
+)
+
+equipamento_serializer = Serializer(
+    id=Field('id'),
+    nome=Field('nome'),
+    status=Field('status'),
+    valor_diario=Field('valor_diario', str),
+    # Same value as the Equipamento.valor_por_hora property
+    valor_por_hora=Field('valor_diario', lambda valor_diario: str(valor_diario / 24)),
+    foto=Field('foto', _foto_url),
+    # Resized WebP/JPEG copies: {size: {extension: url}}
+    fotos=Field('foto', rendition_urls),
+    version=Field('version'),
+)
+
+aluguel_serializer = Serializer(
+    id=Field('id'),
+    cliente=_related('cliente'),
+    equipamento=_related('equipamento'),
+    data_inicio=Field('data_inicio', _iso),
+    data_fim=Field('data_fim', _iso),
+    valor_total=Field('valor_total', _money),
+    status=Field('status'),
+    observacoes=Field('observacoes'),
+    created_at=Field('created_at', _iso),
+    updated_at=Field('updated_at', _iso),
+    version=Field('version'),
+)
@@ -0,0 +1,130 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import aggregates, caching, metrics, profiling, renditions, sync
+from .models import Aluguel, Cliente, Equipamento, Exclusao
+
+
+# Dashboard aggregates: pre_save remembers the stored state, post_save and
+# post_delete apply the difference to the counters
+
+@receiver(pre_save, sender=Equipamento)
+def remember_equipamento_state(sender, instance, **kwargs):
+    instance._stored_status = None
+    if instance.pk:
+        instance._stored_status = (
+            Equipamento.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Equipamento)
+def update_equipamento_aggregates(sender, instance, created, **kwargs):
+    old_status = getattr(instance, '_stored_status', None)
+    if old_status == instance.status:
+        return
+    deltas = Counter({aggregates.equipment_status_key(instance.status): 1})
+    if old_status:
+        deltas[aggregates.equipment_status_key(old_status)] -= 1
+    aggregates.apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Equipamento)
+def remove_equipamento_aggregates(sender, instance, **kwargs):
+    aggregates.apply_deltas({aggregates.equipment_status_key(instance.status): -1})
+
+
+@receiver(pre_save, sender=Aluguel)
+def remember_aluguel_state(sender, instance, **kwargs):
+    instance._stored_contribution = Counter()
+    if instance.pk:
+        stored = (
+            Aluguel.objects.filter(pk=instance.pk)
+            .values('status', 'valor_total', 'updated_at')
+            .first()
+        )
+        if stored:
+            instance._stored_contribution = aggregates.rental_contribution(**stored)
+
+
+@receiver(post_save, sender=Aluguel)
+def update_aluguel_aggregates(sender, instance, **kwargs):
+    new = aggregates.rental_contribution(instance.status, instance.valor_total, instance.updated_at)
+    old = getattr(instance, '_stored_contribution', Counter())
+    aggregates.apply_deltas(aggregates.diff(new, old))
+
+
+@receiver(post_delete, sender=Aluguel)
+def remove_aluguel_aggregates(sender, instance, **kwargs):
+    old = aggregates.rental_contribution(instance.status, instance.valor_total, instance.updated_at)
+    aggregates.apply_deltas(aggregates.diff(Counter(), old))
+
+
+# Photo renditions: a new upload (API or admin) is resized in the background
+# once the row is committed
+
+@receiver(pre_save, sender=Equipamento)
+def remember_photo_upload(sender, instance, **kwargs):
+    # The file is written to storage after this signal; until then a freshly
+    # assigned upload is not committed (the stored name may even be reused)
+    instance._new_foto = bool(instance.foto) and not instance.foto._committed
+
+
+@receiver(post_save, sender=Equipamento)
+def schedule_photo_renditions(sender, instance, **kwargs):
+    if getattr(instance, '_new_foto', False):
+        name = instance.foto.name
+        transaction.on_commit(lambda: renditions.schedule(name))
+
+
+# Response cache: any write through the ORM (API, admin) bumps the table version
+
+CACHE_TABLES = {
+    Cliente: caching.CLIENTE,
+    Equipamento: caching.EQUIPAMENTO,
+    Aluguel: caching.ALUGUEL,
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_responses(sender, **kwargs):
+    table = CACHE_TABLES.get(sender)
+    if table:
+        caching.bump_versions(table)
+
+
+# Delta sync: deletions leave a tombstone for the replicas (see Core.sync)
+
+TOMBSTONE_TABLES = {model: name for name, model, _ in sync.TABLES}
+
+
+@receiver(post_delete)
+def record_tombstone(sender, instance, **kwargs):
+    tabela = TOMBSTONE_TABLES.get(sender)
+    if tabela:
+        Exclusao.objects.create(tabela=tabela, objeto_id=instance.pk)
+
+
+# SQLite tuning: the PRAGMAs in settings.SQLITE_PRAGMAS, once per connection
+
+@receiver(connection_created)
+def install_query_wrappers(sender, connection, **kwargs):
+    # Per-request query counts and profiles; a reconnect reuses the same
+    # wrapper objects
+    for wrapper in (profiling.profile_query, metrics.count_query):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
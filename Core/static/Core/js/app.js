@@ -68,14 +68,23 @@ document.addEventListener('DOMContentLoaded', function() {
         localStorage.setItem('cashflow', JSON.stringify([]));
     }
 
-    // Update dashboard stats
-    updateDashboardStats();
+    // Update dashboard stats, embedded in the page on the first load
+    const stats = takeBootstrap('dashboard');
+    if (stats) {
+        renderDashboardStats(stats);
+    } else {
+        updateDashboardStats();
+    }
     
-    // Check for expired rentals
+    // Check for rentals closed by the expiry job
     checkExpiredRentals();
     
-    // Set up periodic check for expired rentals (every 5 minutes)
+    // Periodically pick up rentals closed by the server-side expiry job (every 5 minutes)
     setInterval(checkExpiredRentals, 5 * 60 * 1000);
+    
+    // Bring the local replica up to date, then keep applying deltas
+    syncReplica();
+    setInterval(syncReplica, 5 * 60 * 1000);
 });
 
 // Utility functions
@@ -94,6 +103,208 @@ function formatDate(date) {
     return new Date(date).toLocaleDateString('pt-BR');
 }
 
+function debounce(fn, wait = 300) {
+    let timeoutId;
+    return function(...args) {
+        clearTimeout(timeoutId);
+        timeoutId = setTimeout(() => fn.apply(this, args), wait);
+    };
+}
+
+// Data embedded by the index view for the first paint (see Core.bootstrap):
+// the dashboard stats, the first page of each list and the status lookups
+const bootstrapData = JSON.parse(document.getElementById('bootstrap-data')?.textContent || '{}');
+const STATUS_LABELS = bootstrapData.status || {};
+
+// An embedded response, handed out once: later loads go to the API
+function takeBootstrap(key) {
+    const value = bootstrapData[key] || null;
+    delete bootstrapData[key];
+    return value;
+}
+
+// Drop the embedded list pages once something was written: a rental write
+// also changes equipment status, a renamed client shows in the rentals list
+function discardBootstrapPages() {
+    ['clientes', 'equipamentos', 'alugueis'].forEach(takeBootstrap);
+}
+
+// Render the first page of a list from the embedded data, or fetch it
+function loadInitialPage(key, render, load) {
+    const page = takeBootstrap(key);
+    if (page) {
+        render(page);
+    } else {
+        load();
+    }
+}
+
+function statusOptions(kind, selected) {
+    return Object.entries(STATUS_LABELS[kind] || {}).map(([value, label]) =>
+        `<option value="${value}" ${selected === value ? 'selected' : ''}>${label}</option>`
+    ).join('');
+}
+
+// Build a list API URL skipping empty parameters
+function buildListUrl(baseUrl, params = {}) {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+        if (value) {
+            query.set(key, value);
+        }
+    });
+    const queryString = query.toString();
+    return queryString ? `${baseUrl}?${queryString}` : baseUrl;
+}
+
+// Last body and ETag of each GET URL: unchanged data comes back as a bodyless 304
+const etagCache = new Map();
+
+async function fetchJson(url) {
+    const cached = etagCache.get(url);
+    const response = await fetch(url, cached ? { headers: { 'If-None-Match': cached.etag } } : {});
+    if (response.status === 304 && cached) {
+        return cached.data;
+    }
+    if (!response.ok) {
+        throw new Error(`Erro ${response.status} ao carregar ${url}`);
+    }
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag) {
+        etagCache.set(url, { etag: etag, data: data });
+    }
+    return data;
+}
+
+// Fetch one page of a list API: returns { results, next_cursor }
+async function fetchPage(baseUrl, params = {}) {
+    return fetchJson(buildListUrl(baseUrl, params));
+}
+
+// Several API calls in one round trip. Each request is { method, url, body };
+// returns one { id, status, body } per request, in order. Writes share one
+// transaction: if any request fails, none of them is saved
+async function batchRequests(requests) {
+    const response = await fetch('/api/batch/', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(requests)
+    });
+    if (!response.ok) {
+        throw new Error(`Erro ${response.status} ao enviar o lote`);
+    }
+    return (await response.json()).results;
+}
+
+// localStorage slot of each table returned by /api/sync/
+const REPLICA_SLOTS = {
+    clientes: 'customers',
+    equipamentos: 'equipment',
+    alugueis: 'rentals'
+};
+
+// Local replica of clients, equipment and rentals, kept in memory for reads
+// and saved to REPLICA_SLOTS so the next page load only asks for the delta
+let replica = null;
+let replicaCursor = null;
+
+function applySyncDelta(rows, delta) {
+    const byId = new Map(rows.map(row => [row.id, row]));
+    delta.changed.forEach(row => byId.set(row.id, row));
+    delta.deleted.forEach(id => byId.delete(id));
+    return Array.from(byId.values());
+}
+
+// The replica saved by an earlier page load, with the cursor it is current to.
+// syncReplicaStored is '0' when it did not fit: only the cursor was kept then
+function loadStoredReplica() {
+    const cursor = localStorage.getItem('syncCursor');
+    if (!cursor || localStorage.getItem('syncReplicaStored') === '0') {
+        return { cursor: null, rows: null };
+    }
+    const rows = {};
+    Object.entries(REPLICA_SLOTS).forEach(([table, slot]) => {
+        rows[table] = JSON.parse(localStorage.getItem(slot) || '[]');
+    });
+    return { cursor: cursor, rows: rows };
+}
+
+// Save the replica and its cursor. Past the localStorage quota the slots are
+// emptied but the cursor is still saved, flagged so the next load starts over
+function storeReplica() {
+    try {
+        Object.entries(REPLICA_SLOTS).forEach(([table, slot]) => {
+            localStorage.setItem(slot, JSON.stringify(replica[table]));
+        });
+        localStorage.setItem('syncReplicaStored', '1');
+    } catch (error) {
+        if (error.name !== 'QuotaExceededError') {
+            throw error;
+        }
+        console.warn('Local replica exceeds the storage quota, keeping it in memory only');
+        Object.values(REPLICA_SLOTS).forEach(slot => localStorage.setItem(slot, JSON.stringify([])));
+        localStorage.setItem('syncReplicaStored', '0');
+    }
+    localStorage.setItem('syncCursor', replicaCursor);
+}
+
+// Bring the replica up to date: the first call of a page load starts from
+// the saved copy (or a full snapshot), later ones only ask for the delta
+async function syncReplica() {
+    try {
+        let cursor = replicaCursor;
+        let rows = replica;
+        if (rows === null) {
+            ({ cursor, rows } = loadStoredReplica());
+        }
+        rows = rows ? { ...rows } : { clientes: [], equipamentos: [], alugueis: [] };
+        
+        let page;
+        do {
+            page = await fetchJson(buildListUrl('/api/sync/', { since: cursor }));
+            if (page.reset) {
+                // Too far behind the server's deletion history: start over
+                cursor = null;
+                Object.keys(rows).forEach(table => { rows[table] = []; });
+                continue;
+            }
+            Object.keys(rows).forEach(table => {
+                rows[table] = applySyncDelta(rows[table], page[table]);
+            });
+            cursor = page.cursor;
+        } while (page.reset || page.has_more);
+        
+        replica = rows;
+        replicaCursor = cursor;
+        storeReplica();
+    } catch (error) {
+        console.error('Error syncing local replica:', error);
+    }
+}
+
+// A row of the replica by id, or null before the first sync or if not found
+function replicaGet(table, id) {
+    return replica?.[table].find(row => row.id === Number(id)) || null;
+}
+
+// Offline fallback of the autocompletes: a plain substring search of the replica
+function replicaSearch(table, value, fields) {
+    const term = value.toLowerCase();
+    return (replica?.[table] || [])
+        .filter(row => fields.some(field => String(row[field] || '').toLowerCase().includes(term)))
+        .slice(0, 10);
+}
+
+function updateLoadMoreButton(buttonId, nextCursor) {
+    const button = document.getElementById(buttonId);
+    if (button) {
+        button.style.display = nextCursor ? 'inline-flex' : 'none';
+    }
+}
+
 function formatDateTime(date) {
     const dateObj = new Date(date);
     return dateObj.toLocaleDateString('pt-BR') + ' ' + dateObj.toLocaleTimeString('pt-BR', { 
@@ -102,32 +313,29 @@ function formatDateTime(date) {
     });
 }
 
+// Called after every write, which may have made the embedded pages stale
 async function updateDashboardStats() {
+    discardBootstrapPages();
     try {
-        const response = await fetch('/api/dashboard/stats/');
-        if (!response.ok) {
-            console.error('Error fetching dashboard stats:', response.status);
-            return;
-        }
-        
-        const stats = await response.json();
-        
-        // Update statistics cards
-        document.getElementById('active-rentals').textContent = stats.active_rentals;
-        document.getElementById('monthly-revenue').textContent = formatCurrency(parseFloat(stats.monthly_revenue));
-        document.getElementById('available-equipment').textContent = stats.available_equipment;
-        
-        // Update recent rentals
-        updateRecentRentals(stats.recent_rentals);
-        
-        // Update equipment stats
-        updateEquipmentStats(stats.equipment_stats);
-        
+        renderDashboardStats(await fetchJson('/api/dashboard/stats/'));
     } catch (error) {
         console.error('Error updating dashboard stats:', error);
     }
 }
 
+function renderDashboardStats(stats) {
+    // Update statistics cards
+    document.getElementById('active-rentals').textContent = stats.active_rentals;
+    document.getElementById('monthly-revenue').textContent = formatCurrency(parseFloat(stats.monthly_revenue));
+    document.getElementById('available-equipment').textContent = stats.available_equipment;
+    
+    // Update recent rentals
+    updateRecentRentals(stats.recent_rentals);
+    
+    // Update equipment stats
+    updateEquipmentStats(stats.equipment_stats);
+}
+
 function updateRecentRentals(recentRentals) {
     const container = document.querySelector('#dashboard-tab .card:first-of-type .card-body');
     
@@ -215,65 +423,26 @@ function getStatusClass(status) {
     return statusMap[status] || 'secondary';
 }
 
-// Check for expired rentals and close them automatically
+// Rentals are closed on the server by `manage.py expire_rentals`; the browser
+// only asks what was closed since the last run it has seen
 async function checkExpiredRentals() {
     try {
-        // Option 1: Use the dedicated backend endpoint (more efficient)
-        const response = await fetch('/api/alugueis/check-expired/', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            }
-        });
-        
-        if (response.ok) {
-            const result = await response.json();
-            if (result.closed_count > 0) {
-                showNotification(`${result.closed_count} aluguel(éis) foram fechados automaticamente por data final atingida`, 'info');
-                // Refresh the rentals table if we're on the rentals tab
-                if (document.querySelector('[data-tab="rentals"]').classList.contains('active')) {
-                    loadRentals();
-                }
-                updateDashboardStats();
-            }
-        } else {
-            // Fallback to frontend verification if backend endpoint fails
-            await checkExpiredRentalsFrontend();
+        const lastSeenRun = localStorage.getItem('expiryLastRun');
+        const url = buildListUrl('/api/alugueis/check-expired/', { since: lastSeenRun });
+        const response = await fetch(url);
+        if (!response.ok) {
+            console.error('Erro ao verificar aluguéis expirados:', response.status);
+            return;
         }
-    } catch (error) {
-        console.error('Erro ao verificar aluguéis expirados:', error);
-        // Fallback to frontend verification
-        await checkExpiredRentalsFrontend();
-    }
-}
-
-// Fallback frontend verification method
-async function checkExpiredRentalsFrontend() {
-    try {
-        const response = await fetch('/api/alugueis/');
-        if (!response.ok) return;
         
-        const rentals = await response.json();
-        const now = new Date();
-        let closedCount = 0;
-        
-        for (const rental of rentals) {
-            // Check if rental has end date and is past due and still active
-            if (rental.data_fim && 
-                (rental.status === 'aberto' || rental.status === 'em_andamento')) {
-                
-                const endDate = new Date(rental.data_fim);
-                
-                // If current time is past the end date, close the rental
-                if (now >= endDate) {
-                    await closeRentalAutomatically(rental.id);
-                    closedCount++;
-                }
-            }
+        const result = await response.json();
+        if (result.last_run) {
+            localStorage.setItem('expiryLastRun', result.last_run);
         }
         
-        if (closedCount > 0) {
-            showNotification(`${closedCount} aluguel(éis) foram fechados automaticamente por data final atingida`, 'info');
+        // On the first visit just remember the latest run instead of reporting history
+        if (lastSeenRun && result.closed_count > 0) {
+            showNotification(`${result.closed_count} aluguel(éis) foram fechados automaticamente por data final atingida`, 'info');
             // Refresh the rentals table if we're on the rentals tab
             if (document.querySelector('[data-tab="rentals"]').classList.contains('active')) {
                 loadRentals();
@@ -281,28 +450,7 @@ async function checkExpiredRentalsFrontend() {
             updateDashboardStats();
         }
     } catch (error) {
-        console.error('Erro ao verificar aluguéis expirados (frontend):', error);
-    }
-}
-
-// Close rental automatically (without confirmation)
-async function closeRentalAutomatically(rentalId) {
-    try {
-        const response = await fetch(`/api/alugueis/${rentalId}/close/`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                status: 'fechado',
-                auto_closed: true
-            })
-        });
-        
-        return response.ok;
-    } catch (error) {
-        console.error('Erro ao fechar aluguel automaticamente:', error);
-        return false;
+        console.error('Erro ao verificar aluguéis expirados:', error);
     }
 }
 
@@ -499,37 +647,11 @@ async function deleteCustomer(customerId) {
 
 // Search functionality
 let allCustomers = [];
+let customersCursor = null;
+let customerSearchTerm = '';
 
-async function filterCustomers(searchTerm) {
-    if (!searchTerm) {
-        loadCustomers();
-        return;
-    }
-
-    const filteredCustomers = allCustomers.filter(customer => 
-        customer.nome.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        customer.email.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        customer.cpf.includes(searchTerm) ||
-        customer.telefone.includes(searchTerm)
-    );
-    
-    const tbody = document.querySelector('#customers-table tbody');
-    if (filteredCustomers.length === 0) {
-        tbody.innerHTML = `
-            <tr>
-                <td colspan="5">
-                    <div class="empty-state">
-                        <div class="icon">🔍</div>
-                        <h3>Nenhum cliente encontrado</h3>
-                        <p>Tente buscar com outros termos</p>
-                    </div>
-                </td>
-            </tr>
-        `;
-        return;
-    }
-
-    tbody.innerHTML = filteredCustomers.map(customer => `
+function renderCustomerRow(customer) {
+    return `
         <tr>
             <td>${customer.nome}</td>
             <td>${customer.telefone}</td>
@@ -544,53 +666,34 @@ async function filterCustomers(searchTerm) {
                 </button>
             </td>
         </tr>
-    `).join('');
+    `;
 }
 
-document.getElementById('customer-search')?.addEventListener('input', function(e) {
+async function filterCustomers(searchTerm) {
+    customerSearchTerm = searchTerm.trim();
+    loadCustomers();
+}
+
+document.getElementById('customer-search')?.addEventListener('input', debounce(function(e) {
     filterCustomers(e.target.value);
+}));
+
+document.getElementById('customers-load-more')?.addEventListener('click', () => {
+    loadCustomers(true);
 });
 
-// Load customers and store all customers for search
-async function loadCustomers() {
+// Load a page of customers; the search is applied by the server
+async function loadCustomers(append = false) {
     const tbody = document.querySelector('#customers-table tbody');
     
     try {
-        const response = await fetch('/api/clientes/');
-        allCustomers = await response.json();
-        
-        if (allCustomers.length === 0) {
-            tbody.innerHTML = `
-                <tr>
-                    <td colspan="5">
-                        <div class="empty-state">
-                            <div class="icon">👥</div>
-                            <h3>Nenhum cliente cadastrado</h3>
-                            <p>Clique em "Adicionar Cliente" para começar</p>
-                        </div>
-                    </td>
-                </tr>
-            `;
-            return;
-        }
-
-        tbody.innerHTML = allCustomers.map(customer => `
-            <tr>
-                <td>${customer.nome}</td>
-                <td>${customer.telefone}</td>
-                <td>${customer.email}</td>
-                <td>${customer.cpf}</td>
-                <td>
-                    <button class="btn btn-sm btn-outline" onclick="showCustomerModal(${JSON.stringify(customer).replace(/"/g, '&quot;')})">
-                        ✏️ Editar
-                    </button>
-                    <button class="btn btn-sm btn-danger" onclick="deleteCustomer('${customer.id}')">
-                        🗑️ Excluir
-                    </button>
-                </td>
-            </tr>
-        `).join('');
+        const page = await fetchPage('/api/clientes/', {
+            q: customerSearchTerm,
+            cursor: append ? customersCursor : null
+        });
+        renderCustomers(page, append);
     } catch (error) {
+        updateLoadMoreButton('customers-load-more', null);
         tbody.innerHTML = `
             <tr>
                 <td colspan="5">
@@ -606,10 +709,48 @@ async function loadCustomers() {
     }
 }
 
+function renderCustomers(page, append = false) {
+    const tbody = document.querySelector('#customers-table tbody');
+    allCustomers = append ? allCustomers.concat(page.results) : page.results;
+    customersCursor = page.next_cursor;
+    updateLoadMoreButton('customers-load-more', customersCursor);
+    
+    if (allCustomers.length === 0) {
+        tbody.innerHTML = customerSearchTerm ? `
+            <tr>
+                <td colspan="5">
+                    <div class="empty-state">
+                        <div class="icon">🔍</div>
+                        <h3>Nenhum cliente encontrado</h3>
+                        <p>Tente buscar com outros termos</p>
+                    </div>
+                </td>
+            </tr>
+        ` : `
+            <tr>
+                <td colspan="5">
+                    <div class="empty-state">
+                        <div class="icon">👥</div>
+                        <h3>Nenhum cliente cadastrado</h3>
+                        <p>Clique em "Adicionar Cliente" para começar</p>
+                    </div>
+                </td>
+            </tr>
+        `;
+        return;
+    }
+
+    if (append) {
+        tbody.insertAdjacentHTML('beforeend', page.results.map(renderCustomerRow).join(''));
+    } else {
+        tbody.innerHTML = allCustomers.map(renderCustomerRow).join('');
+    }
+}
+
 
 // Load customers when customers tab is activated
 document.querySelector('[data-tab="customers"]').addEventListener('click', function() {
-    setTimeout(loadCustomers, 100);
+    setTimeout(() => loadInitialPage('clientes', renderCustomers, loadCustomers), 100);
 });
 
 // Load customers on page load if we're already on customers tab
@@ -639,10 +780,7 @@ function showEquipmentModal(equipment = null) {
                     <div class="form-group">
                         <label class="form-label">Status</label>
                         <select class="form-control" id="equipment-status">
-                            <option value="disponivel" ${equipment?.status === 'disponivel' ? 'selected' : ''}>Disponível</option>
-                            <option value="alugado" ${equipment?.status === 'alugado' ? 'selected' : ''}>Alugado</option>
-                            <option value="manutencao" ${equipment?.status === 'manutencao' ? 'selected' : ''}>Em Manutenção</option>
-                            <option value="indisponivel" ${equipment?.status === 'indisponivel' ? 'selected' : ''}>Indisponível</option>
+                            ${statusOptions('equipamentos', equipment?.status)}
                         </select>
                     </div>
                     <div class="form-group">
@@ -702,6 +840,8 @@ async function saveEquipment(existingEquipment = null) {
     try {
         let response;
         if (existingEquipment) {
+            // The version it was loaded at: the server answers 409 if it changed since
+            formData.append('version', existingEquipment.version);
             // Update existing equipment
             response = await fetch(`/api/equipamentos/${existingEquipment.id}/`, {
                 method: 'PATCH',
@@ -713,6 +853,10 @@ async function saveEquipment(existingEquipment = null) {
             } else {
                 const error = await response.json();
                 showNotification(error.error || 'Erro ao atualizar equipamento', 'danger');
+                if (response.status === 409) {
+                    loadEquipment();
+                    closeEquipmentModal();
+                }
                 return;
             }
         } else {
@@ -763,58 +907,64 @@ async function deleteEquipment(equipmentId) {
 
 // Equipment search functionality
 let allEquipment = [];
+let equipmentCursor = null;
+let equipmentSearchTerm = '';
+
+// Equipment photo from the resized copies: WebP with a JPEG fallback, the
+// smallest size at 1x and the next one on high-density screens. Until the
+// server has generated them, the image falls back to the original upload.
+function equipmentPhotoHtml(equipment, cssClass, attributes = '') {
+    const fotos = equipment.fotos;
+    if (!fotos) {
+        return `<img src="${equipment.foto}" alt="${equipment.nome}" class="${cssClass}" loading="lazy" ${attributes}>`;
+    }
+    const srcset = extension => `${fotos['64'][extension]} 1x, ${fotos['256'][extension]} 2x`;
+    return `
+        <picture>
+            <source type="image/webp" srcset="${srcset('webp')}">
+            <img src="${fotos['64'].jpg}" srcset="${srcset('jpg')}" alt="${equipment.nome}" class="${cssClass}"
+                 loading="lazy" data-original="${equipment.foto}" onerror="usePhotoOriginal(this)" ${attributes}>
+        </picture>`;
+}
 
-async function filterEquipment(searchTerm) {
-    if (!searchTerm) {
-        loadEquipment();
-        return;
+function usePhotoOriginal(img) {
+    img.onerror = null;
+    if (img.parentElement) {
+        img.parentElement.querySelectorAll('source').forEach(source => source.remove());
     }
+    img.removeAttribute('srcset');
+    img.src = img.dataset.original;
+}
 
-    const filteredEquipment = allEquipment.filter(equipment => 
-        equipment.nome.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        equipment.status.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+function renderEquipmentRow(equipment) {
+    const statusBadge = getStatusBadge(equipment.status);
+    const previewUrl = equipment.fotos ? equipment.fotos['1024'].webp : equipment.foto;
+    const photoHtml = equipment.foto ? 
+        equipmentPhotoHtml(equipment, 'equipment-photo', `onclick="showImagePreview('${previewUrl}', '${equipment.nome}', '${equipment.foto}')"`) :
+        `<div class="no-photo">📷</div>`;
     
-    const tbody = document.querySelector('#equipment-table tbody');
-    if (filteredEquipment.length === 0) {
-        tbody.innerHTML = `
-            <tr>
-                <td colspan="6">
-                    <div class="empty-state">
-                        <div class="icon">🔍</div>
-                        <h3>Nenhum equipamento encontrado</h3>
-                        <p>Tente buscar com outros termos</p>
-                    </div>
-                </td>
-            </tr>
-        `;
-        return;
-    }
+    return `
+        <tr>
+            <td>${photoHtml}</td>
+            <td>${equipment.nome}</td>
+            <td>${statusBadge}</td>
+            <td>${formatCurrency(equipment.valor_diario)}</td>
+            <td>${formatCurrency(equipment.valor_por_hora || (equipment.valor_diario / 24))}</td>
+            <td>
+                <button class="btn btn-sm btn-outline" onclick="showEquipmentModal(${JSON.stringify(equipment).replace(/"/g, '&quot;')})">
+                    ✏️ Editar
+                </button>
+                <button class="btn btn-sm btn-danger" onclick="deleteEquipment('${equipment.id}')">
+                    🗑️ Excluir
+                </button>
+            </td>
+        </tr>
+    `;
+}
 
-    tbody.innerHTML = filteredEquipment.map(equipment => {
-        const statusBadge = getStatusBadge(equipment.status);
-        const photoHtml = equipment.foto ? 
-            `<img src="${equipment.foto}" alt="${equipment.nome}" class="equipment-photo" onclick="showImagePreview('${equipment.foto}', '${equipment.nome}')">` :
-            `<div class="no-photo">📷</div>`;
-        
-        return `
-            <tr>
-                <td>${photoHtml}</td>
-                <td>${equipment.nome}</td>
-                <td>${statusBadge}</td>
-                <td>${formatCurrency(equipment.valor_diario)}</td>
-                <td>${formatCurrency(equipment.valor_por_hora || (equipment.valor_diario / 24))}</td>
-                <td>
-                    <button class="btn btn-sm btn-outline" onclick="showEquipmentModal(${JSON.stringify(equipment).replace(/"/g, '&quot;')})">
-                        ✏️ Editar
-                    </button>
-                    <button class="btn btn-sm btn-danger" onclick="deleteEquipment('${equipment.id}')">
-                        🗑️ Excluir
-                    </button>
-                </td>
-            </tr>
-        `;
-    }).join('');
+async function filterEquipment(searchTerm) {
+    equipmentSearchTerm = searchTerm.trim();
+    loadEquipment();
 }
 
 function getStatusBadge(status) {
@@ -828,58 +978,31 @@ function getStatusBadge(status) {
 }
 
 
-document.getElementById('equipment-search')?.addEventListener('input', function(e) {
+document.getElementById('equipment-search')?.addEventListener('input', debounce(function(e) {
     filterEquipment(e.target.value);
+}));
+
+document.getElementById('equipment-status-filter')?.addEventListener('change', () => {
+    loadEquipment();
 });
 
-// Load equipment and store all equipment for search
-async function loadEquipment() {
+document.getElementById('equipment-load-more')?.addEventListener('click', () => {
+    loadEquipment(true);
+});
+
+// Load a page of equipment; search and status filter are applied by the server
+async function loadEquipment(append = false) {
     const tbody = document.querySelector('#equipment-table tbody');
     
     try {
-        const response = await fetch('/api/equipamentos/');
-        allEquipment = await response.json();
-        
-        if (allEquipment.length === 0) {
-            tbody.innerHTML = `
-                <tr>
-                    <td colspan="6">
-                        <div class="empty-state">
-                            <div class="icon">🔧</div>
-                            <h3>Nenhum equipamento cadastrado</h3>
-                            <p>Clique em "Adicionar Equipamento" para começar</p>
-                        </div>
-                    </td>
-                </tr>
-            `;
-            return;
-        }
-
-        tbody.innerHTML = allEquipment.map(equipment => {
-            const statusBadge = getStatusBadge(equipment.status);
-            const photoHtml = equipment.foto ? 
-                `<img src="${equipment.foto}" alt="${equipment.nome}" class="equipment-photo" onclick="showImagePreview('${equipment.foto}', '${equipment.nome}')">` :
-                `<div class="no-photo">📷</div>`;
-            
-            return `
-                <tr>
-                    <td>${photoHtml}</td>
-                    <td>${equipment.nome}</td>
-                    <td>${statusBadge}</td>
-                    <td>${formatCurrency(equipment.valor_diario)}</td>
-                    <td>${formatCurrency(equipment.valor_por_hora || (equipment.valor_diario / 24))}</td>
-                    <td>
-                        <button class="btn btn-sm btn-outline" onclick="showEquipmentModal(${JSON.stringify(equipment).replace(/"/g, '&quot;')})">
-                            ✏️ Editar
-                        </button>
-                        <button class="btn btn-sm btn-danger" onclick="deleteEquipment('${equipment.id}')">
-                            🗑️ Excluir
-                        </button>
-                    </td>
-                </tr>
-            `;
-        }).join('');
+        const page = await fetchPage('/api/equipamentos/', {
+            q: equipmentSearchTerm,
+            status: document.getElementById('equipment-status-filter')?.value,
+            cursor: append ? equipmentCursor : null
+        });
+        renderEquipment(page, append);
     } catch (error) {
+        updateLoadMoreButton('equipment-load-more', null);
         tbody.innerHTML = `
             <tr>
                 <td colspan="6">
@@ -895,9 +1018,48 @@ async function loadEquipment() {
     }
 }
 
+function renderEquipment(page, append = false) {
+    const tbody = document.querySelector('#equipment-table tbody');
+    const statusFilter = document.getElementById('equipment-status-filter')?.value;
+    allEquipment = append ? allEquipment.concat(page.results) : page.results;
+    equipmentCursor = page.next_cursor;
+    updateLoadMoreButton('equipment-load-more', equipmentCursor);
+    
+    if (allEquipment.length === 0) {
+        tbody.innerHTML = (equipmentSearchTerm || statusFilter) ? `
+            <tr>
+                <td colspan="6">
+                    <div class="empty-state">
+                        <div class="icon">🔍</div>
+                        <h3>Nenhum equipamento encontrado</h3>
+                        <p>Tente buscar com outros termos</p>
+                    </div>
+                </td>
+            </tr>
+        ` : `
+            <tr>
+                <td colspan="6">
+                    <div class="empty-state">
+                        <div class="icon">🔧</div>
+                        <h3>Nenhum equipamento cadastrado</h3>
+                        <p>Clique em "Adicionar Equipamento" para começar</p>
+                    </div>
+                </td>
+            </tr>
+        `;
+        return;
+    }
+
+    if (append) {
+        tbody.insertAdjacentHTML('beforeend', page.results.map(renderEquipmentRow).join(''));
+    } else {
+        tbody.innerHTML = allEquipment.map(renderEquipmentRow).join('');
+    }
+}
+
 // Load equipment when equipment tab is activated
 document.querySelector('[data-tab="equipment"]').addEventListener('click', function() {
-    setTimeout(loadEquipment, 100);
+    setTimeout(() => loadInitialPage('equipamentos', renderEquipment, loadEquipment), 100);
 });
 
 // Load equipment on page load if we're already on equipment tab
@@ -913,153 +1075,137 @@ document.getElementById('add-rental-btn')?.addEventListener('click', () => {
 function showRentalModal(rental = null) {
     const isEdit = rental !== null;
     
-    // Get customers and equipment for the form
-    fetch('/api/clientes/').then(res => res.json()).then(customers => {
-        fetch('/api/equipamentos/').then(res => res.json()).then(equipment => {
-            const availableEquipment = equipment.filter(e => e.status === 'disponivel' || (isEdit && e.id === rental?.equipamento?.id));
-            
-            const modalHtml = `
-                <div class="modal-overlay" id="rental-modal">
-                    <div class="modal-content">
-                        <div class="modal-header">
-                            <h3>${isEdit ? 'Editar Aluguel' : 'Novo Aluguel'}</h3>
-                            <button class="modal-close" onclick="closeRentalModal()">&times;</button>
+    const modalHtml = `
+        <div class="modal-overlay" id="rental-modal">
+            <div class="modal-content">
+                <div class="modal-header">
+                    <h3>${isEdit ? 'Editar Aluguel' : 'Novo Aluguel'}</h3>
+                    <button class="modal-close" onclick="closeRentalModal()">&times;</button>
+                </div>
+                <form id="rental-form" class="modal-body">
+                    <div class="form-group">
+                        <label class="form-label">Cliente *</label>
+                        <div class="autocomplete-container">
+                            <input type="text" class="autocomplete-input" id="rental-customer-input" placeholder="Digite o nome do cliente..." value="${rental?.cliente?.nome || ''}" required>
+                            <input type="hidden" id="rental-customer" value="${rental?.cliente?.id || ''}">
+                            <div class="autocomplete-dropdown" id="customer-dropdown"></div>
                         </div>
-                        <form id="rental-form" class="modal-body">
-                            <div class="form-group">
-                                <label class="form-label">Cliente *</label>
-                                <div class="autocomplete-container">
-                                    <input type="text" class="autocomplete-input" id="rental-customer-input" placeholder="Digite o nome do cliente..." value="${rental?.cliente?.nome || ''}" required>
-                                    <input type="hidden" id="rental-customer" value="${rental?.cliente?.id || ''}">
-                                    <div class="autocomplete-dropdown" id="customer-dropdown"></div>
-                                </div>
-                            </div>
-                            <div class="form-group">
-                                <label class="form-label">Equipamento *</label>
-                                <div class="autocomplete-container">
-                                    <input type="text" class="autocomplete-input" id="rental-equipment-input" placeholder="Digite o nome do equipamento..." value="${rental?.equipamento?.nome || ''}" required>
-                                    <input type="hidden" id="rental-equipment" value="${rental?.equipamento?.id || ''}">
-                                    <div class="autocomplete-dropdown" id="equipment-dropdown"></div>
-                                </div>
-                            </div>
-                            <div class="form-row">
-                                <div class="form-group">
-                                    <label class="form-label">Data/Hora Início *</label>
-                                    <div class="datetime-input-group">
-                                        <input type="datetime-local" class="form-control" id="rental-start" value="${rental?.data_inicio ? new Date(rental.data_inicio).toISOString().slice(0, 16) : ''}" required>
-                                        <button type="button" class="datetime-now-btn" onclick="setCurrentDateTime('rental-start')">Agora</button>
-                                    </div>
-                                </div>
-                                <div class="form-group">
-                                    <label class="form-label">Data/Hora Fim</label>
-                                    <div class="datetime-input-group">
-                                        <input type="datetime-local" class="form-control" id="rental-end" value="${rental?.data_fim ? new Date(rental.data_fim).toISOString().slice(0, 16) : ''}">
-                                        <button type="button" class="datetime-now-btn" onclick="setCurrentDateTime('rental-end')">Agora</button>
-                                    </div>
-                                </div>
-                            </div>
-                            <div class="form-row">
-                                <div class="form-group">
-                                    <label class="form-label">Valor Total (R$)</label>
-                                    <input type="number" class="form-control" id="rental-total" step="0.01" min="0" value="${rental?.valor_total || ''}" placeholder="Calculado automaticamente">
-                                </div>
-                                <div class="form-group">
-                                    <label class="form-label">Status</label>
-                                    <select class="form-control" id="rental-status">
-                                        <option value="aberto" ${rental?.status === 'aberto' ? 'selected' : ''}>Aberto</option>
-                                        <option value="em_andamento" ${rental?.status === 'em_andamento' ? 'selected' : ''}>Em Andamento</option>
-                                        <option value="fechado" ${rental?.status === 'fechado' ? 'selected' : ''}>Fechado</option>
-                                        <option value="cancelado" ${rental?.status === 'cancelado' ? 'selected' : ''}>Cancelado</option>
-                                    </select>
-                                </div>
-                            </div>
-                            <div class="form-group">
-                                <label class="form-label">Observações</label>
-                                <textarea class="form-control" id="rental-notes" rows="3" placeholder="Observações sobre o aluguel">${rental?.observacoes || ''}</textarea>
+                    </div>
+                    <div class="form-group">
+                        <label class="form-label">Equipamento *</label>
+                        <div class="autocomplete-container">
+                            <input type="text" class="autocomplete-input" id="rental-equipment-input" placeholder="Digite o nome do equipamento..." value="${rental?.equipamento?.nome || ''}" required>
+                            <input type="hidden" id="rental-equipment" value="${rental?.equipamento?.id || ''}">
+                            <div class="autocomplete-dropdown" id="equipment-dropdown"></div>
+                        </div>
+                    </div>
+                    <div class="form-row">
+                        <div class="form-group">
+                            <label class="form-label">Data/Hora Início *</label>
+                            <div class="datetime-input-group">
+                                <input type="datetime-local" class="form-control" id="rental-start" value="${rental?.data_inicio ? new Date(rental.data_inicio).toISOString().slice(0, 16) : ''}" required>
+                                <button type="button" class="datetime-now-btn" onclick="setCurrentDateTime('rental-start')">Agora</button>
                             </div>
-                            <div class="modal-footer">
-                                <button type="button" class="btn btn-secondary" onclick="closeRentalModal()">Cancelar</button>
-                                <button type="submit" class="btn btn-primary">${isEdit ? 'Atualizar' : 'Salvar'}</button>
+                        </div>
+                        <div class="form-group">
+                            <label class="form-label">Data/Hora Fim</label>
+                            <div class="datetime-input-group">
+                                <input type="datetime-local" class="form-control" id="rental-end" value="${rental?.data_fim ? new Date(rental.data_fim).toISOString().slice(0, 16) : ''}">
+                                <button type="button" class="datetime-now-btn" onclick="setCurrentDateTime('rental-end')">Agora</button>
                             </div>
-                        </form>
+                        </div>
                     </div>
-                </div>
-            `;
-            
-            document.body.insertAdjacentHTML('beforeend', modalHtml);
-            
-            // Initialize autocomplete for customers and equipment
-            setupCustomerAutocomplete(customers);
-            setupEquipmentAutocomplete(availableEquipment);
-            
-            // Set daily rate for existing rental
-            if (rental && rental.equipamento) {
-                const equipmentHiddenInput = document.getElementById('rental-equipment');
-                const selectedEquipment = availableEquipment.find(e => e.id === rental.equipamento.id);
-                if (selectedEquipment) {
-                    equipmentHiddenInput.dataset.dailyRate = selectedEquipment.valor_diario;
-                }
-            }
-            
-            // Add event listener to form
-            document.getElementById('rental-form').addEventListener('submit', function(e) {
-                e.preventDefault();
-                saveRental(rental);
-            });
+                    <div class="form-row">
+                        <div class="form-group">
+                            <label class="form-label">Valor Total (R$)</label>
+                            <input type="number" class="form-control" id="rental-total" step="0.01" min="0" value="${rental?.valor_total || ''}" placeholder="Calculado automaticamente">
+                        </div>
+                        <div class="form-group">
+                            <label class="form-label">Status</label>
+                            <select class="form-control" id="rental-status">
+                                ${statusOptions('alugueis', rental?.status)}
+                            </select>
+                        </div>
+                    </div>
+                    <div class="form-group">
+                        <label class="form-label">Observações</label>
+                        <textarea class="form-control" id="rental-notes" rows="3" placeholder="Observações sobre o aluguel">${rental?.observacoes || ''}</textarea>
+                    </div>
+                    <div class="modal-footer">
+                        <button type="button" class="btn btn-secondary" onclick="closeRentalModal()">Cancelar</button>
+                        <button type="submit" class="btn btn-primary">${isEdit ? 'Atualizar' : 'Salvar'}</button>
+                    </div>
+                </form>
+            </div>
+        </div>
+    `;
+    
+    document.body.insertAdjacentHTML('beforeend', modalHtml);
+    
+    // Autocompletes query the lookup APIs as the user types
+    setupCustomerAutocomplete();
+    setupEquipmentAutocomplete(isEdit ? rental?.equipamento?.id : null);
+    
+    // Add event listener to form
+    document.getElementById('rental-form').addEventListener('submit', function(e) {
+        e.preventDefault();
+        saveRental(rental);
+    });
 
-            // Auto-calculate total when dates change
-            const startInput = document.getElementById('rental-start');
-            const endInput = document.getElementById('rental-end');
-            const equipmentHiddenInput = document.getElementById('rental-equipment');
-            const totalInput = document.getElementById('rental-total');
+    // Auto-calculate total when dates change
+    const startInput = document.getElementById('rental-start');
+    const endInput = document.getElementById('rental-end');
+    const equipmentHiddenInput = document.getElementById('rental-equipment');
+    const totalInput = document.getElementById('rental-total');
 
-            function calculateTotal() {
-                const start = startInput.value;
-                const end = endInput.value;
-                const dailyRate = parseFloat(equipmentHiddenInput.dataset.dailyRate);
-                
-                console.log('Calculate Total - Start:', start, 'End:', end, 'Daily Rate:', dailyRate);
-                
-                if (start && end && dailyRate && !isNaN(dailyRate)) {
-                    const startDate = new Date(start);
-                    const endDate = new Date(end);
-                    const hours = (endDate - startDate) / (1000 * 60 * 60);
-                    
-                    console.log('Hours difference:', hours);
-                    
-                    if (hours > 0) {
-                        const hourlyRate = dailyRate / 24;
-                        const total = hours * hourlyRate;
-                        totalInput.value = total.toFixed(2);
-                        console.log('New total calculated:', total.toFixed(2));
-                    } else {
-                        totalInput.value = '';
-                    }
-                } else {
-                    console.log('Missing data for calculation');
-                }
+    function calculateTotal() {
+        const start = startInput.value;
+        const end = endInput.value;
+        const dailyRate = parseFloat(equipmentHiddenInput.dataset.dailyRate);
+        
+        console.log('Calculate Total - Start:', start, 'End:', end, 'Daily Rate:', dailyRate);
+        
+        if (start && end && dailyRate && !isNaN(dailyRate)) {
+            const startDate = new Date(start);
+            const endDate = new Date(end);
+            const hours = (endDate - startDate) / (1000 * 60 * 60);
+            
+            console.log('Hours difference:', hours);
+            
+            if (hours > 0) {
+                const hourlyRate = dailyRate / 24;
+                const total = hours * hourlyRate;
+                totalInput.value = total.toFixed(2);
+                console.log('New total calculated:', total.toFixed(2));
+            } else {
+                totalInput.value = '';
             }
+        } else {
+            console.log('Missing data for calculation');
+        }
+    }
 
-            // Add event listeners for automatic calculation
-            startInput.addEventListener('change', calculateTotal);
-            startInput.addEventListener('input', calculateTotal);
-            endInput.addEventListener('change', calculateTotal);
-            endInput.addEventListener('input', calculateTotal);
-            
-            // Initial calculation for existing rentals
-            setTimeout(() => {
-                if (rental && equipmentHiddenInput.dataset.dailyRate && startInput.value) {
+    // Add event listeners for automatic calculation
+    startInput.addEventListener('change', calculateTotal);
+    startInput.addEventListener('input', calculateTotal);
+    endInput.addEventListener('change', calculateTotal);
+    endInput.addEventListener('input', calculateTotal);
+    
+    // Existing rentals: load the equipment's daily rate, then recalculate
+    if (rental && rental.equipamento) {
+        const replicaEquipment = replicaGet('equipamentos', rental.equipamento.id);
+        (replicaEquipment ? Promise.resolve(replicaEquipment) : fetchJson(`/api/equipamentos/${rental.equipamento.id}/`))
+            .then(selectedEquipment => {
+                equipmentHiddenInput.dataset.dailyRate = selectedEquipment.valor_diario;
+                if (startInput.value) {
                     calculateTotal();
                 }
-            }, 100);
-        }).catch(error => {
-            console.error('Error loading equipment:', error);
-            showNotification('Erro ao carregar equipamentos', 'danger');
-        });
-    }).catch(error => {
-        console.error('Error loading customers:', error);
-        showNotification('Erro ao carregar clientes', 'danger');
-    });
+            })
+            .catch(error => {
+                console.error('Error loading equipment:', error);
+                showNotification('Erro ao carregar equipamentos', 'danger');
+            });
+    }
 }
 
 function closeRentalModal() {
@@ -1094,46 +1240,35 @@ async function saveRental(existingRental = null) {
     };
 
     try {
-        let response;
         if (existingRental) {
-            // Update existing rental
-            response = await fetch(`/api/alugueis/${existingRental.id}/`, {
-                method: 'PUT',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(rentalData)
-            });
+            // Update existing rental, unless someone else changed it since it was loaded
+            const result = await writeRentalAndRefresh('PUT', `/api/alugueis/${existingRental.id}/`,
+                { ...rentalData, version: existingRental.version });
             
-            if (response.ok) {
+            if (result.status < 400) {
                 showNotification('Aluguel atualizado com sucesso', 'success');
             } else {
-                const error = await response.json();
-                showNotification(error.error || 'Erro ao atualizar aluguel', 'danger');
+                showNotification(result.body.error || 'Erro ao atualizar aluguel', 'danger');
+                // A version conflict (not a booking overlap) means the form is stale
+                if (result.status === 409 && 'version' in result.body) {
+                    loadRentals();
+                    closeRentalModal();
+                }
                 return;
             }
         } else {
             // Add new rental
-            response = await fetch('/api/alugueis/', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(rentalData)
-            });
+            const result = await writeRentalAndRefresh('POST', '/api/alugueis/', rentalData);
             
-            if (response.ok) {
+            if (result.status < 400) {
                 showNotification('Aluguel criado com sucesso', 'success');
             } else {
-                const error = await response.json();
-                showNotification(error.error || 'Erro ao criar aluguel', 'danger');
+                showNotification(result.body.error || 'Erro ao criar aluguel', 'danger');
                 return;
             }
         }
 
-        loadRentals();
         closeRentalModal();
-        updateDashboardStats();
     } catch (error) {
         showNotification('Erro de conexão. Tente novamente.', 'danger');
         console.error('Error:', error);
@@ -1143,14 +1278,10 @@ async function saveRental(existingRental = null) {
 async function deleteRental(rentalId) {
     if (confirm('Tem certeza que deseja excluir este aluguel?')) {
         try {
-            const response = await fetch(`/api/alugueis/${rentalId}/`, {
-                method: 'DELETE'
-            });
+            const result = await writeRentalAndRefresh('DELETE', `/api/alugueis/${rentalId}/`);
             
-            if (response.ok) {
+            if (result.status < 400) {
                 showNotification('Aluguel excluído com sucesso', 'success');
-                loadRentals();
-                updateDashboardStats();
             } else {
                 showNotification('Erro ao excluir aluguel', 'danger');
             }
@@ -1161,39 +1292,42 @@ async function deleteRental(rentalId) {
     }
 }
 
+// Run one rental write and reload the rentals list and the dashboard in the
+// same round trip. Returns the write's { status, body }; when it fails the
+// reloads are not run and nothing is redrawn
+async function writeRentalAndRefresh(method, url, body = null) {
+    const [write, rentals, stats] = await batchRequests([
+        { method: method, url: url, body: body },
+        { method: 'GET', url: buildListUrl('/api/alugueis/', rentalFilters()) },
+        { method: 'GET', url: '/api/dashboard/stats/' }
+    ]);
+    if (write.status < 400) {
+        discardBootstrapPages();
+        renderRentals(rentals.body);
+        renderDashboardStats(stats.body);
+    }
+    return write;
+}
+
 // Quick actions for rentals
-async function closeRental(rentalId) {
+async function closeRental(rentalId, version) {
     if (confirm('Deseja fechar este aluguel? O status será alterado para "Fechado".')) {
         try {
-            // First get the current rental data to check if data_fim exists
-            const getCurrentRental = await fetch(`/api/alugueis/${rentalId}/`);
-            const currentRental = await getCurrentRental.json();
-            
-            // Only set data_fim to now if it's not already set
-            const requestBody = {
-                status: 'fechado'
-            };
-            
-            if (!currentRental.data_fim) {
-                const now = new Date();
-                requestBody.data_fim = now.toISOString();
-            }
-            
-            const response = await fetch(`/api/alugueis/${rentalId}/close/`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(requestBody)
+            // The server sets data_fim to now when the rental has none. The
+            // version is the one listed, so a rental changed since then is
+            // not closed blindly
+            const result = await writeRentalAndRefresh('POST', `/api/alugueis/${rentalId}/close/`, {
+                status: 'fechado',
+                version: version
             });
             
-            if (response.ok) {
+            if (result.status < 400) {
                 showNotification('Aluguel fechado com sucesso', 'success');
-                loadRentals();
-                updateDashboardStats();
             } else {
-                const error = await response.json();
-                showNotification(error.error || 'Erro ao fechar aluguel', 'danger');
+                showNotification(result.body.error || 'Erro ao fechar aluguel', 'danger');
+                if (result.status === 409) {
+                    loadRentals();
+                }
             }
         } catch (error) {
             showNotification('Erro de conexão. Tente novamente.', 'danger');
@@ -1204,51 +1338,29 @@ async function closeRental(rentalId) {
 
 // Rental search functionality
 let allRentals = [];
+let rentalsCursor = null;
+let rentalSearchTerm = '';
 
-async function filterRentals(searchTerm) {
-    if (!searchTerm) {
-        loadRentals();
-        return;
-    }
-
-    const filteredRentals = allRentals.filter(rental => 
-        rental.cliente.nome.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        rental.equipamento.nome.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        rental.status.toLowerCase().includes(searchTerm.toLowerCase())
-    );
+function renderRentalRow(rental) {
+    const statusBadge = getRentalStatusBadge(rental.status);
+    const actionsHtml = getActionButtons(rental);
     
-    const tbody = document.querySelector('#rentals-table tbody');
-    if (filteredRentals.length === 0) {
-        tbody.innerHTML = `
-            <tr>
-                <td colspan="7">
-                    <div class="empty-state">
-                        <div class="icon">🔍</div>
-                        <h3>Nenhum aluguel encontrado</h3>
-                        <p>Tente buscar com outros termos</p>
-                    </div>
-                </td>
-            </tr>
-        `;
-        return;
-    }
+    return `
+        <tr>
+            <td>${rental.cliente.nome}</td>
+            <td>${rental.equipamento.nome}</td>
+            <td>${formatDateTime(rental.data_inicio)}</td>
+            <td>${rental.data_fim ? formatDateTime(rental.data_fim) : 'Em aberto'}</td>
+            <td>${rental.valor_total ? formatCurrency(rental.valor_total) : 'A calcular'}</td>
+            <td>${statusBadge}</td>
+            <td>${actionsHtml}</td>
+        </tr>
+    `;
+}
 
-    tbody.innerHTML = filteredRentals.map(rental => {
-        const statusBadge = getRentalStatusBadge(rental.status);
-        const actionsHtml = getActionButtons(rental);
-        
-        return `
-            <tr>
-                <td>${rental.cliente.nome}</td>
-                <td>${rental.equipamento.nome}</td>
-                <td>${formatDateTime(rental.data_inicio)}</td>
-                <td>${rental.data_fim ? formatDateTime(rental.data_fim) : 'Em aberto'}</td>
-                <td>${rental.valor_total ? formatCurrency(rental.valor_total) : 'A calcular'}</td>
-                <td>${statusBadge}</td>
-                <td>${actionsHtml}</td>
-            </tr>
-        `;
-    }).join('');
+async function filterRentals(searchTerm) {
+    rentalSearchTerm = searchTerm.trim();
+    loadRentals();
 }
 
 function getRentalStatusBadge(status) {
@@ -1270,7 +1382,7 @@ function getActionButtons(rental) {
     
     if (rental.status === 'aberto' || rental.status === 'em_andamento') {
         buttons += `
-            <button class="btn btn-sm btn-success" onclick="closeRental('${rental.id}')">
+            <button class="btn btn-sm btn-success" onclick="closeRental('${rental.id}', ${rental.version})">
                 ✅ Fechar
             </button>
         `;
@@ -1285,50 +1397,41 @@ function getActionButtons(rental) {
     return buttons;
 }
 
-document.getElementById('rental-search')?.addEventListener('input', function(e) {
+document.getElementById('rental-search')?.addEventListener('input', debounce(function(e) {
     filterRentals(e.target.value);
+}));
+
+['rental-status-filter', 'rental-start-filter', 'rental-end-filter'].forEach(id => {
+    document.getElementById(id)?.addEventListener('change', () => {
+        loadRentals();
+    });
+});
+
+document.getElementById('rentals-load-more')?.addEventListener('click', () => {
+    loadRentals(true);
 });
 
-// Load rentals and store all rentals for search
-async function loadRentals() {
+// Load a page of rentals; search, status and date range are applied by the server
+function rentalFilters() {
+    return {
+        q: rentalSearchTerm,
+        status: document.getElementById('rental-status-filter')?.value,
+        start: document.getElementById('rental-start-filter')?.value,
+        end: document.getElementById('rental-end-filter')?.value
+    };
+}
+
+async function loadRentals(append = false) {
     const tbody = document.querySelector('#rentals-table tbody');
     
     try {
-        const response = await fetch('/api/alugueis/');
-        allRentals = await response.json();
-        
-        if (allRentals.length === 0) {
-            tbody.innerHTML = `
-                <tr>
-                    <td colspan="7">
-                        <div class="empty-state">
-                            <div class="icon">📋</div>
-                            <h3>Nenhum aluguel registrado</h3>
-                            <p>Clique em "Novo Aluguel" para começar</p>
-                        </div>
-                    </td>
-                </tr>
-            `;
-            return;
-        }
-
-        tbody.innerHTML = allRentals.map(rental => {
-            const statusBadge = getRentalStatusBadge(rental.status);
-            const actionsHtml = getActionButtons(rental);
-            
-            return `
-                <tr>
-                    <td>${rental.cliente.nome}</td>
-                    <td>${rental.equipamento.nome}</td>
-                    <td>${formatDateTime(rental.data_inicio)}</td>
-                    <td>${rental.data_fim ? formatDateTime(rental.data_fim) : 'Em aberto'}</td>
-                    <td>${rental.valor_total ? formatCurrency(rental.valor_total) : 'A calcular'}</td>
-                    <td>${statusBadge}</td>
-                    <td>${actionsHtml}</td>
-                </tr>
-            `;
-        }).join('');
+        const page = await fetchPage('/api/alugueis/', {
+            ...rentalFilters(),
+            cursor: append ? rentalsCursor : null
+        });
+        renderRentals(page, append);
     } catch (error) {
+        updateLoadMoreButton('rentals-load-more', null);
         tbody.innerHTML = `
             <tr>
                 <td colspan="7">
@@ -1344,9 +1447,48 @@ async function loadRentals() {
     }
 }
 
+function renderRentals(page, append = false) {
+    const tbody = document.querySelector('#rentals-table tbody');
+    const hasFilters = Object.values(rentalFilters()).some(value => value);
+    allRentals = append ? allRentals.concat(page.results) : page.results;
+    rentalsCursor = page.next_cursor;
+    updateLoadMoreButton('rentals-load-more', rentalsCursor);
+    
+    if (allRentals.length === 0) {
+        tbody.innerHTML = hasFilters ? `
+            <tr>
+                <td colspan="7">
+                    <div class="empty-state">
+                        <div class="icon">🔍</div>
+                        <h3>Nenhum aluguel encontrado</h3>
+                        <p>Tente buscar com outros termos</p>
+                    </div>
+                </td>
+            </tr>
+        ` : `
+            <tr>
+                <td colspan="7">
+                    <div class="empty-state">
+                        <div class="icon">📋</div>
+                        <h3>Nenhum aluguel registrado</h3>
+                        <p>Clique em "Novo Aluguel" para começar</p>
+                    </div>
+                </td>
+            </tr>
+        `;
+        return;
+    }
+
+    if (append) {
+        tbody.insertAdjacentHTML('beforeend', page.results.map(renderRentalRow).join(''));
+    } else {
+        tbody.innerHTML = allRentals.map(renderRentalRow).join('');
+    }
+}
+
 // Load rentals when rentals tab is activated
 document.querySelector('[data-tab="rentals"]').addEventListener('click', function() {
-    setTimeout(loadRentals, 100);
+    setTimeout(() => loadInitialPage('alugueis', renderRentals, loadRentals), 100);
 });
 
 // Load rentals on page load if we're already on rentals tab
@@ -1368,30 +1510,46 @@ function setCurrentDateTime(inputId) {
 }
 
 // Customer autocomplete setup
-function setupCustomerAutocomplete(customers) {
+function setupCustomerAutocomplete() {
     const input = document.getElementById('rental-customer-input');
     const hiddenInput = document.getElementById('rental-customer');
     const dropdown = document.getElementById('customer-dropdown');
     
     let selectedIndex = -1;
     let filteredCustomers = [];
+    let lookupSeq = 0;
+    
+    // Server-side prefix search on name or CPF, top matches only
+    const lookupCustomers = debounce(async function(value) {
+        const seq = ++lookupSeq;
+        try {
+            const page = await fetchPage('/api/clientes/lookup/', { q: value });
+            // A newer keystroke already started another lookup
+            if (seq !== lookupSeq) {
+                return;
+            }
+            filteredCustomers = page.results;
+        } catch (error) {
+            console.error('Error looking up customers:', error);
+            if (seq !== lookupSeq) {
+                return;
+            }
+            filteredCustomers = replicaSearch('clientes', value, ['nome', 'cpf']);
+        }
+        showCustomerDropdown(filteredCustomers);
+        selectedIndex = -1;
+    }, 150);
     
     input.addEventListener('input', function() {
-        const value = this.value.toLowerCase();
+        const value = this.value.trim();
         if (value.length === 0) {
+            lookupSeq++;
             dropdown.classList.remove('show');
             hiddenInput.value = '';
             return;
         }
         
-        filteredCustomers = customers.filter(customer => 
-            customer.nome.toLowerCase().includes(value) ||
-            customer.email.toLowerCase().includes(value) ||
-            customer.cpf.includes(value)
-        );
-        
-        showCustomerDropdown(filteredCustomers);
-        selectedIndex = -1;
+        lookupCustomers(value);
     });
     
     input.addEventListener('keydown', function(e) {
@@ -1428,7 +1586,7 @@ function setupCustomerAutocomplete(customers) {
                 <div class="autocomplete-item" data-index="${index}" onclick="selectCustomer(${JSON.stringify(customer).replace(/"/g, '&quot;')})">
                     <div class="autocomplete-item-content">
                         <div class="autocomplete-item-title">${customer.nome}</div>
-                        <div class="autocomplete-item-subtitle">${customer.email} - ${customer.telefone}</div>
+                        <div class="autocomplete-item-subtitle">CPF: ${customer.cpf}</div>
                     </div>
                 </div>
             `).join('');
@@ -1452,29 +1610,49 @@ function setupCustomerAutocomplete(customers) {
 }
 
 // Equipment autocomplete setup
-function setupEquipmentAutocomplete(equipment) {
+// includeId: equipment already on the rental being edited, offered even if not available
+function setupEquipmentAutocomplete(includeId = null) {
     const input = document.getElementById('rental-equipment-input');
     const hiddenInput = document.getElementById('rental-equipment');
     const dropdown = document.getElementById('equipment-dropdown');
     
     let selectedIndex = -1;
     let filteredEquipment = [];
+    let lookupSeq = 0;
+    
+    // Server-side prefix search restricted to available equipment
+    const lookupEquipment = debounce(async function(value) {
+        const seq = ++lookupSeq;
+        try {
+            const page = await fetchPage('/api/equipamentos/lookup/', { q: value, available: 1, include: includeId });
+            // A newer keystroke already started another lookup
+            if (seq !== lookupSeq) {
+                return;
+            }
+            filteredEquipment = page.results;
+        } catch (error) {
+            console.error('Error looking up equipment:', error);
+            if (seq !== lookupSeq) {
+                return;
+            }
+            filteredEquipment = replicaSearch('equipamentos', value, ['nome'])
+                .filter(equip => equip.status === 'disponivel' || equip.id === Number(includeId));
+        }
+        showEquipmentDropdown(filteredEquipment);
+        selectedIndex = -1;
+    }, 150);
     
     input.addEventListener('input', function() {
-        const value = this.value.toLowerCase();
+        const value = this.value.trim();
         if (value.length === 0) {
+            lookupSeq++;
             dropdown.classList.remove('show');
             hiddenInput.value = '';
             hiddenInput.dataset.dailyRate = '';
             return;
         }
         
-        filteredEquipment = equipment.filter(equip => 
-            equip.nome.toLowerCase().includes(value)
-        );
-        
-        showEquipmentDropdown(filteredEquipment);
-        selectedIndex = -1;
+        lookupEquipment(value);
     });
     
     input.addEventListener('keydown', function(e) {
@@ -1509,7 +1687,7 @@ function setupEquipmentAutocomplete(equipment) {
         } else {
             dropdown.innerHTML = equipmentList.map((equip, index) => {
                 const imageHtml = equip.foto ? 
-                    `<img src="${equip.foto}" alt="${equip.nome}" class="equipment-preview">` :
+                    equipmentPhotoHtml(equip, 'equipment-preview') :
                     `<div class="equipment-no-image">🔧</div>`;
                 
                 return `
@@ -1580,11 +1758,14 @@ document.getElementById('clear-data-btn')?.addEventListener('click', () => {
 });
 
 // Image preview functions
-function showImagePreview(imageUrl, equipmentName) {
+function showImagePreview(imageUrl, equipmentName, originalUrl = imageUrl) {
     const modal = document.getElementById('image-preview-modal');
     const img = document.getElementById('image-preview-img');
     const title = document.getElementById('image-preview-title');
     
+    // imageUrl is the 1024px copy, which may not have been generated yet
+    img.dataset.original = originalUrl;
+    img.onerror = () => usePhotoOriginal(img);
     img.src = imageUrl;
     img.alt = equipmentName;
     title.textContent = `Foto do equipamento: ${equipmentName}`;
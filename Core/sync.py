@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Aluguel, Cliente, Equipamento, Exclusao
+from .pagination import InvalidPageParameter, decode_cursor, encode_cursor
+from .serializers import aluguel_serializer, cliente_serializer, equipamento_serializer
+
+# Synced tables, in cursor order: (name in the payload, model, serializer)
+TABLES = [
+    ('clientes', Cliente, cliente_serializer),
+    ('equipamentos', Equipamento, equipamento_serializer),
+    ('alugueis', Aluguel, aluguel_serializer),
+]
+
+DEFAULT_SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 2000
+
+# Only rows stamped at least this long ago are returned. updated_at is set
+# before the write commits (the expiry job stamps a whole batch up front), so
+# rows newer than this may still become visible with an older timestamp.
+SETTLE_TIME = timedelta(seconds=5)
+
+
+def _position(value):
+    """(updated_at, id) keyset position from its JSON form [iso, id]"""
+    if value is None:
+        return None
+    try:
+        stamp, last_id = value
+        return datetime.fromisoformat(stamp), int(last_id)
+    except (TypeError, ValueError):
+        raise InvalidPageParameter("Cursor inválido")
+
+
+def _encode_position(position):
+    if position is None:
+        return None
+    stamp, last_id = position
+    return [stamp.isoformat(), last_id]
+
+
+def _after(position, stamp_field):
+    if position is None:
+        return Q()
+    stamp, last_id = position
+    return Q(**{f'{stamp_field}__gt': stamp}) | Q(**{stamp_field: stamp, 'id__gt': last_id})
+
+
+def parse_cursor(cursor):
+    """
+    Per-table positions of a sync cursor: one (updated_at, id) for each table
+    in TABLES and a last one for the tombstones. No cursor means a full sync.
+    """
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    if len(values) != len(TABLES) + 1:
+        raise InvalidPageParameter("Cursor inválido")
+    return [_position(value) for value in values]
+
+
+def tombstone_cutoff(now=None):
+    return (now or timezone.now()) - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+
+
+def changes(cursor=None, limit=DEFAULT_SYNC_LIMIT, now=None):
+    """
+    Rows created or updated, and ids deleted, after ``cursor``.
+
+    Each table is read in (updated_at, id) order from its own position, up
+    to ``limit`` rows, so a sync never skips or repeats a row. When any table
+    has more, ``has_more`` is set and the caller asks again with the new
+    cursor. A cursor older than the tombstone retention yields ``reset``: the
+    replica must be discarded and rebuilt from a full sync.
+    """
+    now = now or timezone.now()
+    horizon = now - SETTLE_TIME
+    positions = parse_cursor(cursor)
+    if positions is None:
+        # Deletions before a full snapshot are already reflected in it
+        positions = [None] * len(TABLES) + [(horizon, 0)]
+
+    tombstone_position = positions[-1]
+    if tombstone_position and tombstone_position[0] < tombstone_cutoff(now):
+        return {'reset': True}
+
+    payload = {'reset': False, 'has_more': False}
+    next_positions = []
+    for (name, model, serializer), position in zip(TABLES, positions):
+        compiled = serializer.compile()
+        rows = list(
+            compiled.values(
+                model.objects.filter(updated_at__lte=horizon).filter(_after(position, 'updated_at')),
+                'updated_at', 'id',
+            ).order_by('updated_at', 'id')[:limit + 1]
+        )
+        if len(rows) > limit:
+            rows = rows[:limit]
+            payload['has_more'] = True
+        if rows:
+            position = (rows[-1]['updated_at'], rows[-1]['id'])
+        next_positions.append(position)
+        payload[name] = {'changed': compiled.render_many(rows), 'deleted': []}
+
+    tombstones = list(
+        Exclusao.objects
+        .filter(excluido_em__lte=horizon)
+        .filter(_after(tombstone_position, 'excluido_em'))
+        .order_by('excluido_em', 'id')
+        .values_list('excluido_em', 'id', 'tabela', 'objeto_id')[:limit + 1]
+    )
+    caught_up = len(tombstones) <= limit
+    tombstones = tombstones[:limit]
+    for _, _, tabela, objeto_id in tombstones:
+        if tabela in payload:
+            payload[tabela]['deleted'].append(objeto_id)
+    if not caught_up:
+        payload['has_more'] = True
+        tombstone_position = tombstones[-1][:2]
+    elif not tombstones or tombstones[-1][0] < horizon:
+        # Everything up to the horizon is consumed: move there, so a replica
+        # that simply saw no deletions does not age past the retention
+        tombstone_position = (horizon, 0)
+    else:
+        tombstone_position = tombstones[-1][:2]
+    next_positions.append(tombstone_position)
+
+    payload['cursor'] = encode_cursor([_encode_position(position) for position in next_positions])
+    return payload
+
+
+def prune_tombstones(now=None):
+    """Drop tombstones past the retention; older cursors get a reset instead"""
+    return Exclusao.objects.filter(excluido_em__lt=tombstone_cutoff(now)).delete()[0]
@@ -1,3 +1,379 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.utils import timezone
+
+from . import aggregates, renditions
+from .expiry import LOCK_NAME, close_expired_rentals, run_expiry
+from .locks import single_flight
+from .models import Agregado, Aluguel, Cliente, Equipamento, ExecucaoExpiracao
+from .serializers import cliente_serializer
+
+
+def make_cliente(n=1):
+    return Cliente.objects.create(
+        nome=f'Cliente {n}', cpf=f'{n:011d}', email=f'cliente{n}@example.com',
+        telefone='11999999999', endereco='Rua A, 1', data_nascimento='1990-01-01',
+    )
+
+
+def make_equipamento(nome='Furadeira', status='disponivel'):
+    return Equipamento.objects.create(nome=nome, valor_diario=Decimal('48.00'), status=status)
+
+
+def make_aluguel(cliente, equipamento, inicio, fim=None, status='aberto', **extra):
+    return Aluguel.objects.create(
+        cliente=cliente, equipamento=equipamento, data_inicio=inicio, data_fim=fim, status=status, **extra
+    )
+
+
+def encode(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'senha')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.now = timezone.now().replace(microsecond=0)
+
+    def post_json(self, url, data, method='post'):
+        return getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+
+
+class CursorPaginationTests(ApiTestCase):
+    def test_pages_cover_every_row_once(self):
+        cliente = make_cliente()
+        equipamento = make_equipamento()
+        for day in range(7):
+            make_aluguel(cliente, equipamento, self.now + timedelta(days=2 * day),
+                         self.now + timedelta(days=2 * day + 1), status='fechado')
+
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+            page = self.client.get('/api/alugueis/', params).json()
+            seen += [row['id'] for row in page['results']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(Aluguel.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_tampered_cursors_are_rejected(self):
+        cases = [
+            ('/api/clientes/', 'não é base64!'),
+            ('/api/clientes/', encode({'id': 1})),
+            ('/api/clientes/', encode(['abc'])),
+            ('/api/clientes/', encode([1, 2])),
+            ('/api/clientes/', encode([None])),
+            ('/api/alugueis/', encode([{'a': 1}])),
+            ('/api/alugueis/', encode(['notadate', 3])),
+            ('/api/alugueis/', encode([self.now.isoformat(), 'x'])),
+        ]
+        for url, cursor in cases:
+            with self.subTest(url=url, cursor=cursor):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'Cursor inválido')
+
+
+class FieldsetTests(ApiTestCase):
+    def test_spellings_of_a_selection_share_one_compiled_serializer(self):
+        make_cliente()
+        before = len(cliente_serializer._compiled)
+        for fields in ('nome,id', 'id,nome', ' nome , id,nome,'):
+            with self.subTest(fields=fields):
+                response = self.client.get('/api/clientes/', {'fields': fields})
+                self.assertEqual(list(response.json()['results'][0]), ['id', 'nome'])
+        self.assertLessEqual(len(cliente_serializer._compiled), before + 1)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/clientes/', {'fields': 'id,senha'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Campo(s) inválido(s): senha')
+
+
+class ExpiryTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cliente = make_cliente()
+        self.equipamento = make_equipamento(status='alugado')
+        self.expired = make_aluguel(self.cliente, self.equipamento,
+                                    self.now - timedelta(days=2), self.now - timedelta(days=1))
+
+    def test_closes_expired_rentals_and_frees_equipment(self):
+        self.assertEqual(close_expired_rentals(self.now), 1)
+        self.expired.refresh_from_db()
+        self.equipamento.refresh_from_db()
+        self.assertEqual(self.expired.status, 'fechado')
+        self.assertEqual(self.expired.valor_total, Decimal('48.00'))
+        self.assertEqual(self.expired.version, 2)
+        self.assertEqual(self.equipamento.status, 'disponivel')
+        self.assertEqual(close_expired_rentals(self.now), 0)
+
+    def test_failure_rolls_back_every_change(self):
+        with mock.patch.object(aggregates, 'apply_deltas', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                close_expired_rentals(self.now)
+        self.expired.refresh_from_db()
+        self.equipamento.refresh_from_db()
+        self.assertEqual(self.expired.status, 'aberto')
+        self.assertEqual(self.equipamento.status, 'alugado')
+
+    def test_concurrent_run_is_skipped(self):
+        with override_settings(LOCK_DIR=tempfile.mkdtemp()):
+            with single_flight(LOCK_NAME) as acquired:
+                self.assertTrue(acquired)
+                self.assertIsNone(run_expiry(self.now))
+                response = self.client.post('/api/alugueis/check-expired/')
+                self.assertEqual(response.status_code, 409)
+            self.assertEqual(ExecucaoExpiracao.objects.count(), 0)
+
+            execucao = run_expiry(self.now)
+        self.assertEqual(execucao.fechados, 1)
+
+
+class AggregateTests(ApiTestCase):
+    def assertMatchesRebuild(self):
+        expected = aggregates.dashboard_counters(self.now)
+        aggregates.rebuild()
+        self.assertEqual(aggregates.dashboard_counters(self.now), expected)
+
+    def test_counters_follow_writes(self):
+        cliente = make_cliente()
+        equipamento = make_equipamento()
+        aggregates.dashboard_counters(self.now)
+
+        response = self.post_json('/api/alugueis/', {
+            'cliente': cliente.id, 'equipamento': equipamento.id,
+            'data_inicio': self.now.isoformat(), 'data_fim': (self.now + timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 201)
+        counters = aggregates.dashboard_counters(self.now)
+        self.assertEqual(counters['active_rentals'], 1)
+        self.assertEqual(counters['equipment']['alugado'], 1)
+        self.assertMatchesRebuild()
+
+        aluguel = response.json()
+        self.post_json(f"/api/alugueis/{aluguel['id']}/close/", {'version': aluguel['version']}, method='post')
+        self.assertMatchesRebuild()
+
+        self.client.delete(f"/api/alugueis/{aluguel['id']}/")
+        self.assertMatchesRebuild()
+
+    def test_first_write_on_unbuilt_counters_rebuilds(self):
+        # A database from before the counters: data, but no Agregado rows
+        make_equipamento('Serra', status='manutencao')
+        Agregado.objects.all().delete()
+
+        make_equipamento('Lixadeira')
+        counters = aggregates.dashboard_counters(self.now)
+        self.assertEqual(counters['equipment']['manutencao'], 1)
+        self.assertEqual(counters['equipment']['disponivel'], 1)
+
+
+class OverlapTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cliente = make_cliente()
+        self.equipamento = make_equipamento()
+        for day in range(0, 10, 2):
+            make_aluguel(self.cliente, self.equipamento, self.now + timedelta(days=day),
+                         self.now + timedelta(days=day + 1), status='fechado')
+
+    def book(self, inicio, fim=None, **extra):
+        return self.post_json('/api/alugueis/', {
+            'cliente': self.cliente.id, 'equipamento': self.equipamento.id,
+            'data_inicio': inicio.isoformat(), 'data_fim': fim.isoformat() if fim else None, **extra,
+        })
+
+    def test_overlapping_booking_is_rejected(self):
+        response = self.book(self.now + timedelta(days=4, hours=12), self.now + timedelta(days=5, hours=12))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['conflito']['data_inicio'], (self.now + timedelta(days=4)).isoformat())
+
+    def test_booking_in_a_gap_is_accepted(self):
+        response = self.book(self.now + timedelta(days=5), self.now + timedelta(days=6))
+        self.assertEqual(response.status_code, 201)
+
+    def test_open_ended_booking_blocks_later_ones(self):
+        self.assertEqual(self.book(self.now + timedelta(days=11)).status_code, 201)
+        response = self.book(self.now + timedelta(days=30), self.now + timedelta(days=31))
+        self.assertEqual(response.status_code, 409)
+
+    def test_close_cannot_extend_into_the_next_booking(self):
+        aluguel = make_aluguel(self.cliente, self.equipamento, self.now + timedelta(days=10),
+                               self.now + timedelta(days=11))
+        make_aluguel(self.cliente, self.equipamento, self.now + timedelta(days=12),
+                     self.now + timedelta(days=13), status='fechado')
+        url = f'/api/alugueis/{aluguel.id}/close/'
+
+        response = self.post_json(url, {'version': 1, 'data_fim': (self.now + timedelta(days=15)).isoformat()})
+        self.assertEqual(response.status_code, 409)
+        aluguel.refresh_from_db()
+        self.assertEqual(aluguel.status, 'aberto')
+        self.assertEqual(aluguel.data_fim, self.now + timedelta(days=11))
+
+        # The gap after the next booking is still free, so it cannot be double booked
+        response = self.book(self.now + timedelta(days=13, hours=12), self.now + timedelta(days=14))
+        self.assertEqual(response.status_code, 201)
+
+        response = self.post_json(url, {'version': 1, 'data_fim': (self.now + timedelta(days=11, hours=12)).isoformat()})
+        self.assertEqual(response.status_code, 200)
+
+    def test_cancelled_booking_does_not_block(self):
+        response = self.book(self.now + timedelta(hours=2), self.now + timedelta(hours=3), status='cancelado')
+        self.assertEqual(response.status_code, 201)
+
+
+class VersionConflictTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.equipamento = make_equipamento()
+        self.aluguel = make_aluguel(make_cliente(), self.equipamento, self.now, self.now + timedelta(days=1))
+
+    def test_stale_equipment_update_is_rejected(self):
+        url = f'/api/equipamentos/{self.equipamento.id}/'
+        first = self.post_json(url, {'nome': 'Furadeira nova', 'version': 1}, method='patch')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['version'], 2)
+
+        stale = self.post_json(url, {'nome': 'Furadeira velha', 'version': 1}, method='patch')
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.json()['version'], 2)
+        self.equipamento.refresh_from_db()
+        self.assertEqual(self.equipamento.nome, 'Furadeira nova')
+
+    def test_stale_close_is_rejected(self):
+        self.post_json(f'/api/alugueis/{self.aluguel.id}/', {'observacoes': 'editado', 'version': 1}, method='put')
+        response = self.post_json(f'/api/alugueis/{self.aluguel.id}/close/', {'version': 1})
+        self.assertEqual(response.status_code, 409)
+        self.aluguel.refresh_from_db()
+        self.assertEqual(self.aluguel.status, 'aberto')
+
+
+class BatchTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cliente = make_cliente()
+        self.equipamento = make_equipamento()
+        self.aluguel = make_aluguel(self.cliente, self.equipamento, self.now, self.now + timedelta(days=1))
+
+    def batch(self, items):
+        return self.post_json('/api/batch/', items)
+
+    def test_reads_see_earlier_writes(self):
+        response = self.batch([
+            {'method': 'PUT', 'url': f'/api/alugueis/{self.aluguel.id}/',
+             'body': {'observacoes': 'lote', 'version': 1}},
+            {'url': f'/api/alugueis/{self.aluguel.id}/'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertTrue(payload['committed'])
+        self.assertEqual([result['status'] for result in payload['results']], [200, 200])
+        self.assertEqual(payload['results'][1]['body']['observacoes'], 'lote')
+
+    def test_failing_item_rolls_back_the_batch(self):
+        response = self.batch([
+            {'method': 'PUT', 'url': f'/api/alugueis/{self.aluguel.id}/',
+             'body': {'observacoes': 'desfeito', 'version': 1}},
+            {'method': 'POST', 'url': f'/api/alugueis/{self.aluguel.id}/close/', 'body': {'version': 1}},
+            {'url': '/api/alugueis/'},
+        ])
+        payload = response.json()
+        self.assertFalse(payload['committed'])
+        self.assertEqual([result['status'] for result in payload['results']], [424, 409, 424])
+        self.aluguel.refresh_from_db()
+        self.assertIsNone(self.aluguel.observacoes)
+        self.assertEqual(self.aluguel.version, 1)
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_rolled_back_delete_keeps_the_photo(self):
+        self.equipamento.foto.save('foto.png', ContentFile(b'png'))
+        storage = self.equipamento.foto.storage
+        rendition = storage.save(renditions.rendition_name(self.equipamento.foto.name, 256, 'webp'), ContentFile(b'webp'))
+        url = f'/api/equipamentos/{self.equipamento.id}/'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.batch([{'method': 'DELETE', 'url': url}, {'method': 'POST', 'url': '/api/alugueis/', 'body': {}}])
+        payload = response.json()
+        self.assertFalse(payload['committed'])
+        self.assertEqual([result['status'] for result in payload['results']], [424, 400])
+        self.assertTrue(Equipamento.objects.filter(id=self.equipamento.id).exists())
+        self.assertTrue(os.path.exists(self.equipamento.foto.path))
+        self.assertTrue(storage.exists(rendition))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(url)
+        self.assertFalse(os.path.exists(self.equipamento.foto.path))
+        self.assertFalse(storage.exists(rendition))
+
+    def test_invalid_batches_are_rejected(self):
+        for items in ([], {'url': '/api/clientes/'}, [{'url': '/admin/'}], [{'url': '/api/batch/'}],
+                      [{'method': 'TRACE', 'url': '/api/clientes/'}], [{'url': '/api/clientes/'}] * 26):
+            with self.subTest(items=items):
+                self.assertEqual(self.batch(items).status_code, 400)
+
+
+class ImportTests(ApiTestCase):
+    def post_csv(self, body):
+        return self.client.post('/api/import/equipamentos/', body, content_type='text/csv')
+
+    def test_unreadable_line_keeps_the_rows_before_it(self):
+        body = 'nome,status,valor_diario\nFuradeira,disponivel,48\nSerra,disponivel,30\n'.encode() + b'Lixadeira \xff,disponivel,20\n'
+        response = self.post_csv(body)
+        self.assertEqual(response.status_code, 400)
+        payload = response.json()
+        self.assertEqual((payload['created'], payload['line']), (2, 4))
+        self.assertIn('UTF-8', payload['error'])
+        self.assertEqual(Equipamento.objects.count(), 2)
+
+    @mock.patch('Core.imports.MAX_REPORTED_ERRORS', 2)
+    def test_reported_errors_are_capped(self):
+        response = self.post_csv('nome,status,valor_diario\n' + 'Serra,disponivel,abc\n' * 3)
+        payload = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(payload['failed'], 3)
+        self.assertEqual([error['line'] for error in payload['errors']], [2, 3])
+        self.assertTrue(payload['errors_truncated'])
+
+
+@override_settings(EQUIPAMENTO_FOTO_MAX_SIZE=1024, DATA_UPLOAD_MAX_MEMORY_SIZE=1024)
+class UploadLimitTests(ApiTestCase):
+    def upload(self, size, method='post', url='/api/equipamentos/'):
+        foto = SimpleUploadedFile('foto.png', b'\0' * size, content_type='image/png')
+        data = {'nome': 'Betoneira', 'valor_diario': '90.00', 'foto': foto}
+        if method == 'post':
+            return self.client.post(url, data)
+        return self.client.generic(method.upper(), url, encode_multipart(BOUNDARY, data),
+                                   content_type=MULTIPART_CONTENT)
+
+    def test_file_over_the_limit_is_refused(self):
+        response = self.upload(1500)
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(Equipamento.objects.exists())
+
+    def test_declared_length_over_the_limit_is_refused_before_reading(self):
+        response = self.upload(4096)
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('requisição', response.json()['error'])
+
+    def test_put_multipart_is_limited_too(self):
+        equipamento = make_equipamento()
+        response = self.upload(1500, method='put', url=f'/api/equipamentos/{equipamento.id}/')
+        self.assertEqual(response.status_code, 413)
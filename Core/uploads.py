@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class UploadTooLarge(Exception):
+    """Raised while a multipart body is read, as soon as it passes the allowed size"""
+
+
+def _megabytes(size):
+    return f"{size / (1024 * 1024):g} MB"
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """
+    First handler in the chain: passes file chunks through to the default
+    handlers (memory up to FILE_UPLOAD_MAX_MEMORY_SIZE, then a temporary
+    file) and aborts the upload once a file grows past ``max_size``.
+    """
+
+    def __init__(self, request, max_size):
+        super().__init__(request)
+        self.max_size = max_size
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size:
+            raise UploadTooLarge(f"O arquivo excede o tamanho máximo de {_megabytes(self.max_size)}")
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def parse_multipart(request, max_file_size):
+    """
+    (data, files) of a multipart/form-data request, whatever its method.
+
+    The body is parsed as it is read from the socket, never loaded whole:
+    the boundary comes from the Content-Type header and each file is
+    spooled to disk past FILE_UPLOAD_MAX_MEMORY_SIZE. A declared
+    Content-Length above the limits is refused before reading anything.
+    """
+    content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    max_length = max_file_size + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+    if content_length > max_length:
+        raise UploadTooLarge(f"A requisição excede o tamanho máximo de {_megabytes(max_length)}")
+
+    request.upload_handlers.insert(0, LimitedUploadHandler(request, max_file_size))
+    if request.method != 'POST':
+        # Django only parses POST bodies. Parse this one the same way and
+        # keep the result where request.POST/FILES live, so the temporary
+        # files are removed when the request is closed.
+        request._post, request._files = request.parse_file_upload(request.META, request)
+    return request.POST, request.FILES
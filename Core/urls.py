@@ -1,20 +1,39 @@
+from django.conf import settings
 from django.urls import path, include, re_path
-from . import views
+from . import async_views, views
 
-urlpatterns = [
-    path('', views.index, name="index"),
-    path('logout/', views.logout_view, name="logout"),
-    path('clientes/', views.index, name="clientes"),
-    path('equipamentos/', views.index, name="equipamentos"),
-    path('alugueis/', views.index, name="alugueis"),
-    path('api/clientes/', views.clientes_api, name="clientes_api"),
-    path('api/clientes/<int:cliente_id>/', views.cliente_detail_api, name="cliente_detail_api"),
-    path('api/equipamentos/', views.equipamentos_api, name="equipamentos_api"),
-    path('api/equipamentos/<int:equipamento_id>/', views.equipamento_detail_api, name="equipamento_detail_api"),
-    path('api/alugueis/', views.alugueis_api, name="alugueis_api"),
-    path('api/alugueis/<int:aluguel_id>/', views.aluguel_detail_api, name="aluguel_detail_api"),
-    path('api/alugueis/<int:aluguel_id>/close/', views.close_aluguel_api, name="close_aluguel_api"),
-    path('api/alugueis/check-expired/', views.check_expired_rentals_api, name="check_expired_rentals_api"),
-    path('api/dashboard/stats/', views.dashboard_stats_api, name="dashboard_stats_api"),
-    re_path(r'^media/(?P<path>.*)$', views.protected_media, name='protected_media'),
-]
\ No newline at end of file
+
+def build_urlpatterns(read_views):
+    """Routes with the read-heavy endpoints served by ``read_views`` (Core.views or Core.async_views)"""
+    return [
+        path('', views.index, name="index"),
+        path('logout/', views.logout_view, name="logout"),
+        path('clientes/', views.index, name="clientes"),
+        path('equipamentos/', views.index, name="equipamentos"),
+        path('alugueis/', views.index, name="alugueis"),
+        path('api/clientes/', read_views.clientes_api, name="clientes_api"),
+        path('api/clientes/lookup/', views.clientes_lookup_api, name="clientes_lookup_api"),
+        path('api/clientes/<int:cliente_id>/', read_views.cliente_detail_api, name="cliente_detail_api"),
+        path('api/equipamentos/', read_views.equipamentos_api, name="equipamentos_api"),
+        path('api/equipamentos/lookup/', views.equipamentos_lookup_api, name="equipamentos_lookup_api"),
+        path('api/equipamentos/availability/', views.equipamentos_availability_api, name="equipamentos_availability_api"),
+        path('api/equipamentos/<int:equipamento_id>/', read_views.equipamento_detail_api, name="equipamento_detail_api"),
+        path('api/alugueis/', read_views.alugueis_api, name="alugueis_api"),
+        path('api/alugueis/<int:aluguel_id>/', read_views.aluguel_detail_api, name="aluguel_detail_api"),
+        path('api/alugueis/<int:aluguel_id>/close/', views.close_aluguel_api, name="close_aluguel_api"),
+        path('api/alugueis/check-expired/', views.check_expired_rentals_api, name="check_expired_rentals_api"),
+        path('api/dashboard/stats/', read_views.dashboard_stats_api, name="dashboard_stats_api"),
+        path('api/analytics/utilization/', views.utilization_report_api, name="utilization_report_api"),
+        path('api/batch/', views.batch_api, name="batch_api"),
+        path('api/metrics/', views.metrics_api, name="metrics_api"),
+        path('api/profiling/', views.profiling_api, name="profiling_api"),
+        path('api/sync/', views.sync_api, name="sync_api"),
+        path('api/export/<str:recurso>/', views.export_api, name="export_api"),
+        path('api/import/<str:recurso>/', views.import_api, name="import_api"),
+        re_path(r'^media/(?P<path>.*)$', read_views.protected_media, name='protected_media'),
+    ]
+
+
+# Native async versions only when asked for (ASYNC_VIEWS, for ASGI servers):
+# under WSGI an async view needs an event loop per request
+urlpatterns = build_urlpatterns(async_views if settings.ASYNC_VIEWS else views)
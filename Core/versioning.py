@@ -0,0 +1,51 @@
+from django.db.models import F
+
+
+class ConflitoVersao(Exception):
+    """Raised when a row changed after the version a client based its edit on"""
+
+    def __init__(self, instance, current_version):
+        self.instance = instance
+        # None when the row was deleted in the meantime
+        self.current_version = current_version
+        super().__init__(
+            f"{instance._meta.verbose_name} foi alterado por outra pessoa. "
+            "Recarregue os dados e tente novamente."
+        )
+
+    def as_dict(self):
+        return {'error': str(self), 'version': self.current_version}
+
+
+def expected_version(data, instance):
+    """
+    The version the client read, sent as ``version`` in the payload. Clients
+    that do not send it are checked against the version just loaded, which
+    still catches a write landing between that read and the update.
+    """
+    version = data.get('version')
+    if version in (None, ''):
+        return instance.version
+    try:
+        return int(version)
+    except (TypeError, ValueError):
+        raise ValueError("Parâmetro 'version' deve ser um número inteiro")
+
+
+def claim(instance, version):
+    """
+    Reserve ``instance``'s row for an update, provided it is still at
+    ``version``: one UPDATE ... SET version = version + 1 WHERE id = ? AND
+    version = ? checks and bumps it, so of two writers holding the same
+    version only the first matches and the other gets ConflitoVersao.
+
+    Must run inside transaction.atomic(); the row is locked only until that
+    commits, and saving ``instance`` afterwards writes the claimed version.
+    """
+    model = type(instance)
+    claimed = instance.version == version and model.objects.filter(
+        pk=instance.pk, version=version,
+    ).update(version=F('version') + 1)
+    if not claimed:
+        current = model.objects.filter(pk=instance.pk).values_list('version', flat=True).first()
+        raise ConflitoVersao(instance, current)
@@ -1,20 +1,36 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, HttpResponse, Http404, FileResponse
+from django.http import HttpResponse, Http404, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import etag, require_http_methods
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
-from .models import Cliente, Equipamento, Aluguel
+from .models import Cliente, Equipamento, Aluguel, ExecucaoExpiracao
+from . import batch, bootstrap, media, metrics, profiling, renditions
+from .aggregates import dashboard_counters
+from .analytics import utilization
+from .bookings import ConflitoReserva, availability, check_availability
+from .caching import ALUGUEL, CLIENTE, EQUIPAMENTO, cached_api, row_etag
+from .expiry import auto_close_note, run_expiry
+from .exports import FORMATS, base_queryset, stream_rows
+from .imports import DEFAULT_BATCH_SIZE, UnreadableFile, import_rows, read_rows
+from .filters import InvalidFilter, filter_alugueis, filter_clientes, filter_equipamentos, parse_datetime_param
+from .pagination import InvalidPageParameter, paginate
+from .profiling import TimedJsonResponse as JsonResponse, timed_json_script
+from .search import get_lookup_limit, normalize, only_digits, prefix_range
+from .serializers import InvalidFieldset, aluguel_serializer, cliente_serializer, equipamento_serializer
+from .sync import DEFAULT_SYNC_LIMIT, MAX_SYNC_LIMIT, changes
+from .uploads import UploadTooLarge, parse_multipart
+from .versioning import ConflitoVersao, claim, expected_version
 import json
 import os
-import mimetypes
 from datetime import datetime, date
 from django.utils import timezone
 from decimal import Decimal
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Sum, Count, Q
 from django.http import QueryDict
 
@@ -22,50 +38,70 @@ from django.http import QueryDict
 @staff_member_required
 @never_cache
 def index(request):
-    return render(request, 'Core/index.html')
+    return render(request, 'Core/index.html', {
+        # Dashboard, first page of each list and status lookups (see Core.bootstrap)
+        'bootstrap_script': timed_json_script(bootstrap.payload(request), 'bootstrap-data'),
+        'status_equipamentos': Equipamento.STATUS_CHOICES,
+        'status_alugueis': Aluguel.STATUS_CHOICES,
+    })
 
 def logout_view(request):
     """Custom logout view that handles GET requests"""
     logout(request)
     return redirect('/admin/login/')
 
+@require_http_methods(["GET", "HEAD"])
 @login_required
 @staff_member_required
 def protected_media(request, path):
     """Serve media files only to authenticated admin users"""
-    file_path = os.path.join(settings.MEDIA_ROOT, path)
-    
-    if not os.path.exists(file_path):
-        raise Http404("File not found")
-    
-    # Get the content type
-    content_type, _ = mimetypes.guess_type(file_path)
-    if content_type is None:
-        content_type = 'application/octet-stream'
-    
-    # Return the file
-    return FileResponse(
-        open(file_path, 'rb'),
-        content_type=content_type,
-        as_attachment=False
-    )
+    return media.serve(request, path)
 
 def delete_old_photo(photo_path):
-    """Helper function to delete old photo file"""
-    if photo_path and os.path.exists(photo_path.path):
+    """
+    Delete an old photo file and its resized copies once the current
+    transaction commits, so a rolled-back update (e.g. in /api/batch/) keeps them
+    """
+    if photo_path:
+        name, path = photo_path.name, photo_path.path
+        transaction.on_commit(lambda: _remove_photo(name, path))
+
+
+def _remove_photo(name, path):
+    renditions.delete(name)
+    if os.path.exists(path):
         try:
-            os.remove(photo_path.path)
+            os.remove(path)
         except OSError:
             pass  # Ignore if file doesn't exist or can't be deleted
 
+
+def set_equipamento_status(equipamento_id, status):
+    """
+    Change only the status of the equipment. The row is re-read under lock,
+    so edits of its other fields made since the caller loaded it are kept.
+    Call inside transaction.atomic().
+    """
+    equipamento = Equipamento.objects.select_for_update().get(id=equipamento_id)
+    if equipamento.status != status:
+        equipamento.status = status
+        equipamento.save()
+    return equipamento
+
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
 @login_required
 @staff_member_required
+@cached_api(CLIENTE)
 def clientes_api(request):
     if request.method == 'GET':
-        clientes = Cliente.objects.all().values()
-        return JsonResponse(list(clientes), safe=False)
+        try:
+            serializer = cliente_serializer.for_request(request)
+            clientes = serializer.values(filter_clientes(Cliente.objects.all(), request), 'id')
+            rows, next_cursor = paginate(clientes, request, ['id'])
+        except (InvalidFilter, InvalidFieldset, InvalidPageParameter) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'results': serializer.render_many(rows), 'next_cursor': next_cursor})
     
     elif request.method == 'POST':
         try:
@@ -79,39 +115,47 @@ def clientes_api(request):
                 endereco=data['endereco'],
                 data_nascimento=data_nascimento
             )
-            return JsonResponse({
-                'id': cliente.id,
-                'nome': cliente.nome,
-                'cpf': cliente.cpf,
-                'email': cliente.email,
-                'telefone': cliente.telefone,
-                'endereco': cliente.endereco,
-                'data_nascimento': cliente.data_nascimento.isoformat(),
-                'created_at': cliente.created_at.isoformat(),
-                'updated_at': cliente.updated_at.isoformat()
-            }, status=201)
+            return JsonResponse(cliente_serializer.render_instance(cliente), status=201)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
 
+@require_http_methods(["GET"])
+@login_required
+@staff_member_required
+@cached_api(CLIENTE)
+def clientes_lookup_api(request):
+    """Typeahead: clients whose name (or CPF, when ?q= is numeric) starts with ?q="""
+    q = request.GET.get('q', '')
+    try:
+        limit = get_lookup_limit(request)
+    except InvalidPageParameter as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    digits = only_digits(q)
+    if digits and not any(char.isalpha() for char in q):
+        clientes = Cliente.objects.filter(**prefix_range('cpf_digitos', digits)).order_by('cpf_digitos')
+    elif normalize(q):
+        clientes = Cliente.objects.filter(**prefix_range('nome_normalizado', normalize(q))).order_by('nome_normalizado')
+    else:
+        return JsonResponse({'results': []})
+    return JsonResponse({'results': list(clientes.values('id', 'nome', 'cpf')[:limit])})
+
+def cliente_etag(request, cliente_id):
+    return row_etag(Cliente.objects.filter(id=cliente_id).values_list('updated_at'), request.GET.get('fields'))
+
 @csrf_exempt
 @require_http_methods(["GET", "PUT", "DELETE"])
 @login_required
 @staff_member_required
+@etag(cliente_etag)
 def cliente_detail_api(request, cliente_id):
     cliente = get_object_or_404(Cliente, id=cliente_id)
     
     if request.method == 'GET':
-        return JsonResponse({
-            'id': cliente.id,
-            'nome': cliente.nome,
-            'cpf': cliente.cpf,
-            'email': cliente.email,
-            'telefone': cliente.telefone,
-            'endereco': cliente.endereco,
-            'data_nascimento': cliente.data_nascimento.isoformat(),
-            'created_at': cliente.created_at.isoformat(),
-            'updated_at': cliente.updated_at.isoformat()
-        })
+        try:
+            return JsonResponse(cliente_serializer.for_request(request).render_instance(cliente))
+        except InvalidFieldset as e:
+            return JsonResponse({'error': str(e)}, status=400)
     
     elif request.method == 'PUT':
         try:
@@ -125,17 +169,7 @@ def cliente_detail_api(request, cliente_id):
             cliente.data_nascimento = data_nascimento
             cliente.save()
             
-            return JsonResponse({
-                'id': cliente.id,
-                'nome': cliente.nome,
-                'cpf': cliente.cpf,
-                'email': cliente.email,
-                'telefone': cliente.telefone,
-                'endereco': cliente.endereco,
-                'data_nascimento': cliente.data_nascimento.isoformat(),
-                'created_at': cliente.created_at.isoformat(),
-                'updated_at': cliente.updated_at.isoformat()
-            })
+            return JsonResponse(cliente_serializer.render_instance(cliente))
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
     
@@ -144,169 +178,163 @@ def cliente_detail_api(request, cliente_id):
         return JsonResponse({'message': 'Cliente deletado com sucesso'}, status=204)
 
 
+def equipamento_form(request):
+    """
+    Submitted equipment fields and photo, from a multipart form (any method,
+    streamed by parse_multipart) or a JSON body
+    """
+    if request.content_type == 'multipart/form-data':
+        data, files = parse_multipart(request, settings.EQUIPAMENTO_FOTO_MAX_SIZE)
+        return data, files.get('foto')
+    return json.loads(request.body), None
+
+
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
 @login_required
 @staff_member_required
+@cached_api(EQUIPAMENTO)
 def equipamentos_api(request):
     if request.method == 'GET':
-        equipamentos_data = []
-        for equipamento in Equipamento.objects.all():
-            equipamentos_data.append({
-                'id': equipamento.id,
-                'nome': equipamento.nome,
-                'status': equipamento.status,
-                'valor_diario': str(equipamento.valor_diario),
-                'valor_por_hora': str(equipamento.valor_por_hora),
-                'foto': equipamento.foto.url if equipamento.foto else None
-            })
-        return JsonResponse(equipamentos_data, safe=False)
+        try:
+            serializer = equipamento_serializer.for_request(request)
+            equipamentos = serializer.values(filter_equipamentos(Equipamento.objects.all(), request), 'id')
+            rows, next_cursor = paginate(equipamentos, request, ['id'])
+        except (InvalidFilter, InvalidFieldset, InvalidPageParameter) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'results': serializer.render_many(rows), 'next_cursor': next_cursor})
     
     elif request.method == 'POST':
         try:
-            # Handle multipart form data for file upload
-            if request.content_type and 'multipart/form-data' in request.content_type:
-                nome = request.POST.get('nome')
-                status = request.POST.get('status', 'disponivel')
-                valor_diario = request.POST.get('valor_diario')
-                foto = request.FILES.get('foto')
-                
-                equipamento = Equipamento.objects.create(
-                    nome=nome,
-                    status=status,
-                    valor_diario=Decimal(str(valor_diario)),
-                    foto=foto
-                )
-            else:
-                # Handle JSON data
-                data = json.loads(request.body)
-                equipamento = Equipamento.objects.create(
-                    nome=data['nome'],
-                    status=data.get('status', 'disponivel'),
-                    valor_diario=Decimal(str(data['valor_diario']))
-                )
+            data, foto = equipamento_form(request)
+            equipamento = Equipamento.objects.create(
+                nome=data['nome'],
+                status=data.get('status', 'disponivel'),
+                valor_diario=Decimal(str(data['valor_diario'])),
+                foto=foto
+            )
             
-            return JsonResponse({
-                'id': equipamento.id,
-                'nome': equipamento.nome,
-                'status': equipamento.status,
-                'valor_diario': str(equipamento.valor_diario),
-                'valor_por_hora': str(equipamento.valor_por_hora),
-                'foto': equipamento.foto.url if equipamento.foto else None
-            }, status=201)
+            return JsonResponse(equipamento_serializer.render_instance(equipamento), status=201)
+        except UploadTooLarge as e:
+            return JsonResponse({'error': str(e)}, status=413)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
 
 
+@require_http_methods(["GET"])
+@login_required
+@staff_member_required
+@cached_api(EQUIPAMENTO)
+def equipamentos_lookup_api(request):
+    """
+    Typeahead: equipment whose name starts with ?q=. With ?available=1 only
+    items that can be rented now are returned, plus the optional ?include=<id>
+    (the item already on the rental being edited).
+    """
+    q = normalize(request.GET.get('q', ''))
+    try:
+        limit = get_lookup_limit(request)
+    except InvalidPageParameter as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    include = request.GET.get('include')
+    if include and not include.isdigit():
+        return JsonResponse({'error': "Parâmetro 'include' deve ser um número inteiro"}, status=400)
+    if not q:
+        return JsonResponse({'results': []})
+
+    equipamentos = Equipamento.objects.filter(**prefix_range('nome_normalizado', q))
+    if request.GET.get('available') in ('1', 'true'):
+        available = Q(status='disponivel')
+        if include:
+            available |= Q(id=int(include))
+        equipamentos = equipamentos.filter(available)
+    serializer = equipamento_serializer.compile(('id', 'nome', 'status', 'valor_diario', 'foto', 'fotos'))
+    rows = serializer.values(equipamentos.order_by('nome_normalizado'))[:limit]
+    return JsonResponse({'results': serializer.render_many(rows)})
+
+@require_http_methods(["GET"])
+@login_required
+@staff_member_required
+@cached_api(ALUGUEL, EQUIPAMENTO)
+def equipamentos_availability_api(request):
+    """Free time windows of every equipment between ?start= and ?end="""
+    if not request.GET.get('start') or not request.GET.get('end'):
+        return JsonResponse({'error': "Informe os parâmetros 'start' e 'end'"}, status=400)
+    try:
+        inicio = parse_datetime_param(request.GET['start'])
+        fim = parse_datetime_param(request.GET['end'], end_of_day=True)
+        equipamentos = availability(inicio, fim)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'start': timezone.localtime(inicio).isoformat(),
+        'end': timezone.localtime(fim).isoformat(),
+        'results': [
+            {
+                'id': equipamento['id'],
+                'nome': equipamento['nome'],
+                'status': equipamento['status'],
+                'free_windows': [
+                    {'start': timezone.localtime(start).isoformat(), 'end': timezone.localtime(end).isoformat()}
+                    for start, end in windows
+                ]
+            }
+            for equipamento, windows in equipamentos
+        ]
+    })
+
+
+def equipamento_etag(request, equipamento_id):
+    return row_etag(Equipamento.objects.filter(id=equipamento_id).values_list('updated_at'), request.GET.get('fields'))
+
+
 @csrf_exempt
 @require_http_methods(["GET", "PUT", "PATCH", "DELETE"])
 @login_required
 @staff_member_required
+@etag(equipamento_etag)
 def equipamento_detail_api(request, equipamento_id):
     equipamento = get_object_or_404(Equipamento, id=equipamento_id)
     
     if request.method == 'GET':
-        return JsonResponse({
-            'id': equipamento.id,
-            'nome': equipamento.nome,
-            'status': equipamento.status,
-            'valor_diario': str(equipamento.valor_diario),
-            'valor_por_hora': str(equipamento.valor_por_hora),
-            'foto': equipamento.foto.url if equipamento.foto else None
-        })
+        try:
+            return JsonResponse(equipamento_serializer.for_request(request).render_instance(equipamento))
+        except InvalidFieldset as e:
+            return JsonResponse({'error': str(e)}, status=400)
     
     elif request.method in ['PUT', 'PATCH']:
         try:
-            # Handle multipart form data for PATCH/PUT manually
-            if request.content_type and 'multipart/form-data' in request.content_type:
-                import re
-                
-                # Parse multipart data manually since Django doesn't handle it for PATCH/PUT
-                body_bytes = request.body
-                
-                # Find the boundary
-                boundary_match = re.search(rb'------WebKitFormBoundary\w+', body_bytes)
-                if not boundary_match:
-                    raise ValueError("Could not find form boundary")
-                
-                boundary = boundary_match.group(0)
-                
-                # Split the body by boundary
-                parts = body_bytes.split(boundary)
-                
-                extracted_data = {}
-                uploaded_file = None
-                
-                for part in parts:
-                    if b'Content-Disposition: form-data' in part:
-                        # Extract field name
-                        name_match = re.search(rb'name="([^"]+)"', part)
-                        if name_match:
-                            field_name = name_match.group(1).decode('utf-8')
-                            
-                            # Check if it's a file upload
-                            if b'filename=' in part:
-                                # Extract file data
-                                file_start = part.find(b'\r\n\r\n') + 4
-                                file_end = part.rfind(b'\r\n')
-                                if file_start < file_end:
-                                    file_data = part[file_start:file_end]
-                                    filename_match = re.search(rb'filename="([^"]*)"', part)
-                                    filename = filename_match.group(1).decode('utf-8') if filename_match else 'uploaded_file'
-                                    
-                                    # Create a simple file-like object
-                                    from django.core.files.uploadedfile import SimpleUploadedFile
-                                    uploaded_file = SimpleUploadedFile(filename, file_data)
-                            else:
-                                # Extract text field value
-                                value_start = part.find(b'\r\n\r\n') + 4
-                                value_end = part.rfind(b'\r\n')
-                                if value_start < value_end:
-                                    try:
-                                        value = part[value_start:value_end].decode('utf-8')
-                                        extracted_data[field_name] = value
-                                    except UnicodeDecodeError:
-                                        pass  # Skip fields that can't be decoded
-                
-                # Update equipment fields
-                if 'nome' in extracted_data:
-                    equipamento.nome = extracted_data['nome']
-                if 'status' in extracted_data:
-                    equipamento.status = extracted_data['status']
-                if 'valor_diario' in extracted_data:
-                    equipamento.valor_diario = Decimal(str(extracted_data['valor_diario']))
-                
-                # Handle file upload
-                if uploaded_file:
-                    # Delete old photo before saving new one
-                    old_photo = equipamento.foto
-                    if old_photo:
-                        delete_old_photo(old_photo)
-                    equipamento.foto = uploaded_file
-                
-                equipamento.save()
-                
-            else:
-                # Handle JSON data
-                data = json.loads(request.body)
+            data, foto = equipamento_form(request)
+            # PUT replaces the editable fields, PATCH only those sent
+            if request.method == 'PUT' or 'nome' in data:
                 equipamento.nome = data['nome']
-                equipamento.status = data.get('status', equipamento.status)
+            if 'status' in data:
+                equipamento.status = data['status']
+            if request.method == 'PUT' or 'valor_diario' in data:
                 equipamento.valor_diario = Decimal(str(data['valor_diario']))
+            
+            old_photo = None
+            if foto:
+                old_photo = equipamento.foto
+                equipamento.foto = foto
+            with transaction.atomic():
+                claim(equipamento, expected_version(data, equipamento))
                 equipamento.save()
+            # Removed only once the new photo is stored, under a new name
+            if old_photo:
+                delete_old_photo(old_photo)
             
-            return JsonResponse({
-                'id': equipamento.id,
-                'nome': equipamento.nome,
-                'status': equipamento.status,
-                'valor_diario': str(equipamento.valor_diario),
-                'valor_por_hora': str(equipamento.valor_por_hora),
-                'foto': equipamento.foto.url if equipamento.foto else None
-            })
+            return JsonResponse(equipamento_serializer.render_instance(equipamento))
+        except ConflitoVersao as e:
+            return JsonResponse(e.as_dict(), status=409)
+        except UploadTooLarge as e:
+            return JsonResponse({'error': str(e)}, status=413)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
     
     elif request.method == 'DELETE':
-        # Delete photo file before deleting equipment record
+        # The photo file goes once the deletion commits
         if equipamento.foto:
             delete_old_photo(equipamento.foto)
         
@@ -318,190 +346,152 @@ def equipamento_detail_api(request, equipamento_id):
 @require_http_methods(["GET", "POST"])
 @login_required
 @staff_member_required
+@cached_api(ALUGUEL, CLIENTE, EQUIPAMENTO)
 def alugueis_api(request):
     if request.method == 'GET':
-        alugueis_data = []
-        for aluguel in Aluguel.objects.select_related('cliente', 'equipamento').all():
-            alugueis_data.append({
-                'id': aluguel.id,
-                'cliente': {
-                    'id': aluguel.cliente.id,
-                    'nome': aluguel.cliente.nome
-                },
-                'equipamento': {
-                    'id': aluguel.equipamento.id,
-                    'nome': aluguel.equipamento.nome
-                },
-                'data_inicio': aluguel.data_inicio.isoformat(),
-                'data_fim': aluguel.data_fim.isoformat() if aluguel.data_fim else None,
-                'valor_total': str(aluguel.valor_total) if aluguel.valor_total else None,
-                'status': aluguel.status,
-                'observacoes': aluguel.observacoes,
-                'created_at': aluguel.created_at.isoformat(),
-                'updated_at': aluguel.updated_at.isoformat()
-            })
-        return JsonResponse(alugueis_data, safe=False)
+        try:
+            serializer = aluguel_serializer.for_request(request)
+            alugueis = serializer.values(filter_alugueis(Aluguel.objects.all(), request), 'created_at', 'id')
+            # Newest first; id breaks ties between rentals created in the same instant
+            rows, next_cursor = paginate(alugueis, request, ['-created_at', 'id'])
+        except (InvalidFilter, InvalidFieldset, InvalidPageParameter) as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({'results': serializer.render_many(rows), 'next_cursor': next_cursor})
     
     elif request.method == 'POST':
         try:
             data = json.loads(request.body)
             
-            cliente = get_object_or_404(Cliente, id=data['cliente'])
-            equipamento = get_object_or_404(Equipamento, id=data['equipamento'])
+            with transaction.atomic():
+                cliente = get_object_or_404(Cliente, id=data['cliente'])
+                # Lock the equipment row so concurrent bookings of it are serialized
+                equipamento = get_object_or_404(Equipamento.objects.select_for_update(), id=data['equipamento'])
             
-            # Parse dates
-            data_inicio = timezone.datetime.fromisoformat(data['data_inicio'].replace('Z', '+00:00'))
-            if not timezone.is_aware(data_inicio):
-                data_inicio = timezone.make_aware(data_inicio)
-            data_fim = None
-            if data.get('data_fim'):
-                data_fim = timezone.datetime.fromisoformat(data['data_fim'].replace('Z', '+00:00'))
-                if not timezone.is_aware(data_fim):
-                    data_fim = timezone.make_aware(data_fim)
+                # Parse dates
+                data_inicio = timezone.datetime.fromisoformat(data['data_inicio'].replace('Z', '+00:00'))
+                if not timezone.is_aware(data_inicio):
+                    data_inicio = timezone.make_aware(data_inicio)
+                data_fim = None
+                if data.get('data_fim'):
+                    data_fim = timezone.datetime.fromisoformat(data['data_fim'].replace('Z', '+00:00'))
+                    if not timezone.is_aware(data_fim):
+                        data_fim = timezone.make_aware(data_fim)
             
-            aluguel = Aluguel.objects.create(
-                cliente=cliente,
-                equipamento=equipamento,
-                data_inicio=data_inicio,
-                data_fim=data_fim,
-                valor_total=Decimal(str(data['valor_total'])) if data.get('valor_total') else None,
-                status=data.get('status', 'aberto'),
-                observacoes=data.get('observacoes', '')
-            )
+                status = data.get('status', 'aberto')
+                check_availability(equipamento.id, data_inicio, data_fim, status)
             
-            # Update equipment status to 'alugado' if rental is active
-            if aluguel.status in ['aberto', 'em_andamento']:
-                equipamento.status = 'alugado'
-                equipamento.save()
+                aluguel = Aluguel.objects.create(
+                    cliente=cliente,
+                    equipamento=equipamento,
+                    data_inicio=data_inicio,
+                    data_fim=data_fim,
+                    valor_total=Decimal(str(data['valor_total'])) if data.get('valor_total') else None,
+                    status=status,
+                    observacoes=data.get('observacoes', '')
+                )
             
-            return JsonResponse({
-                'id': aluguel.id,
-                'cliente': {
-                    'id': aluguel.cliente.id,
-                    'nome': aluguel.cliente.nome
-                },
-                'equipamento': {
-                    'id': aluguel.equipamento.id,
-                    'nome': aluguel.equipamento.nome
-                },
-                'data_inicio': aluguel.data_inicio.isoformat(),
-                'data_fim': aluguel.data_fim.isoformat() if aluguel.data_fim else None,
-                'valor_total': str(aluguel.valor_total) if aluguel.valor_total else None,
-                'status': aluguel.status,
-                'observacoes': aluguel.observacoes,
-                'created_at': aluguel.created_at.isoformat(),
-                'updated_at': aluguel.updated_at.isoformat()
-            }, status=201)
+                # Update equipment status to 'alugado' if rental is active
+                if aluguel.status in ['aberto', 'em_andamento']:
+                    equipamento.status = 'alugado'
+                    equipamento.save()
+            
+            return JsonResponse(aluguel_serializer.render_instance(aluguel), status=201)
+        except ConflitoReserva as e:
+            return JsonResponse(e.as_dict(), status=409)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
 
 
+def aluguel_etag(request, aluguel_id):
+    # The rental embeds the client's and the equipment's names
+    rows = Aluguel.objects.filter(id=aluguel_id).values_list('updated_at', 'cliente__updated_at', 'equipamento__updated_at')
+    return row_etag(rows, request.GET.get('fields'))
+
+
 @csrf_exempt
 @require_http_methods(["GET", "PUT", "DELETE"])
 @login_required
 @staff_member_required
+@etag(aluguel_etag)
 def aluguel_detail_api(request, aluguel_id):
-    aluguel = get_object_or_404(Aluguel, id=aluguel_id)
+    aluguel = get_object_or_404(Aluguel.objects.select_related('cliente', 'equipamento'), id=aluguel_id)
     
     if request.method == 'GET':
-        return JsonResponse({
-            'id': aluguel.id,
-            'cliente': {
-                'id': aluguel.cliente.id,
-                'nome': aluguel.cliente.nome
-            },
-            'equipamento': {
-                'id': aluguel.equipamento.id,
-                'nome': aluguel.equipamento.nome
-            },
-            'data_inicio': aluguel.data_inicio.isoformat(),
-            'data_fim': aluguel.data_fim.isoformat() if aluguel.data_fim else None,
-            'valor_total': str(aluguel.valor_total) if aluguel.valor_total else None,
-            'status': aluguel.status,
-            'observacoes': aluguel.observacoes,
-            'created_at': aluguel.created_at.isoformat(),
-            'updated_at': aluguel.updated_at.isoformat()
-        })
+        try:
+            return JsonResponse(aluguel_serializer.for_request(request).render_instance(aluguel))
+        except InvalidFieldset as e:
+            return JsonResponse({'error': str(e)}, status=400)
     
     elif request.method == 'PUT':
         try:
             data = json.loads(request.body)
             
-            # Get new cliente and equipamento if provided
-            if 'cliente' in data:
-                aluguel.cliente = get_object_or_404(Cliente, id=data['cliente'])
-            if 'equipamento' in data:
-                old_equipamento = aluguel.equipamento
-                aluguel.equipamento = get_object_or_404(Equipamento, id=data['equipamento'])
+            with transaction.atomic():
+                # Fails with 409 if someone else saved the rental since the client read it
+                claim(aluguel, expected_version(data, aluguel))
+                
+                # Get new cliente and equipamento if provided
+                if 'cliente' in data:
+                    aluguel.cliente = get_object_or_404(Cliente, id=data['cliente'])
+                if 'equipamento' in data:
+                    old_equipamento = aluguel.equipamento
+                    aluguel.equipamento = get_object_or_404(Equipamento, id=data['equipamento'])
                 
-                # Update old equipment status if changed
-                if old_equipamento != aluguel.equipamento:
-                    old_equipamento.status = 'disponivel'
-                    old_equipamento.save()
+                    # Update old equipment status if changed
+                    if old_equipamento != aluguel.equipamento:
+                        set_equipamento_status(old_equipamento.id, 'disponivel')
             
-            # Parse dates
-            if 'data_inicio' in data:
-                data_inicio = timezone.datetime.fromisoformat(data['data_inicio'].replace('Z', '+00:00'))
-                if not timezone.is_aware(data_inicio):
-                    data_inicio = timezone.make_aware(data_inicio)
-                aluguel.data_inicio = data_inicio
-            if 'data_fim' in data:
-                if data['data_fim']:
-                    data_fim = timezone.datetime.fromisoformat(data['data_fim'].replace('Z', '+00:00'))
-                    if not timezone.is_aware(data_fim):
-                        data_fim = timezone.make_aware(data_fim)
-                    aluguel.data_fim = data_fim
-                else:
-                    aluguel.data_fim = None
+                # Parse dates
+                if 'data_inicio' in data:
+                    data_inicio = timezone.datetime.fromisoformat(data['data_inicio'].replace('Z', '+00:00'))
+                    if not timezone.is_aware(data_inicio):
+                        data_inicio = timezone.make_aware(data_inicio)
+                    aluguel.data_inicio = data_inicio
+                if 'data_fim' in data:
+                    if data['data_fim']:
+                        data_fim = timezone.datetime.fromisoformat(data['data_fim'].replace('Z', '+00:00'))
+                        if not timezone.is_aware(data_fim):
+                            data_fim = timezone.make_aware(data_fim)
+                        aluguel.data_fim = data_fim
+                    else:
+                        aluguel.data_fim = None
             
-            # Update other fields
-            if 'valor_total' in data:
-                aluguel.valor_total = Decimal(str(data['valor_total'])) if data['valor_total'] else None
-            if 'status' in data:
-                old_status = aluguel.status
-                aluguel.status = data['status']
+                # Update other fields
+                if 'valor_total' in data:
+                    aluguel.valor_total = Decimal(str(data['valor_total'])) if data['valor_total'] else None
+                if 'status' in data:
+                    old_status = aluguel.status
+                    aluguel.status = data['status']
                 
-                # Update equipment status based on rental status
-                if aluguel.status in ['fechado', 'cancelado'] and old_status in ['aberto', 'em_andamento']:
-                    aluguel.equipamento.status = 'disponivel'
-                    aluguel.equipamento.save()
-                elif aluguel.status in ['aberto', 'em_andamento'] and old_status in ['fechado', 'cancelado']:
-                    aluguel.equipamento.status = 'alugado'
-                    aluguel.equipamento.save()
+                    # Update equipment status based on rental status
+                    if aluguel.status in ['fechado', 'cancelado'] and old_status in ['aberto', 'em_andamento']:
+                        set_equipamento_status(aluguel.equipamento_id, 'disponivel')
+                    elif aluguel.status in ['aberto', 'em_andamento'] and old_status in ['fechado', 'cancelado']:
+                        set_equipamento_status(aluguel.equipamento_id, 'alugado')
                     
-            if 'observacoes' in data:
-                aluguel.observacoes = data['observacoes']
+                if 'observacoes' in data:
+                    aluguel.observacoes = data['observacoes']
             
-            aluguel.save()
+                # Lock the (possibly new) equipment and re-check its bookings
+                Equipamento.objects.select_for_update().get(id=aluguel.equipamento_id)
+                check_availability(aluguel.equipamento_id, aluguel.data_inicio, aluguel.data_fim,
+                                   aluguel.status, exclude_id=aluguel.id)
+            
+                aluguel.save()
             
-            return JsonResponse({
-                'id': aluguel.id,
-                'cliente': {
-                    'id': aluguel.cliente.id,
-                    'nome': aluguel.cliente.nome
-                },
-                'equipamento': {
-                    'id': aluguel.equipamento.id,
-                    'nome': aluguel.equipamento.nome
-                },
-                'data_inicio': aluguel.data_inicio.isoformat(),
-                'data_fim': aluguel.data_fim.isoformat() if aluguel.data_fim else None,
-                'valor_total': str(aluguel.valor_total) if aluguel.valor_total else None,
-                'status': aluguel.status,
-                'observacoes': aluguel.observacoes,
-                'created_at': aluguel.created_at.isoformat(),
-                'updated_at': aluguel.updated_at.isoformat()
-            })
+            return JsonResponse(aluguel_serializer.render_instance(aluguel))
+        except (ConflitoReserva, ConflitoVersao) as e:
+            return JsonResponse(e.as_dict(), status=409)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
     
     elif request.method == 'DELETE':
-        # Set equipment back to available when deleting rental
-        if aluguel.status in ['aberto', 'em_andamento']:
-            aluguel.equipamento.status = 'disponivel'
-            aluguel.equipamento.save()
-        
-        aluguel.delete()
+        with transaction.atomic():
+            # Set equipment back to available when deleting rental
+            if aluguel.status in ['aberto', 'em_andamento']:
+                set_equipamento_status(aluguel.equipamento_id, 'disponivel')
+            
+            aluguel.delete()
         return JsonResponse({'message': 'Aluguel deletado com sucesso'}, status=204)
 
 
@@ -517,166 +507,281 @@ def close_aluguel_api(request, aluguel_id):
         data = json.loads(request.body)
         auto_closed = data.get('auto_closed', False)
         
-        # Only set end date if it's provided in the request and rental doesn't have one
-        if 'data_fim' in data and data['data_fim']:
-            data_fim = timezone.datetime.fromisoformat(data['data_fim'].replace('Z', '+00:00'))
-            if not timezone.is_aware(data_fim):
-                data_fim = timezone.make_aware(data_fim)
-            aluguel.data_fim = data_fim
-        elif not aluguel.data_fim:
-            # If auto_closed and rental has an end date, use that date for calculation
-            if auto_closed and aluguel.data_fim:
-                pass  # Keep existing end date
-            else:
-                # Only set to now if no data_fim exists
-                aluguel.data_fim = timezone.now()
-        
-        # Set status to closed
-        aluguel.status = 'fechado'
-        
-        # Calculate total if not set and we have an end date
-        if not aluguel.valor_total and aluguel.data_fim:
-            horas = (aluguel.data_fim - aluguel.data_inicio).total_seconds() / 3600
-            aluguel.valor_total = aluguel.equipamento.valor_por_hora * Decimal(str(horas))
-        
-        # Add note if auto-closed
-        if auto_closed:
-            current_obs = aluguel.observacoes or ''
-            auto_note = f"\n[FECHADO AUTOMATICAMENTE EM {timezone.now().strftime('%d/%m/%Y %H:%M')} - Data final atingida]"
-            aluguel.observacoes = current_obs + auto_note
-        
-        aluguel.save()
-        
-        # Set equipment back to available
-        aluguel.equipamento.status = 'disponivel'
-        aluguel.equipamento.save()
+        with transaction.atomic():
+            # Fails with 409 if the rental changed (or was already closed) since the client read it
+            claim(aluguel, expected_version(data, aluguel))
+            
+            # Only set end date if it's provided in the request and rental doesn't have one
+            if 'data_fim' in data and data['data_fim']:
+                data_fim = timezone.datetime.fromisoformat(data['data_fim'].replace('Z', '+00:00'))
+                if not timezone.is_aware(data_fim):
+                    data_fim = timezone.make_aware(data_fim)
+                aluguel.data_fim = data_fim
+            elif not aluguel.data_fim:
+                # If auto_closed and rental has an end date, use that date for calculation
+                if auto_closed and aluguel.data_fim:
+                    pass  # Keep existing end date
+                else:
+                    # Only set to now if no data_fim exists
+                    aluguel.data_fim = timezone.now()
+            
+            # Set status to closed
+            aluguel.status = 'fechado'
+            
+            # Calculate total if not set and we have an end date
+            if not aluguel.valor_total and aluguel.data_fim:
+                horas = (aluguel.data_fim - aluguel.data_inicio).total_seconds() / 3600
+                aluguel.valor_total = aluguel.equipamento.valor_por_hora * Decimal(str(horas))
+            
+            # Add note if auto-closed
+            if auto_closed:
+                current_obs = aluguel.observacoes or ''
+                aluguel.observacoes = current_obs + auto_close_note(timezone.now())
+            
+            # A later end date may run into the next booking: lock the
+            # equipment and re-check, as the create and update handlers do
+            Equipamento.objects.select_for_update().get(id=aluguel.equipamento_id)
+            check_availability(aluguel.equipamento_id, aluguel.data_inicio, aluguel.data_fim,
+                               aluguel.status, exclude_id=aluguel.id)
+            
+            aluguel.save()
+            
+            # Set equipment back to available
+            set_equipamento_status(aluguel.equipamento_id, 'disponivel')
         
-        return JsonResponse({
-            'id': aluguel.id,
-            'cliente': {
-                'id': aluguel.cliente.id,
-                'nome': aluguel.cliente.nome
-            },
-            'equipamento': {
-                'id': aluguel.equipamento.id,
-                'nome': aluguel.equipamento.nome
-            },
-            'data_inicio': aluguel.data_inicio.isoformat(),
-            'data_fim': aluguel.data_fim.isoformat() if aluguel.data_fim else None,
-            'valor_total': str(aluguel.valor_total) if aluguel.valor_total else None,
-            'status': aluguel.status,
-            'observacoes': aluguel.observacoes,
-            'created_at': aluguel.created_at.isoformat(),
-            'updated_at': aluguel.updated_at.isoformat()
-        })
+        return JsonResponse(aluguel_serializer.render_instance(aluguel))
+    except (ConflitoReserva, ConflitoVersao) as e:
+        return JsonResponse(e.as_dict(), status=409)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
 
 @csrf_exempt
-@require_http_methods(["POST"])
+@require_http_methods(["GET", "POST"])
 @login_required
 @staff_member_required
 def check_expired_rentals_api(request):
-    """API endpoint to check and close expired rentals"""
-    try:
-        now = timezone.now()
-        expired_rentals = Aluguel.objects.filter(
-            status__in=['aberto', 'em_andamento'],
-            data_fim__lt=now
-        )
+    """
+    GET reports how many rentals the expiry job (manage.py expire_rentals)
+    closed after ``?since=``; POST runs the job now unless it is already running.
+    """
+    if request.method == 'GET':
+        try:
+            execucoes = ExecucaoExpiracao.objects.all()
+            if request.GET.get('since'):
+                execucoes = execucoes.filter(executado_em__gt=parse_datetime_param(request.GET['since']))
+            closed_count = execucoes.aggregate(total=Sum('fechados'))['total'] or 0
+            last_run = ExecucaoExpiracao.objects.values_list('executado_em', flat=True).first()
+        except InvalidFilter as e:
+            return JsonResponse({'error': str(e)}, status=400)
         
-        closed_count = 0
-        for rental in expired_rentals:
-            # Close the rental
-            rental.status = 'fechado'
-            
-            # Calculate total if not set
-            if not rental.valor_total:
-                horas = (rental.data_fim - rental.data_inicio).total_seconds() / 3600
-                rental.valor_total = rental.equipamento.valor_por_hora * Decimal(str(horas))
-            
-            # Add auto-close note
-            current_obs = rental.observacoes or ''
-            auto_note = f"\n[FECHADO AUTOMATICAMENTE EM {now.strftime('%d/%m/%Y %H:%M')} - Data final atingida]"
-            rental.observacoes = current_obs + auto_note
-            
-            rental.save()
-            
-            # Set equipment back to available
-            rental.equipamento.status = 'disponivel'
-            rental.equipamento.save()
-            
-            closed_count += 1
+        return JsonResponse({
+            'closed_count': closed_count,
+            'last_run': last_run.isoformat() if last_run else None
+        })
+    
+    try:
+        execucao = run_expiry()
+        if execucao is None:
+            return JsonResponse({'error': 'A verificação de aluguéis expirados já está em andamento'}, status=409)
         
+        closed_count = execucao.fechados
         return JsonResponse({
             'closed_count': closed_count,
+            'last_run': execucao.executado_em.isoformat(),
             'message': f'{closed_count} aluguel(éis) foram fechados automaticamente'
         })
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
 
+def dashboard_payload(counters, recent):
+    """Dashboard JSON from the counters and the latest rentals (shared with Core.async_views)"""
+    # Aluguéis recentes (últimos 5)
+    from datetime import timedelta
+    recent_rentals = []
+    for aluguel in recent:
+        # Converter para UTC-3 (horário de Brasília)
+        data_inicio_local = aluguel.data_inicio - timedelta(hours=3)
+        recent_rentals.append({
+            'id': aluguel.id,
+            'cliente_nome': aluguel.cliente.nome,
+            'equipamento_nome': aluguel.equipamento.nome,
+            'data_inicio': data_inicio_local.strftime('%d/%m/%Y %H:%M'),
+            'status': aluguel.get_status_display(),
+            'valor_total': str(aluguel.valor_total) if aluguel.valor_total else 'N/A'
+        })
+    
+    # Equipamentos por status
+    equipment_stats = {}
+    for status_key, status_label in Equipamento.STATUS_CHOICES:
+        equipment_stats[status_key] = {
+            'label': status_label,
+            'count': counters['equipment'][status_key]
+        }
+    
+    return {
+        'active_rentals': counters['active_rentals'],
+        'monthly_revenue': str(counters['monthly_revenue']),
+        'available_equipment': counters['equipment']['disponivel'],
+        'recent_rentals': recent_rentals,
+        'equipment_stats': equipment_stats
+    }
+
+
 @require_http_methods(["GET"])
 @login_required
 @staff_member_required
+@cached_api(ALUGUEL, CLIENTE, EQUIPAMENTO)
 def dashboard_stats_api(request):
     """API endpoint to get dashboard statistics"""
     try:
-        now = timezone.now()
-        current_month = now.month
-        current_year = now.year
-        
-        # Aluguéis ativos (status aberto ou em_andamento)
-        active_rentals = Aluguel.objects.filter(
-            status__in=['aberto', 'em_andamento']
-        ).count()
-        
-        # Receita do mês (apenas aluguéis fechados no mês atual)
-        monthly_revenue = Aluguel.objects.filter(
-            status='fechado',
-            updated_at__month=current_month,
-            updated_at__year=current_year,
-            valor_total__isnull=False
-        ).aggregate(total=Sum('valor_total'))['total'] or Decimal('0')
-        
-        # Equipamentos disponíveis
-        available_equipment = Equipamento.objects.filter(
-            status='disponivel'
-        ).count()
-        
-        # Aluguéis recentes (últimos 5)
-        from datetime import timedelta
-        recent_rentals = []
-        for aluguel in Aluguel.objects.select_related('cliente', 'equipamento').order_by('-created_at')[:5]:
-            # Converter para UTC-3 (horário de Brasília)
-            data_inicio_local = aluguel.data_inicio - timedelta(hours=3)
-            recent_rentals.append({
-                'id': aluguel.id,
-                'cliente_nome': aluguel.cliente.nome,
-                'equipamento_nome': aluguel.equipamento.nome,
-                'data_inicio': data_inicio_local.strftime('%d/%m/%Y %H:%M'),
-                'status': aluguel.get_status_display(),
-                'valor_total': str(aluguel.valor_total) if aluguel.valor_total else 'N/A'
-            })
-        
-        # Equipamentos por status
-        equipment_stats = {}
-        for status_choice in Equipamento.STATUS_CHOICES:
-            status_key = status_choice[0]
-            status_label = status_choice[1]
-            count = Equipamento.objects.filter(status=status_key).count()
-            equipment_stats[status_key] = {
-                'label': status_label,
-                'count': count
-            }
-        
-        return JsonResponse({
-            'active_rentals': active_rentals,
-            'monthly_revenue': str(monthly_revenue),
-            'available_equipment': available_equipment,
-            'recent_rentals': recent_rentals,
-            'equipment_stats': equipment_stats
-        })
+        # Contadores mantidos incrementalmente (Core.aggregates): uma única consulta
+        counters = dashboard_counters()
+        recent = Aluguel.objects.select_related('cliente', 'equipamento').order_by('-created_at')[:5]
+        return JsonResponse(dashboard_payload(counters, recent))
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=400)
\ No newline at end of file
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@require_http_methods(["GET"])
+@login_required
+@staff_member_required
+@cached_api(ALUGUEL, EQUIPAMENTO)
+def utilization_report_api(request):
+    """Occupied hours, utilization % and revenue per equipment between ?start= and ?end="""
+    if not request.GET.get('start') or not request.GET.get('end'):
+        return JsonResponse({'error': "Informe os parâmetros 'start' e 'end'"}, status=400)
+    try:
+        inicio = parse_datetime_param(request.GET['start'])
+        fim = parse_datetime_param(request.GET['end'], end_of_day=True)
+        granularity = request.GET.get('granularity', 'day')
+        buckets, results = utilization(inicio, fim, granularity)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'granularity': granularity,
+        'buckets': buckets,
+        'results': results
+    })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@login_required
+@staff_member_required
+def batch_api(request):
+    """Several API calls in one round trip; writes share one transaction (see Core.batch)"""
+    try:
+        items = batch.parse(request.body)
+    except batch.InvalidBatch as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(batch.execute(request, items))
+
+
+@require_http_methods(["GET"])
+def metrics_api(request):
+    """Prometheus scrape endpoint; see Core.metrics"""
+    if not metrics.authorized(request):
+        response = JsonResponse({'error': 'Não autorizado'}, status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@require_http_methods(["GET"])
+@login_required
+@staff_member_required
+def profiling_api(request):
+    """Recent request timings collected by Core.profiling (DJANGO_PROFILING=1)"""
+    return JsonResponse({
+        'enabled': settings.PROFILING_ENABLED,
+        'endpoints': profiling.summary(),
+        'requests': profiling.recent_profiles(),
+    })
+
+
+@require_http_methods(["GET"])
+@login_required
+@staff_member_required
+def sync_api(request):
+    """
+    Clients, equipment and rentals changed or deleted after ?since=<cursor>.
+    Without a cursor returns a full snapshot; follow 'cursor' while 'has_more'.
+    """
+    limit = request.GET.get('limit') or str(DEFAULT_SYNC_LIMIT)
+    if not limit.isdigit() or int(limit) < 1:
+        return JsonResponse({'error': "Parâmetro 'limit' deve ser um número inteiro maior que zero"}, status=400)
+    try:
+        payload = changes(request.GET.get('since'), min(int(limit), MAX_SYNC_LIMIT))
+    except InvalidPageParameter as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(payload)
+
+
+EXPORT_FILTERS = {
+    'clientes': filter_clientes,
+    'equipamentos': filter_equipamentos,
+    'alugueis': filter_alugueis,
+}
+
+
+@require_http_methods(["GET"])
+@login_required
+@staff_member_required
+def export_api(request, recurso):
+    """Stream every row of a resource as CSV or NDJSON (?format=), honoring the list filters"""
+    if recurso not in EXPORT_FILTERS:
+        raise Http404
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return JsonResponse({'error': f"Formato inválido: {fmt}"}, status=400)
+    try:
+        queryset = EXPORT_FILTERS[recurso](base_queryset(recurso), request)
+    except InvalidFilter as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    response = StreamingHttpResponse(stream_rows(recurso, queryset, fmt), content_type=FORMATS[fmt])
+    filename = f"{recurso}-{timezone.localtime():%Y%m%d-%H%M}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@login_required
+@staff_member_required
+def import_api(request, recurso):
+    """
+    Bulk import clients or equipment from CSV or NDJSON. Accepts the file as a
+    multipart upload ('arquivo') or as the raw request body, read line by line.
+    A file that turns unreadable partway answers 400 with the report of the
+    rows imported before it, plus the error and its line.
+    """
+    if recurso not in ('clientes', 'equipamentos'):
+        raise Http404
+    content_type = request.content_type or ''
+    if content_type.startswith('multipart/'):
+        arquivo = request.FILES.get('arquivo')
+        if arquivo is None:
+            return JsonResponse({'error': "Envie o arquivo no campo 'arquivo'"}, status=400)
+        lines = arquivo
+        default_format = 'ndjson' if arquivo.name.endswith(('.ndjson', '.jsonl')) else 'csv'
+    else:
+        lines = request
+        default_format = 'ndjson' if 'ndjson' in content_type else 'csv'
+
+    try:
+        rows = read_rows(lines, request.GET.get('format', default_format))
+        report = import_rows(
+            recurso,
+            rows,
+            batch_size=request.GET.get('batch_size', DEFAULT_BATCH_SIZE),
+            on_conflict=request.GET.get('on_conflict', 'skip'),
+        )
+    except UnreadableFile as e:
+        return JsonResponse({**e.report, 'error': str(e), 'line': e.line}, status=400)
+    except (ValueError, UnicodeDecodeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(report)